@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Adaptive batch sizing for multi-ticker GetTrades calls.
+A batch whose response looks empty or incomplete is bisected and retried, and
+each endpoint learns the largest batch size it answers without losing data.
+"""
+
+import threading
+
+class AdaptiveBatchSizer:
+    """Learns a per-endpoint batch size that maximizes tickers per call.
+
+    Sizes grow additively after complete batches and are halved when a batch
+    has to be bisected; the failing size becomes a ceiling for later growth.
+    """
+
+    def __init__(self, name, initial=10, minimum=1, maximum=50, step=5):
+        self.name = name
+        self.size = initial
+        self.minimum = minimum
+        self.ceiling = maximum
+        self.step = step
+        self.calls = 0
+        self.bisections = 0
+        self.lock = threading.Lock()
+
+    def record_success(self, batch_len):
+        with self.lock:
+            self.calls += 1
+            if batch_len >= self.size:
+                self.size = min(self.ceiling, self.size + self.step)
+
+    def record_failure(self, batch_len):
+        with self.lock:
+            self.calls += 1
+            self.bisections += 1
+            self.ceiling = max(self.minimum, min(self.ceiling, batch_len - 1))
+            self.size = max(self.minimum, min(self.size, batch_len // 2))
+
+    def summary(self):
+        return f"{self.name}: learned batch size {self.size} (ceiling {self.ceiling}), {self.calls} calls, {self.bisections} bisections"
+
+def iter_adaptive_batches(tickers, sizer):
+    """Yield consecutive ticker batches, re-reading the learned size before each slice"""
+    i = 0
+    while i < len(tickers):
+        batch = tickers[i:i + sizer.size]
+        i += len(batch)
+        yield batch
+
+def fetch_with_bisection(fetch_checked, batch, sizer):
+    """Run fetch_checked(batch) -> (results, complete) and bisect incomplete batches.
+
+    Single-ticker batches are accepted as-is since they cannot be split further.
+    """
+    results, complete = fetch_checked(batch)
+    if complete or len(batch) == 1:
+        sizer.record_success(len(batch))
+        return results
+
+    sizer.record_failure(len(batch))
+    mid = len(batch) // 2
+    print(f"\n   ✂️  {sizer.name}: suspicious result for {len(batch)} tickers, bisecting into {mid} + {len(batch) - mid}")
+    merged = fetch_with_bisection(fetch_checked, batch[:mid], sizer)
+    merged.update(fetch_with_bisection(fetch_checked, batch[mid:], sizer))
+    return merged
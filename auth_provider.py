@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Cached VolumeLeaders auth material.
+Loads the cookie and XSRF token once, shares them across threads, and reloads
+only when a watched credentials file changes or the API answers 401/403.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+class AuthProvider:
+    """Thread-safe cache of the cookie and XSRF token.
+
+    The loaders are called on first use and again only when the mtime of one
+    of `watch_paths` changes (checked at most every `check_interval` seconds)
+    or when refresh() is called after an auth failure.
+    """
+
+    def __init__(self, cookie_loader=None, xsrf_loader=None, watch_paths=(), check_interval=5.0):
+        self.cookie_loader = cookie_loader
+        self.xsrf_loader = xsrf_loader
+        self.watch_paths = [Path(p) for p in watch_paths]
+        self.check_interval = check_interval
+        self.cookie = None
+        self.xsrf_token = None
+        self.generation = 0
+        self.loaded = False
+        self.mtimes = None
+        self.checked_at = 0.0
+        self.loads = 0
+        self.rejected_generation = None
+        self.lock = threading.Lock()
+
+    def _stat(self):
+        mtimes = []
+        for path in self.watch_paths:
+            try:
+                mtimes.append(path.stat().st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
+    def _load(self):
+        self.cookie = self.cookie_loader() if self.cookie_loader else None
+        self.xsrf_token = self.xsrf_loader() if self.xsrf_loader else None
+        self.mtimes = self._stat()
+        self.checked_at = time.monotonic()
+        self.generation += 1
+        self.loaded = True
+        self.loads += 1
+
+    def get(self):
+        """Return (cookie, xsrf_token, generation), reloading if a watched file changed"""
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            elif self.watch_paths and time.monotonic() - self.checked_at >= self.check_interval:
+                self.checked_at = time.monotonic()
+                if self._stat() != self.mtimes:
+                    print("🔑 Credentials file changed, reloading auth")
+                    self._load()
+            return self.cookie, self.xsrf_token, self.generation
+
+    def refresh(self, seen_generation):
+        """Reload after a 401/403 seen with `seen_generation`. Returns True if the material changed.
+
+        Threads that failed with an older generation than the current one just
+        retry with what another thread already reloaded; once reloading has
+        produced the same rejected material, later failures return False quietly.
+        """
+        with self.lock:
+            if seen_generation == self.rejected_generation:
+                return False
+            if seen_generation != self.generation:
+                return True
+            old = (self.cookie, self.xsrf_token)
+            self._load()
+            changed = (self.cookie, self.xsrf_token) != old
+            if changed:
+                print("🔑 Auth rejected, reloaded credentials")
+            else:
+                self.rejected_generation = self.generation
+                print("🔑 Auth rejected and credentials are unchanged; re-authenticate to continue")
+            return changed
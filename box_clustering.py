@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Price-box clustering for sweep trades.
+Segments every ticker's sweep trades into price clusters in one vectorized
+pass: trades are sorted by (ticker, price) and a new box starts wherever the
+ticker changes or the next price is more than a gap threshold above the last.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from trade_store import trade_day
+
+DEFAULT_GAP_PCT = 1.5  # Gap between consecutive trade prices that splits a box
+MAX_BOXES = 5
+BOX_COLORS = ["#FF6B6B", "#4ECDC4", "#45B7D1", "#FFA07A", "#98D8C8"]
+
+def cluster_price_boxes(rows, tickers_batch, start_date, end_date, max_boxes=MAX_BOXES, gap_pct=DEFAULT_GAP_PCT):
+    """Cluster sweep trade rows into up to max_boxes price boxes per ticker.
+
+    Boxes are numbered by dollars (box 1 holds the most) and carry their price
+    range, volume, dollars, trade count and the dates of their trades.
+    Returns {ticker: [box, ...]} with an empty list for tickers without trades.
+    """
+    ticker_index = {ticker: i for i, ticker in enumerate(tickers_batch)}
+    tickers, prices, volumes, dollars, days = [], [], [], [], []
+    for trade in rows:
+        index = ticker_index.get(trade.get('Ticker', ''))
+        if index is None:
+            continue
+        try:
+            price = float(trade.get('Current', 0) or trade.get('Price', 0))
+            volume = int(trade.get('Volume', 0))
+            dollar = int(trade.get('Dollars', 0))
+        except (ValueError, TypeError):
+            continue
+        day = trade_day(trade)
+        tickers.append(index)
+        prices.append(price)
+        volumes.append(volume)
+        dollars.append(dollar)
+        days.append(day.toordinal() if day else -1)
+
+    ticker_boxes = {ticker: [] for ticker in tickers_batch}
+    if not tickers:
+        return ticker_boxes
+
+    tickers = np.asarray(tickers)
+    prices = np.asarray(prices, dtype=float)
+    volumes = np.asarray(volumes, dtype=np.int64)
+    dollars = np.asarray(dollars, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+
+    order = np.lexsort((prices, tickers))
+    tickers, prices, volumes, dollars, days = tickers[order], prices[order], volumes[order], dollars[order], days[order]
+
+    # A box boundary is a ticker change or a price gap wider than gap_pct
+    new_box = np.ones(len(prices), dtype=bool)
+    previous = prices[:-1]
+    gaps = np.where(previous > 0, prices[1:] / np.where(previous > 0, previous, 1) - 1, np.inf)
+    new_box[1:] = (tickers[1:] != tickers[:-1]) | (gaps > gap_pct / 100)
+    starts = np.flatnonzero(new_box)
+
+    box_ticker = tickers[starts]
+    box_low = prices[starts]
+    box_high = np.maximum.reduceat(prices, starts)
+    box_volume = np.add.reduceat(volumes, starts)
+    box_dollars = np.add.reduceat(dollars, starts)
+    box_trades = np.diff(np.append(starts, len(prices)))
+    known_days = np.where(days >= 0, days, np.iinfo(np.int64).max)
+    box_first_day = np.minimum.reduceat(known_days, starts)
+    box_last_day = np.maximum.reduceat(days, starts)
+
+    # Rank boxes by dollars within each ticker and keep the top max_boxes
+    ranked = np.lexsort((-box_dollars, box_ticker))
+    for box in ranked:
+        ticker = tickers_batch[box_ticker[box]]
+        boxes = ticker_boxes[ticker]
+        if len(boxes) >= max_boxes:
+            continue
+        if box_last_day[box] >= 0:
+            first_day = date.fromordinal(int(box_first_day[box]))
+            last_day = date.fromordinal(int(box_last_day[box]))
+            date_range = f"{first_day.isoformat()} to {last_day.isoformat()}"
+        else:
+            date_range = f"{start_date} to {end_date}"
+        boxes.append({
+            "box_number": len(boxes) + 1,
+            "high_price": float(box_high[box]),
+            "low_price": float(box_low[box]),
+            "volume": int(box_volume[box]),
+            "dollars": int(box_dollars[box]),
+            "trades": int(box_trades[box]),
+            "date_range": date_range,
+            "color": BOX_COLORS[len(boxes) % len(BOX_COLORS)]
+        })
+    return ticker_boxes
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Publish changed files to git without staging or diffing the whole tree.
+The publisher is handed the exact files that changed. It writes their blobs
+and a commit on top of the branch tip through a single `git fast-import`
+stream, points the index at the new blobs with `git update-index --index-info`
+(so the work tree stays clean), and pushes. The work done scales with the
+number of changed files rather than the size of ticker_data/, and it works the
+same against a bare repository (no index or work tree to update).
+"""
+
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+
+FILE_MODE = '100644'
+
+class PublishError(Exception):
+    """A git plumbing command failed while publishing"""
+
+def blob_id(content):
+    """Object id git assigns to a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+class GitPublisher:
+    """Commits explicit file changes to one branch of a repository"""
+
+    def __init__(self, repo_dir, branch=None, remote='origin'):
+        self.repo_dir = Path(repo_dir)
+        self.remote = remote
+        self.bare = self._git('rev-parse', '--is-bare-repository').strip() == 'true'
+        head = self._git('symbolic-ref', '-q', '--short', 'HEAD', check=False).strip()
+        self.branch = branch or head
+        if not self.branch:
+            raise PublishError(f"{self.repo_dir}: HEAD is detached; pass a branch to publish to")
+        # The index only mirrors the checked-out branch
+        self.update_index = not self.bare and self.branch == head
+
+    def _git(self, *args, input=None, check=True):
+        result = subprocess.run(['git', *args], cwd=self.repo_dir, input=input,
+                                capture_output=True, text=isinstance(input, str) or input is None)
+        if check and result.returncode != 0:
+            stderr = result.stderr if isinstance(result.stderr, str) else result.stderr.decode('utf-8', 'replace')
+            raise PublishError(f"git {args[0]} failed: {stderr.strip()}")
+        return result.stdout
+
+    def tip(self):
+        """Commit id of the branch tip, or None for a branch without commits"""
+        return self._git('rev-parse', '-q', '--verify', f"refs/heads/{self.branch}^{{commit}}", check=False).strip() or None
+
+    def current_blobs(self, parent, paths):
+        """{path: blob id} in the parent commit for the given paths (missing paths are omitted)"""
+        if parent is None or not paths:
+            return {}
+        output = self._git('cat-file', '--batch-check=%(objectname) %(objecttype)',
+                           input="".join(f"{parent}:{path}\n" for path in paths))
+        blobs = {}
+        for path, line in zip(paths, output.splitlines()):
+            object_id, _, object_type = line.partition(' ')
+            if object_type == 'blob':
+                blobs[path] = object_id
+        return blobs
+
+    def publish(self, changes, message, push=True):
+        """Commit {repo path: bytes, or None to delete} on the branch and optionally push.
+
+        Paths whose content already matches the branch tip are dropped; returns the new
+        commit id, or None when nothing actually changed.
+        """
+        parent = self.tip()
+        paths = sorted(changes)
+        current = self.current_blobs(parent, paths)
+
+        updates, deletes = {}, []
+        for path in paths:
+            content = changes[path]
+            if content is None:
+                if path in current:
+                    deletes.append(path)
+            else:
+                object_id = blob_id(content)
+                if current.get(path) != object_id:
+                    updates[path] = (object_id, content)
+        if not updates and not deletes:
+            return None
+
+        self._fast_import(parent, updates, deletes, message)
+        commit = self.tip()
+        if self.update_index:
+            entries = [f"{FILE_MODE} {object_id}\t{path}" for path, (object_id, _) in updates.items()]
+            entries += [f"0 {'0' * 40}\t{path}" for path in deletes]
+            self._git('update-index', '--index-info', input="".join(f"{entry}\n" for entry in entries))
+        if push:
+            self._git('push', self.remote, f"refs/heads/{self.branch}")
+        return commit
+
+    def publish_files(self, paths, deleted=(), message='', push=True):
+        """Publish work-tree files (repo-relative paths) and deletions"""
+        changes = {}
+        for path in paths:
+            try:
+                changes[Path(path).as_posix()] = (self.repo_dir / path).read_bytes()
+            except FileNotFoundError:
+                changes[Path(path).as_posix()] = None
+        for path in deleted:
+            changes[Path(path).as_posix()] = None
+        return self.publish(changes, message, push=push)
+
+    def _fast_import(self, parent, updates, deletes, message):
+        ident = self._git('var', 'GIT_COMMITTER_IDENT').strip()
+        encoded_message = message.encode('utf-8')
+        stream = [
+            f"commit refs/heads/{self.branch}\n".encode(),
+            f"committer {ident}\n".encode('utf-8'),
+            b"data %d\n" % len(encoded_message), encoded_message, b"\n",
+        ]
+        if parent:
+            stream.append(f"from {parent}\n".encode())
+        for path in deletes:
+            stream.append(f"D {path}\n".encode('utf-8'))
+        for path, (_, content) in updates.items():
+            stream.append(f"M {FILE_MODE} inline {path}\n".encode('utf-8'))
+            stream.append(b"data %d\n" % len(content))
+            stream.append(content)
+            stream.append(b"\n")
+        stream.append(b"done\n")
+        self._git('fast-import', '--quiet', '--done', input=b"".join(stream))
+
+def repo_relative(repo_dir, path):
+    """Path of a file relative to the repository root, in git's forward-slash form"""
+    return Path(os.path.relpath(path, repo_dir)).as_posix()
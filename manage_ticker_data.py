@@ -7,39 +7,40 @@ Provides tools to list, update, clean, and analyze ticker data.
 import json
 import argparse
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import subprocess
+import time
+
+from precompress import CompressionStats, precompress_file
+from ticker_bundle import BundleWriter, TickerBundle, bundle_paths
+from ticker_index import load_index
+from ticker_files import (FORMAT_VERSIONS, decode_ticker_data, encode_ticker_data, get_ticker_writer, load_ticker_file,
+                          load_manifest, manifest_dir, manifest_path, update_manifest)
+from ticker_store import DEFAULT_DB_PATH, TickerStore
 
 def list_ticker_files(output_dir):
-    """List all ticker files with metadata"""
-    ticker_files = list(output_dir.glob("*.json"))
+    """List all ticker files with metadata (from ticker_index.json)"""
+    index = load_index(output_dir)
     
-    if not ticker_files:
+    if not index:
         print("No ticker files found")
         return
     
-    print(f"Found {len(ticker_files)} ticker files:")
+    print(f"Found {len(index)} ticker files:")
     print("-" * 80)
     print(f"{'TICKER':<8} {'GENERATED':<20} {'PRINTS':<7} {'LEVELS':<7} {'BOXES':<6}")
     print("-" * 80)
     
-    for file_path in sorted(ticker_files):
-        ticker = file_path.stem
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                generated = data.get('metadata', {}).get('generated_at', 'Unknown')[:19]
-                prints_count = len(data.get('prints', []))
-                levels_count = len(data.get('levels', []))
-                boxes_count = len(data.get('boxes', []))
-                
-                print(f"{ticker:<8} {generated:<20} {prints_count:<7} {levels_count:<7} {boxes_count:<6}")
-        except Exception as e:
-            print(f"{ticker:<8} ERROR: {e}")
+    for ticker, entry in sorted(index.items()):
+        if 'error' in entry:
+            print(f"{ticker:<8} ERROR: {entry['error']}")
+            continue
+        generated = (entry.get('generated_at') or 'Unknown')[:19]
+        print(f"{ticker:<8} {generated:<20} {entry['prints']:<7} {entry['levels']:<7} {entry['boxes']:<6}")
 
-def update_tickers(tickers, output_dir, max_workers=3):
-    """Update specific tickers using the populate script"""
+def update_tickers(tickers, output_dir, max_workers=3, extra_args=()):
+    """Update specific tickers using the populate script (extra_args are passed through)"""
     script_path = Path(__file__).parent / 'populate_ticker_data.py'
     python_path = Path(__file__).parent.parent / '.venv' / 'bin' / 'python3'
     
@@ -49,7 +50,7 @@ def update_tickers(tickers, output_dir, max_workers=3):
         '--tickers'
     ] + tickers + [
         '--max-workers', str(max_workers)
-    ]
+    ] + list(extra_args)
     
     print(f"Updating tickers: {', '.join(tickers)}")
     
@@ -66,7 +67,7 @@ def clean_old_files(output_dir, days_old=7):
     for file_path in ticker_files:
         try:
             with open(file_path, 'r') as f:
-                data = json.load(f)
+                data = decode_ticker_data(json.load(f))
                 generated_str = data.get('metadata', {}).get('generated_at', '')
                 
                 if generated_str:
@@ -92,35 +93,51 @@ def get_ticker_data(ticker, output_dir):
     
     try:
         with open(ticker_file, 'r') as f:
-            return json.load(f)
+            return decode_ticker_data(json.load(f))
     except Exception as e:
         print(f"Error reading data for {ticker}: {e}")
         return None
 
 def find_tickers_with_data(output_dir, data_type, min_count=1):
     """Find tickers that have a minimum amount of specific data type"""
-    ticker_files = list(output_dir.glob("*.json"))
-    matching_tickers = []
-    
-    for file_path in ticker_files:
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                count = len(data.get(data_type, []))
-                
-                if count >= min_count:
-                    matching_tickers.append({
-                        'ticker': file_path.stem,
-                        'count': count,
-                        'generated_at': data.get('metadata', {}).get('generated_at', '')
-                    })
-        except Exception as e:
-            print(f"Error reading {file_path.name}: {e}")
+    matching_tickers = [
+        {
+            'ticker': ticker,
+            'count': entry.get(data_type, 0),
+            'generated_at': entry.get('generated_at', '')
+        }
+        for ticker, entry in load_index(output_dir).items()
+        if entry.get(data_type, 0) >= min_count
+    ]
     
     # Sort by count (descending)
     matching_tickers.sort(key=lambda x: x['count'], reverse=True)
     return matching_tickers
 
+def show_stats(output_dir, rebuild=False):
+    """Universe-wide totals from ticker_index.json"""
+    start = time.perf_counter()
+    index = load_index(output_dir, rebuild=rebuild)
+    elapsed = time.perf_counter() - start
+    
+    entries = [entry for entry in index.values() if 'error' not in entry]
+    errors = len(index) - len(entries)
+    if not entries:
+        print("No ticker files found")
+        return
+    
+    generated = sorted(entry['generated_at'] for entry in entries if entry.get('generated_at'))
+    print(f"Tickers:       {len(index)}" + (f" ({errors} unreadable)" if errors else ""))
+    for data_type in ('prints', 'levels', 'boxes'):
+        total = sum(entry[data_type] for entry in entries)
+        with_data = sum(1 for entry in entries if entry[data_type])
+        print(f"{data_type.capitalize() + ':':<14} {total} total, {with_data} tickers with any")
+    print(f"Empty tickers: {sum(1 for entry in entries if not (entry['prints'] or entry['levels'] or entry['boxes']))}")
+    print(f"Total size:    {sum(entry['size'] for entry in index.values()) / 1024:.0f} KB")
+    if generated:
+        print(f"Generated:     {generated[0][:19]} (oldest) to {generated[-1][:19]} (newest)")
+    print(f"Index:         {'rebuilt' if rebuild else 'loaded'} in {elapsed * 1000:.0f} ms")
+
 def export_trendspider_format(output_dir, export_file):
     """Export all ticker data in TrendSpider import format"""
     ticker_files = list(output_dir.glob("*.json"))
@@ -139,7 +156,7 @@ def export_trendspider_format(output_dir, export_file):
         ticker = file_path.stem
         try:
             with open(file_path, 'r') as f:
-                data = json.load(f)
+                data = decode_ticker_data(json.load(f))
                 all_data["tickers"][ticker] = {
                     "prints": data.get('prints', []),
                     "levels": data.get('levels', []),
@@ -158,6 +175,185 @@ def export_trendspider_format(output_dir, export_file):
         print(f"Error exporting data: {e}")
         return False
 
+def size_report(output_dir, file_format='compact', budget_kb=None):
+    """Compare each file's size on disk with its size in every format"""
+    ticker_files = sorted(output_dir.glob("*.json"))
+    if not ticker_files:
+        print("No ticker files found")
+        return True
+    
+    formats = list(FORMAT_VERSIONS)
+    totals = {name: 0 for name in ['disk'] + formats}
+    over_budget = []
+    rows = []
+    
+    for file_path in ticker_files:
+        try:
+            with open(file_path, 'r') as f:
+                data = decode_ticker_data(json.load(f))
+        except Exception as e:
+            print(f"Error reading {file_path.name}: {e}")
+            continue
+        sizes = {'disk': file_path.stat().st_size}
+        for name in formats:
+            sizes[name] = len(encode_ticker_data(data, name).encode('utf-8'))
+        for name, size in sizes.items():
+            totals[name] += size
+        rows.append((file_path.stem, sizes))
+        if budget_kb and sizes[file_format] > budget_kb * 1024:
+            over_budget.append((file_path.stem, sizes[file_format]))
+    
+    print(f"{'TICKER':<8} {'DISK':>9} " + " ".join(f"{name.upper():>9}" for name in formats))
+    print("-" * (19 + 10 * len(formats)))
+    for ticker, sizes in rows:
+        print(f"{ticker:<8} {sizes['disk']:>9} " + " ".join(f"{sizes[name]:>9}" for name in formats))
+    print("-" * (19 + 10 * len(formats)))
+    print(f"{'TOTAL':<8} {totals['disk']:>9} " + " ".join(f"{totals[name]:>9}" for name in formats))
+    
+    if totals['disk']:
+        for name in formats:
+            print(f"{name:<9} {totals[name] / 1024:>8.0f} KB {1 - totals[name] / totals['disk']:>6.0%} saved vs disk")
+    
+    if budget_kb:
+        if over_budget:
+            print(f"\n⚠️  {len(over_budget)} files over {budget_kb} KB as {file_format}:")
+            for ticker, size in sorted(over_budget, key=lambda item: item[1], reverse=True):
+                print(f"   {ticker:<8} {size / 1024:.1f} KB")
+            return False
+        print(f"\n✓ All files within {budget_kb} KB as {file_format}")
+    return True
+
+def rebuild_manifest(output_dir):
+    """Rebuild the manifest shards from every ticker file"""
+    directory = manifest_dir(output_dir)
+    for path in directory.glob("*.json"):
+        path.unlink()
+    if directory.is_dir():
+        directory.rmdir()
+    manifest_path(output_dir).unlink(missing_ok=True)
+    shards = update_manifest(output_dir)
+    print(f"Wrote {len(shards)} shards to {directory} ({len(load_manifest(output_dir))} tickers)")
+
+AGGREGATE_FILES = ('big_prints.json', 'price_boxes.json', 'support_resistance_levels.json')
+
+def compress_files(output_dir):
+    """Write .json.gz/.json.br variants for every ticker file and the aggregate files"""
+    ticker_stats = CompressionStats()
+    written = []
+    for file_path in sorted(output_dir.glob("*.json")):
+        written += [path.name for path in precompress_file(file_path, ticker_stats)]
+    if written:
+        # Logged so the next publish picks the new variants up
+        get_ticker_writer(output_dir).record_pending(*written)
+    print(f"Ticker files:\n{ticker_stats.report()}")
+    
+    for name in AGGREGATE_FILES:
+        file_path = Path(__file__).parent / name
+        if file_path.exists():
+            stats = CompressionStats()
+            precompress_file(file_path, stats)
+            print(f"{name}:\n{stats.report()}")
+
+def export_bundle(output_dir, bundle_path):
+    """Stream every ticker into an indexed bundle (bundle_path.data + bundle_path.idx)"""
+    count = 0
+    try:
+        with BundleWriter(bundle_path) as writer:
+            for file_path in sorted(output_dir.glob("*.json")):
+                try:
+                    with open(file_path, 'r') as f:
+                        data = decode_ticker_data(json.load(f))
+                except Exception as e:
+                    print(f"Error reading {file_path.name}: {e}")
+                    continue
+                writer.add(file_path.stem, {
+                    "prints": data.get('prints', []),
+                    "levels": data.get('levels', []),
+                    "boxes": data.get('boxes', []),
+                    "last_updated": data.get('metadata', {}).get('generated_at', '')
+                })
+                count += 1
+        data_path, index_path = bundle_paths(bundle_path)
+        print(f"Exported {count} tickers to {data_path} ({data_path.stat().st_size / 1024:.0f} KB) "
+              f"and {index_path} ({index_path.stat().st_size / 1024:.0f} KB)")
+        return True
+    except Exception as e:
+        print(f"Error exporting bundle: {e}")
+        return False
+
+def query_store(db_path, section, sql=None, limit=50, **filters):
+    """Print rows from the ticker store matching the filters (or an arbitrary SQL query)"""
+    if not Path(db_path).exists():
+        print(f"Ticker store {db_path} does not exist (run populate_ticker_data.py --ticker-store or store-import)")
+        return False
+    store = TickerStore(db_path, readonly=True)
+    try:
+        start = time.perf_counter()
+        if sql:
+            columns, rows = store.execute(sql)
+            elapsed = time.perf_counter() - start
+            print("\t".join(columns))
+            for row in rows:
+                print("\t".join("" if value is None else str(value) for value in row))
+        else:
+            rows = store.find(section, limit=limit, **filters)
+            elapsed = time.perf_counter() - start
+            for ticker, record in rows:
+                if section == 'prints':
+                    day = datetime.fromtimestamp(record['timestamp'], tz=timezone.utc).strftime('%Y-%m-%d') if record.get('timestamp') else '-'
+                    print(f"{ticker:<8} {day} ${record.get('price', 0):>10.2f} ${record.get('dollars', 0):>16,.0f} "
+                          f"rank {record.get('rank')}{' dark pool' if record.get('is_dark_pool') else ''}")
+                elif section == 'levels':
+                    print(f"{ticker:<8} ${record.get('price', 0):>10.2f} ${record.get('dollars', 0):>16,.0f} rank {record.get('rank')}")
+                else:
+                    print(f"{ticker:<8} ${record.get('low_price', 0):>10.2f}-{record.get('high_price', 0):<10.2f} "
+                          f"${record.get('dollars', 0):>16,.0f} {record.get('trades', 0)} trades")
+        print(f"{len(rows)} rows in {elapsed * 1000:.1f} ms")
+        return True
+    finally:
+        store.close()
+
+def import_store(output_dir, db_path):
+    """Load every ticker file into the ticker store (files are left as they are)"""
+    store = TickerStore(db_path)
+    try:
+        store.start_run(script='manage_ticker_data.py')
+        for file_path in sorted(output_dir.glob("*.json")):
+            try:
+                ticker_data = load_ticker_file(file_path)
+            except Exception as e:
+                print(f"Error reading {file_path.name}: {e}")
+                continue
+            store.put(file_path.stem, ticker_data)
+        # The files already hold this data
+        store.mark_materialized()
+        print(f"Imported {store.stored} tickers into {db_path} ({store.unchanged} unchanged)")
+    finally:
+        store.close()
+
+def materialize_store(output_dir, db_path, force=False, aggregates=False, precompress=False):
+    """Write ticker files, and optionally the aggregate files, from the ticker store"""
+    if not Path(db_path).exists():
+        print(f"Ticker store {db_path} does not exist")
+        return False
+    store = TickerStore(db_path)
+    try:
+        ticker_writer = get_ticker_writer(output_dir)
+        ticker_writer.set_precompress(precompress)
+        if force:
+            for ticker in store.tickers():
+                store.materialize_ticker(ticker, output_dir)
+        else:
+            store.materialize_pending(output_dir)
+        ticker_writer.flush_index()
+        print(f"Ticker files:\n{ticker_writer.report()}")
+        if aggregates:
+            written = store.materialize_aggregates(Path(output_dir).parent, force=force, precompress=precompress)
+            print(f"Aggregate files rewritten: {', '.join(path.name for path in written) or 'none'}")
+        return True
+    finally:
+        store.close()
+
 def main():
     parser = argparse.ArgumentParser(description='Manage ticker data files')
     parser.add_argument('--data-dir', default='ticker_data', help='Directory containing ticker files')
@@ -171,6 +367,10 @@ def main():
     update_parser = subparsers.add_parser('update', help='Update specific tickers')
     update_parser.add_argument('tickers', nargs='+', help='Tickers to update')
     update_parser.add_argument('--max-workers', type=int, default=3, help='Max concurrent workers')
+    update_parser.add_argument('--cache-ttl', type=int, help='Seconds a cached API response stays fresh (0 disables the cache)')
+    update_parser.add_argument('--cache-dir', help='Directory for cached API responses')
+    update_parser.add_argument('--offline', action='store_true', help='Rebuild from cached API responses only')
+    update_parser.add_argument('--output-format', choices=list(FORMAT_VERSIONS), help='Ticker file format to write')
     
     # Clean command
     clean_parser = subparsers.add_parser('clean', help='Remove old ticker files')
@@ -179,6 +379,7 @@ def main():
     # Get command
     get_parser = subparsers.add_parser('get', help='Get data for specific ticker')
     get_parser.add_argument('ticker', help='Ticker symbol')
+    get_parser.add_argument('--bundle', help='Read the ticker from an exported bundle instead of its file')
     
     # Find command
     find_parser = subparsers.add_parser('find', help='Find tickers with specific data')
@@ -188,6 +389,46 @@ def main():
     # Export command
     export_parser = subparsers.add_parser('export', help='Export all data for TrendSpider')
     export_parser.add_argument('output_file', help='Output file path')
+    export_parser.add_argument('--bundle', action='store_true', help='Write an indexed bundle (output_file.data + output_file.idx) instead of one JSON document')
+    
+    # Manifest command
+    subparsers.add_parser('manifest', help='Rebuild the manifest shards (ticker -> content hash)')
+    
+    # Stats command
+    stats_parser = subparsers.add_parser('stats', help='Show totals across all tickers')
+    stats_parser.add_argument('--rebuild', action='store_true', help='Re-parse every file to rebuild ticker_index.json')
+    
+    # Compress command
+    subparsers.add_parser('compress', help='Write .json.gz/.json.br variants and report compression ratios')
+    
+    # Sizes command
+    sizes_parser = subparsers.add_parser('sizes', help='Report file sizes in each output format')
+    sizes_parser.add_argument('--format', choices=list(FORMAT_VERSIONS), default='compact', help='Format checked against the budget')
+    sizes_parser.add_argument('--budget-kb', type=float, help='Flag files larger than this many KB (exit 1 if any)')
+    
+    # Ticker store commands
+    query_parser = subparsers.add_parser('query', help='Query prints, levels or boxes across tickers in the ticker store')
+    query_parser.add_argument('section', nargs='?', choices=['prints', 'levels', 'boxes'], default='prints', help='Table to query (default: prints)')
+    query_parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='SQLite ticker store')
+    query_parser.add_argument('--ticker', help='Only this ticker')
+    query_parser.add_argument('--dark-pool', action='store_true', help='Only dark pool prints')
+    query_parser.add_argument('--min-dollars', type=float, help='Minimum dollar value')
+    query_parser.add_argument('--min-price', type=float, help='Minimum price (boxes: top of the box)')
+    query_parser.add_argument('--max-price', type=float, help='Maximum price (boxes: bottom of the box)')
+    query_parser.add_argument('--days', type=float, help='Only prints from the last N days')
+    query_parser.add_argument('--since', help='Only prints on or after this date (YYYY-MM-DD)')
+    query_parser.add_argument('--run', type=int, help='Only rows stored by this run id')
+    query_parser.add_argument('--limit', type=int, default=50, help='Maximum rows (default: 50, 0 for all)')
+    query_parser.add_argument('--sql', help='Run this SQL statement instead')
+    
+    import_parser = subparsers.add_parser('store-import', help='Load every ticker file into the ticker store')
+    import_parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='SQLite ticker store')
+    
+    materialize_parser = subparsers.add_parser('materialize', help='Write ticker files (and with --aggregates the aggregate files) from the ticker store')
+    materialize_parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='SQLite ticker store')
+    materialize_parser.add_argument('--force', action='store_true', help='Check every ticker file and rebuild the aggregates even when nothing changed')
+    materialize_parser.add_argument('--aggregates', action='store_true', help='Also rebuild big_prints.json, price_boxes.json and support_resistance_levels.json')
+    materialize_parser.add_argument('--precompress', action='store_true', help='Also write .json.gz (and .json.br with the brotli package) variants of the files written')
     
     args = parser.parse_args()
     
@@ -203,14 +444,29 @@ def main():
         list_ticker_files(output_dir)
     
     elif args.command == 'update':
-        success = update_tickers(args.tickers, output_dir, args.max_workers)
+        extra_args = []
+        if args.cache_ttl is not None:
+            extra_args += ['--cache-ttl', str(args.cache_ttl)]
+        if args.cache_dir:
+            extra_args += ['--cache-dir', args.cache_dir]
+        if args.offline:
+            extra_args.append('--offline')
+        if args.output_format:
+            extra_args += ['--output-format', args.output_format]
+        success = update_tickers(args.tickers, output_dir, args.max_workers, extra_args)
         sys.exit(0 if success else 1)
     
     elif args.command == 'clean':
         clean_old_files(output_dir, args.days)
     
     elif args.command == 'get':
-        data = get_ticker_data(args.ticker, output_dir)
+        if args.bundle:
+            with TickerBundle(args.bundle) as bundle:
+                data = bundle.get(args.ticker.upper())
+            if data is None:
+                print(f"{args.ticker.upper()} is not in {args.bundle}")
+        else:
+            data = get_ticker_data(args.ticker, output_dir)
         if data:
             print(json.dumps(data, indent=2))
     
@@ -225,7 +481,41 @@ def main():
             print(f"No tickers found with {args.min_count}+ {args.data_type}")
     
     elif args.command == 'export':
-        success = export_trendspider_format(output_dir, args.output_file)
+        if args.bundle:
+            success = export_bundle(output_dir, args.output_file)
+        else:
+            success = export_trendspider_format(output_dir, args.output_file)
+        sys.exit(0 if success else 1)
+    
+    elif args.command == 'manifest':
+        rebuild_manifest(output_dir)
+    
+    elif args.command == 'stats':
+        show_stats(output_dir, args.rebuild)
+    
+    elif args.command == 'compress':
+        compress_files(output_dir)
+    
+    elif args.command == 'sizes':
+        success = size_report(output_dir, args.format, args.budget_kb)
+        sys.exit(0 if success else 1)
+    
+    elif args.command == 'query':
+        since = None
+        if args.days is not None:
+            since = int(time.time() - args.days * 86400)
+        elif args.since:
+            since = int(datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+        success = query_store(args.db, args.section, args.sql, args.limit, ticker=args.ticker and args.ticker.upper(),
+                              dark_pool=True if args.dark_pool else None, min_dollars=args.min_dollars,
+                              min_price=args.min_price, max_price=args.max_price, since=since, run_id=args.run)
+        sys.exit(0 if success else 1)
+    
+    elif args.command == 'store-import':
+        import_store(output_dir, args.db)
+    
+    elif args.command == 'materialize':
+        success = materialize_store(output_dir, args.db, args.force, args.aggregates, args.precompress)
         sys.exit(0 if success else 1)
     
     else:
@@ -6,7 +6,6 @@ When changes are detected:
 2. Commit and push changes to git repository
 """
 
-import os
 import sys
 import json
 import time
@@ -16,6 +15,11 @@ import logging
 from pathlib import Path
 from datetime import datetime
 
+from git_publisher import GitPublisher, PublishError, repo_relative
+from precompress import remove_variants
+from ticker_files import clear_pending, read_pending, update_manifest
+from ticker_store import DEFAULT_DB_PATH, TickerStore
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -231,56 +235,77 @@ def cleanup_removed_tickers(removed_tickers):
         if ticker_file.exists():
             try:
                 ticker_file.unlink()
+                remove_variants(ticker_file)
                 logger.info(f"🗑️ Removed ticker file: {ticker}.json")
                 removed_files.append(f"ticker_data/{ticker}.json")
             except Exception as e:
                 logger.error(f"❌ Error removing {ticker}.json: {e}")
     
+    # Drop them from the SQLite ticker store too (populate_ticker_data.py --ticker-store)
+    store_path = Path(REPO_DIR) / DEFAULT_DB_PATH.name
+    if removed_tickers and store_path.exists():
+        try:
+            store = TickerStore(store_path)
+            try:
+                store.remove_tickers(removed_tickers)
+            finally:
+                store.close()
+        except Exception as e:
+            logger.error(f"❌ Error removing tickers from {store_path.name}: {e}")
+    
     return removed_files
 
 def commit_and_push_changes(new_tickers=None, removed_tickers=None, full_refresh=False):
-    """Commit and push changes to git repository"""
+    """Commit and push the ticker files changed since the last publish"""
     try:
-        # Change to repository directory
-        os.chdir(REPO_DIR)
+        # Only the files the pipeline rewrote (logged by ticker_files) and removed tickers are published
+        ticker_data_dir = Path(REPO_DIR) / "ticker_data"
+        pending = read_pending(ticker_data_dir)
+        changed_files = [f"ticker_data/{name}" for name in pending]
+        # Aggregate files rebuilt from the ticker store are logged at the repository root
+        aggregate_pending = read_pending(REPO_DIR)
+        changed_files += aggregate_pending
+        removed_files = [f"ticker_data/{ticker}.json{suffix}"
+                         for ticker in (removed_tickers or []) for suffix in ('', '.gz', '.br')]
         
-        # Add all ticker data files
-        subprocess.run(['git', 'add', 'ticker_data/'], check=True)
+        # Keep the manifest shards (ticker -> content hash, read by the TrendSpider script) in step
+        manifest = update_manifest(ticker_data_dir, pending, [Path(path).name for path in removed_files])
+        changed_files.extend(repo_relative(REPO_DIR, path) for path in manifest)
         
-        # Check if there are any changes to commit
-        result = subprocess.run(['git', 'diff', '--cached', '--quiet'], capture_output=True)
+        if not changed_files and not removed_files:
+            logger.info("📋 No changes to commit")
+            return False
         
-        if result.returncode != 0:  # There are changes to commit
-            # Create commit message
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            current_tickers = load_base_tickers()
-            
-            if full_refresh:
-                commit_msg = f"Daily refresh: TrendSpider per-ticker data - {len(current_tickers)} tickers ({timestamp})"
-            elif new_tickers or removed_tickers:
-                changes = []
-                if new_tickers:
-                    changes.append(f"Added: {', '.join(new_tickers[:5])}{'...' if len(new_tickers) > 5 else ''}")
-                if removed_tickers:
-                    changes.append(f"Removed: {', '.join(removed_tickers[:5])}{'...' if len(removed_tickers) > 5 else ''}")
-                commit_msg = f"Incremental update: {' | '.join(changes)} - {len(current_tickers)} total tickers ({timestamp})"
-            else:
-                commit_msg = f"TrendSpider data update - {len(current_tickers)} tickers ({timestamp})"
-            
-            # Commit changes
-            subprocess.run(['git', 'commit', '-m', commit_msg], check=True)
-            logger.info(f"📝 Committed changes: {commit_msg}")
-            
-            # Push to remote
-            subprocess.run(['git', 'push'], check=True)
+        # Create commit message
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        current_tickers = load_base_tickers()
+        
+        if full_refresh:
+            commit_msg = f"Daily refresh: TrendSpider per-ticker data - {len(current_tickers)} tickers ({timestamp})"
+        elif new_tickers or removed_tickers:
+            changes = []
+            if new_tickers:
+                changes.append(f"Added: {', '.join(new_tickers[:5])}{'...' if len(new_tickers) > 5 else ''}")
+            if removed_tickers:
+                changes.append(f"Removed: {', '.join(removed_tickers[:5])}{'...' if len(removed_tickers) > 5 else ''}")
+            commit_msg = f"Incremental update: {' | '.join(changes)} - {len(current_tickers)} total tickers ({timestamp})"
+        else:
+            commit_msg = f"TrendSpider data update - {len(current_tickers)} tickers ({timestamp})"
+        
+        # Commit and push straight from the changed files
+        commit = GitPublisher(REPO_DIR).publish_files(changed_files, removed_files, commit_msg)
+        clear_pending(ticker_data_dir, pending)
+        clear_pending(REPO_DIR, aggregate_pending)
+        
+        if commit:
+            logger.info(f"📝 Committed {len(changed_files)} changed and {len(removed_files)} removed files: {commit_msg}")
             logger.info(f"🚀 Pushed changes to remote repository")
-            
             return True
         else:
             logger.info("📋 No changes to commit")
             return False
             
-    except subprocess.CalledProcessError as e:
+    except PublishError as e:
         logger.error(f"❌ Git operation failed: {e}")
         return False
     except Exception as e:
@@ -14,10 +14,14 @@ import logging
 import argparse
 import gc
 import psutil
+import shutil
 from pathlib import Path
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from git_publisher import GitPublisher, repo_relative
+from ticker_files import clear_pending, read_pending, update_manifest
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,6 +42,7 @@ REPO_TRENDSPIDER_DIR = f"{REPO_DIR}/trendspider_data"
 PROGRESS_FILE = f"{MAIN_PROJECT_DIR}/logs/ticker_monitor_progress.json"
 BATCH_SIZE = 50  # Process 50 tickers at a time
 MEMORY_THRESHOLD_MB = 1000  # Stop if memory usage exceeds 1GB
+TICKER_FILE_SUFFIXES = ('.json', '.json.gz', '.json.br')  # Ticker files and their precompressed variants
 
 class RobustTickerMonitor:
     def __init__(self, batch_size=BATCH_SIZE, max_workers=1):
@@ -46,6 +51,10 @@ class RobustTickerMonitor:
         self.progress_file = PROGRESS_FILE
         self.processed_tickers = set()
         self.failed_tickers = set()
+        self.pending_files = []
+        self.copied_files = []
+        self.aggregate_files = []
+        self.deleted_files = []
         self.load_progress()
         
     def load_progress(self):
@@ -107,7 +116,6 @@ class RobustTickerMonitor:
     def force_cleanup(self):
         """Force garbage collection and cleanup"""
         gc.collect()
-        time.sleep(2)  # Give system time to cleanup
     
     def load_ticker_list(self):
         """Load base_tickers from the volumeleaders_config.json file"""
@@ -182,24 +190,41 @@ class RobustTickerMonitor:
             self.force_cleanup()
     
     def copy_files_to_repo(self):
-        """Copy generated files to the repository"""
+        """Copy changed ticker files to the repository and remove files of dropped tickers"""
         try:
-            logger.info("Copying files to repository...")
-            
-            # Ensure repo directory exists
-            os.makedirs(REPO_TRENDSPIDER_DIR, exist_ok=True)
+            logger.info("Copying changed files to repository...")
             
             # Copy ticker_data directory
-            source_ticker_data = f"{MAIN_TRENDSPIDER_DIR}/ticker_data"
-            dest_ticker_data = f"{REPO_TRENDSPIDER_DIR}/ticker_data"
+            source_ticker_data = Path(MAIN_TRENDSPIDER_DIR) / "ticker_data"
+            dest_ticker_data = Path(REPO_TRENDSPIDER_DIR) / "ticker_data"
+            dest_ticker_data.mkdir(parents=True, exist_ok=True)
+            
+            if source_ticker_data.exists():
+                # Files the pipeline rewrote are logged by ticker_files; everything else is unchanged.
+                # Names missing from the repository are copied too, and names missing from the
+                # source are removed (what rsync --delete did), comparing directory listings only.
+                source_names = {entry.name for entry in os.scandir(source_ticker_data) if entry.name.endswith(TICKER_FILE_SUFFIXES)}
+                dest_names = {entry.name for entry in os.scandir(dest_ticker_data) if entry.name.endswith(TICKER_FILE_SUFFIXES)}
+                self.pending_files = read_pending(source_ticker_data)
+                self.copied_files = []
+                for name in dict.fromkeys(self.pending_files + sorted(source_names - dest_names)):
+                    source = source_ticker_data / name
+                    if source.exists():
+                        shutil.copy2(source, dest_ticker_data / name)
+                        self.copied_files.append(name)
+                
+                self.deleted_files = sorted(dest_names - source_names)
+                for name in self.deleted_files:
+                    (dest_ticker_data / name).unlink()
+                logger.info(f"Copied {len(self.copied_files)} changed files, removed {len(self.deleted_files)} files")
             
-            if os.path.exists(source_ticker_data):
-                subprocess.run([
-                    "rsync", "-av", "--delete",
-                    f"{source_ticker_data}/",
-                    f"{dest_ticker_data}/"
-                ], check=True)
-                logger.info("Successfully copied ticker_data to repository")
+            # Aggregate files rebuilt from the ticker store are logged next to ticker_data
+            self.aggregate_files = []
+            for name in read_pending(MAIN_TRENDSPIDER_DIR):
+                source = Path(MAIN_TRENDSPIDER_DIR) / name
+                if source.exists():
+                    shutil.copy2(source, Path(REPO_TRENDSPIDER_DIR) / name)
+                self.aggregate_files.append(name)
             
             return True
         except Exception as e:
@@ -207,30 +232,28 @@ class RobustTickerMonitor:
             return False
     
     def commit_and_push(self):
-        """Commit and push changes to git repository"""
+        """Commit and push the copied and removed files"""
         try:
             logger.info("Committing and pushing changes...")
             
-            # Change to repo directory
-            os.chdir(REPO_DIR)
+            repo_ticker_data = Path(REPO_TRENDSPIDER_DIR) / "ticker_data"
+            changed = [repo_relative(REPO_DIR, repo_ticker_data / name) for name in self.copied_files]
+            changed += [repo_relative(REPO_DIR, Path(REPO_TRENDSPIDER_DIR) / name) for name in self.aggregate_files]
+            deleted = [repo_relative(REPO_DIR, repo_ticker_data / name) for name in self.deleted_files]
             
-            # Add all changes
-            subprocess.run(["git", "add", "."], check=True)
+            # Keep the manifest shards (ticker -> content hash, read by the TrendSpider script) in step
+            manifest = update_manifest(repo_ticker_data, self.copied_files, self.deleted_files)
+            changed.extend(repo_relative(REPO_DIR, path) for path in manifest)
             
-            # Check if there are changes to commit
-            result = subprocess.run(
-                ["git", "diff", "--cached", "--quiet"],
-                capture_output=True
-            )
+            commit_message = f"Automated ticker data update - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            commit = None
+            if changed or deleted:
+                commit = GitPublisher(REPO_DIR).publish_files(changed, deleted, commit_message)
+            clear_pending(Path(MAIN_TRENDSPIDER_DIR) / "ticker_data", self.pending_files)
+            clear_pending(MAIN_TRENDSPIDER_DIR, self.aggregate_files)
             
-            if result.returncode != 0:  # There are changes
-                # Commit changes
-                commit_message = f"Automated ticker data update - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                subprocess.run(["git", "commit", "-m", commit_message], check=True)
-                
-                # Push changes
-                subprocess.run(["git", "push"], check=True)
-                logger.info("Successfully committed and pushed changes")
+            if commit:
+                logger.info(f"Successfully committed and pushed {len(changed)} changed and {len(deleted)} removed files")
             else:
                 logger.info("No changes to commit")
             
@@ -8,10 +8,14 @@ import json
 import requests
 import sys
 import os
-import re
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import vl_client
+from precompress import CompressionStats, precompress_file
+from timestamp_codec import format_timestamp
+from vl_client import TRADES_ENDPOINT, BIG_PRINTS_TEMPLATE, build_payload, trades_referer
+
 def get_date_range(days_back=90):
     """Calculate date range for the past N days (excluding weekends)"""
     end_date = datetime.now()
@@ -27,24 +31,6 @@ def get_date_range(days_back=90):
     
     return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
 
-def convert_dotnet_timestamp(timestamp_str):
-    """Convert /Date(1748563200000)/ format to Unix timestamp with timezone adjustment"""
-    if not timestamp_str or not timestamp_str.startswith('/Date('):
-        return None
-    
-    # Extract the timestamp from /Date(...)/ format
-    match = re.search(r'/Date\((\d+)\)/', timestamp_str)
-    if match:
-        # The timestamp is in milliseconds, convert to seconds for Unix timestamp
-        timestamp_seconds = int(match.group(1)) // 1000
-        
-        # Add 4 hours (14400 seconds) to adjust from UTC midnight to Eastern market day
-        # This fixes the timezone issue where UTC midnight becomes previous day in Eastern time
-        timestamp_seconds += 14400  # 4 hours in seconds
-        
-        return timestamp_seconds
-    return None
-
 def load_ticker_list():
     """Load tickers from the ticker_list.json file"""
     ticker_file = Path(__file__).parent / 'ticker_list.json'
@@ -60,10 +46,12 @@ def load_ticker_list():
         print(f"Error: Invalid JSON in ticker_list.json: {e}")
         return []
 
+COOKIES_FILE = Path("/Users/stephenbae/Projects/moe-bot/cookies.json")
+
 def get_cookies():
     """Load cookies from cookies.json file"""
     try:
-        cookies_file = Path("/Users/stephenbae/Projects/moe-bot/cookies.json")
+        cookies_file = COOKIES_FILE
         with open(cookies_file, 'r') as f:
             cookies_list = json.load(f)
             # Convert the list to a cookie string
@@ -74,94 +62,26 @@ def get_cookies():
         print("Please make sure cookies.json exists and is properly formatted")
         sys.exit(1)
 
+def get_client():
+    """Shared pooled VolumeLeaders client, reused for every ticker"""
+    return vl_client.get_client(cookie_func=get_cookies, auth_paths=[COOKIES_FILE])
+
 def fetch_big_prints_for_ticker(ticker, start_date, end_date):
     """Fetch big prints (rank 30 or better) for a single ticker"""
     
-    # Get cookies
-    cookie_header = get_cookies()
-    
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Cookie": cookie_header,
-        "Referer": f"https://www.volumeleaders.com/Trades?Tickers={ticker}&StartDate={start_date}&EndDate={end_date}",
-        "X-Requested-With": "XMLHttpRequest",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
-    }
-
-    # Column definitions for the API
-    columns = [
-        {"data": "DateTime", "name": "Date/Time", "searchable": "true", "orderable": "true"},
-        {"data": "Dollars", "name": "$$", "searchable": "true", "orderable": "true"},
-        {"data": "Price", "name": "Price", "searchable": "true", "orderable": "true"},
-        {"data": "Volume", "name": "Volume", "searchable": "true", "orderable": "true"},
-        {"data": "Conditions", "name": "Conditions", "searchable": "true", "orderable": "false"},
-        {"data": "RelativeSize", "name": "Relative Size", "searchable": "true", "orderable": "true"},
-        {"data": "VolumeConcentrationRatio", "name": "VCD", "searchable": "true", "orderable": "true"},
-        {"data": "Exchange", "name": "Exchange", "searchable": "true", "orderable": "false"},
-        {"data": "SecurityTypeDisplay", "name": "Type", "searchable": "true", "orderable": "false"},
-        {"data": "Symbol", "name": "Symbol", "searchable": "true", "orderable": "false"},
-        {"data": "IsDarkPool", "name": "Dark Pool", "searchable": "true", "orderable": "false"},
-        {"data": "TradeRank", "name": "Rank", "searchable": "true", "orderable": "true"},
-        {"data": "FullTimeString24", "name": "Time", "searchable": "true", "orderable": "true"},
-        {"data": "Date", "name": "Date", "searchable": "true", "orderable": "true"},
-        {"data": "DateKey", "name": "DateKey", "searchable": "true", "orderable": "true"}
-    ]
-
-    # Base payload for the API request
-    payload = {
-        "draw": "1",
-        "start": "0", 
-        "length": "1000",  # Get more results to filter
-        "search[value]": "",
-        "search[regex]": "false",
-        "Tickers": ticker,
-        "SectorIndustry": "",
-        "StartDate": start_date,
-        "EndDate": end_date,
-        "MinVolume": "0",
-        "MaxVolume": "2000000000",
-        "MinPrice": "0",
-        "MaxPrice": "100000",
-        "MinDollars": "500000",  # 500K minimum for big prints
-        "MaxDollars": "300000000000",
-        "Conditions": "0",
-        "VCD": "0",
-        "SecurityTypeKey": "-1",
-        "RelativeSize": "0",
-        "DarkPools": "-1",
-        "Sweeps": "-1",
-        "LatePrints": "-1",
-        "SignaturePrints": "-1",
-        "EvenShared": "-1",
-        "TradeRank": "30",  # Only rank 30 or better
-        "IncludePremarket": "1",
-        "IncludeRTH": "1",
-        "IncludeAH": "1",
-        "IncludeOpening": "1",
-        "IncludeClosing": "1",
-        "IncludePhantom": "1",
-        "IncludeOffsetting": "1",
-        "order[0][column]": "11",  # Sort by TradeRank
-        "order[0][dir]": "ASC"     # Best ranks first
-    }
-
-    # Add column configurations to payload
-    for i, col in enumerate(columns):
-        payload[f"columns[{i}][data]"] = col["data"]
-        payload[f"columns[{i}][name]"] = col["name"]
-        payload[f"columns[{i}][searchable]"] = col["searchable"]
-        payload[f"columns[{i}][orderable]"] = col["orderable"]
-        payload[f"columns[{i}][search][value]"] = ""
-        payload[f"columns[{i}][search][regex]"] = "false"
-
-    url = "https://www.volumeleaders.com/Trades/GetTrades"
+    payload = build_payload(
+        BIG_PRINTS_TEMPLATE,
+        length="1000",  # Get more results to filter
+        TradeRank="30",  # Only rank 30 or better
+        Tickers=ticker,
+        StartDate=start_date,
+        EndDate=end_date,
+    )
     
     try:
         print(f"Fetching big prints for {ticker} from {start_date} to {end_date}...")
         
-        response = requests.post(url, headers=headers, data=payload, timeout=60)
+        response = get_client().post(TRADES_ENDPOINT, payload, referer=trades_referer(ticker, start_date, end_date), timeout=60)
         
         if response.status_code == 200:
             try:
@@ -196,26 +116,6 @@ def fetch_big_prints_for_ticker(ticker, start_date, end_date):
         print(f"Request failed for {ticker}: {e}")
         return []
 
-def format_timestamp(trade):
-    """Extract and convert timestamp from trade data to Unix timestamp"""
-    # First try to get the timestamp from the Date field (which contains /Date(...) format)
-    date_field = trade.get('Date', '')
-    if date_field:
-        unix_timestamp = convert_dotnet_timestamp(date_field)
-        if unix_timestamp:
-            return unix_timestamp
-    
-    # Fallback to DateTime field if Date field is not available
-    datetime_field = trade.get('DateTime', '')
-    if datetime_field:
-        unix_timestamp = convert_dotnet_timestamp(datetime_field)
-        if unix_timestamp:
-            return unix_timestamp
-    
-    # If neither field has the /Date(...) format, return None
-    # This ensures we either get a proper Unix timestamp or nothing
-    return None
-
 def convert_to_big_prints_format(ticker, prints_data, start_date, end_date):
     """Convert the VolumeLeaders trade data to big_prints.json format"""
     converted_prints = []
@@ -281,6 +181,11 @@ def save_big_prints_data(all_prints, start_date, end_date):
         with open(output_file, 'w') as f:
             json.dump(output_data, f, indent=2)
         
+        # Precompressed copies for static HTTP serving (only rewritten when the content changed)
+        stats = CompressionStats()
+        precompress_file(output_file, stats)
+        print(stats.report())
+        
         print(f"\n✅ Successfully saved {len(all_prints)} big prints to {output_file}")
         return True
         
@@ -13,6 +13,8 @@ import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from precompress import CompressionStats, precompress_file
+
 def get_date_range(days_back=30):
     """Calculate date range for the past N days (excluding weekends)"""
     end_date = datetime.now()
@@ -210,6 +212,11 @@ def save_support_resistance_data(all_levels, min_date, max_date, incremental_tic
         with open(output_file, 'w') as f:
             json.dump(output_data, f, indent=2)
         
+        # Precompressed copies for static HTTP serving (only rewritten when the content changed)
+        stats = CompressionStats()
+        precompress_file(output_file, stats)
+        print(stats.report())
+        
         if incremental_tickers:
             print(f"\n✅ Successfully updated {len(all_levels)} levels (incremental update for {', '.join(incremental_tickers)}) to {output_file}")
         else:
@@ -7,59 +7,39 @@ Creates one JSON file per ticker with structure: {prints, levels, boxes}
 
 import json
 import requests
-import subprocess
 import sys
-import os
 import argparse
-import re
+import asyncio
 import signal
 import gc
+import queue
+import threading
 from collections import defaultdict
+from itertools import zip_longest
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import time
 from tqdm import tqdm
-import random
 
-def retry_with_backoff(func, max_retries=3, base_delay=1.0, max_delay=60.0):
-    """
-    Retry a function with exponential backoff
-    
-    Args:
-        func: Function to retry (should be a lambda or callable)
-        max_retries: Maximum number of retry attempts
-        base_delay: Initial delay in seconds
-        max_delay: Maximum delay in seconds
-    
-    Returns:
-        Result of the function call
-    
-    Raises:
-        Last exception if all retries fail
-    """
-    last_exception = None
-    
-    for attempt in range(max_retries + 1):
-        try:
-            return func()
-        except Exception as e:
-            last_exception = e
-            
-            if attempt == max_retries:
-                # Last attempt failed, raise the exception
-                raise last_exception
-            
-            # Calculate delay with exponential backoff and jitter
-            delay = min(base_delay * (2 ** attempt), max_delay)
-            jitter = random.uniform(0.1, 0.3) * delay  # Add 10-30% jitter
-            total_delay = delay + jitter
-            
-            print(f"Attempt {attempt + 1} failed: {e}. Retrying in {total_delay:.1f}s...")
-            time.sleep(total_delay)
-    
-    # This should never be reached, but just in case
-    raise last_exception
+import vl_client
+from rate_limiter import DEFAULT_BUDGETS, get_rate_limiter
+from retry_policy import get_retry_policy
+from adaptive_batching import AdaptiveBatchSizer, fetch_with_bisection, iter_adaptive_batches
+from ticker_pipeline import TickerAssembler
+from trade_store import DEFAULT_STORE_DIR, configure_trade_store, get_trade_store, parse_day
+from box_clustering import cluster_price_boxes
+from trade_columns import ranked_rows_by_ticker
+from ticker_files import FORMAT_VERSIONS, configure_ticker_format, get_ticker_writer
+from ticker_store import DEFAULT_DB_PATH, configure_ticker_store, get_ticker_store
+from timestamp_codec import format_timestamp, format_timestamps
+from trade_levels import LEVELS_SOURCES, compute_levels, configure_levels_source, get_levels_comparison, get_levels_source, local_levels_agree
+from response_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_MB, DEFAULT_TTL, CacheMissError, configure_response_cache
+from vl_client import (
+    TRADES_ENDPOINT, LEVELS_ENDPOINT, BIG_PRINTS_TEMPLATE, PRICE_BOXES_TEMPLATE, TRADE_LEVELS_TEMPLATE,
+    SUPERSET_TRADES_TEMPLATE,
+    build_payload, trades_referer, levels_referer,
+)
 
 def get_date_range(days_back=90):
     """Calculate date range for the past N days (excluding weekends)"""
@@ -109,275 +89,217 @@ def get_auth_headers(referer_ticker="", start_date="", end_date=""):
     """Get complete headers with cookie and XSRF token for VL API requests"""
     return get_vl_headers(referer_ticker=referer_ticker, start_date=start_date, end_date=end_date)
 
-def convert_dotnet_timestamp(timestamp_str):
-    """Convert /Date(1748563200000)/ format to Unix timestamp with timezone adjustment"""
-    if not timestamp_str or not timestamp_str.startswith('/Date('):
-        return None
-    
-    # Extract the timestamp from /Date(...)/ format
-    match = re.search(r'/Date\((\d+)\)/', timestamp_str)
-    if match:
-        # The timestamp is in milliseconds, convert to seconds for Unix timestamp
-        timestamp_seconds = int(match.group(1)) // 1000
-        
-        # Add 4 hours (14400 seconds) to adjust from UTC midnight to Eastern market day
-        # This fixes the timezone issue where UTC midnight becomes previous day in Eastern time
-        timestamp_seconds += 14400  # 4 hours in seconds
-        
-        return timestamp_seconds
-    return None
+# Credential files read by shared.vl_auth; the client reloads auth when they change
+AUTH_FILES = [
+    Path(__file__).parent.parent / 'moe-bot' / 'cookie_string.txt',
+    Path(__file__).parent.parent / 'moe-bot' / 'cookies.json',
+]
 
-def format_timestamp(trade):
-    """Extract and convert timestamp from trade data to Unix timestamp"""
-    # First try to get the timestamp from the Date field (which contains /Date(...) format)
-    date_field = trade.get('Date', '')
-    if date_field:
-        unix_timestamp = convert_dotnet_timestamp(date_field)
-        if unix_timestamp:
-            return unix_timestamp
-    
-    # Fallback to DateTime field if Date field is not available
-    datetime_field = trade.get('DateTime', '')
-    if datetime_field:
-        unix_timestamp = convert_dotnet_timestamp(datetime_field)
-        if unix_timestamp:
-            return unix_timestamp
-    
-    # If neither field has the /Date(...) format, return None
-    # This ensures we either get a proper Unix timestamp or nothing
-    return None
+class FetchFailedError(Exception):
+    """A VolumeLeaders query failed: HTTP error after retries, transport error or open circuit breaker.
+    
+    Not a RequestException, so it propagates past the request handlers; the
+    affected tickers are skipped and their existing files are kept instead of
+    being overwritten with empty prints, levels or boxes.
+    """
 
-def fetch_big_prints_batch(tickers_batch, start_date, end_date):
-    """Fetch big prints for a batch of tickers (up to 50) in a single API call"""
+def get_client():
+    """Shared pooled VolumeLeaders client (reused across batches and process_chunks chunks)"""
+    return vl_client.get_client(cookie_func=get_cookies, xsrf_func=get_xsrf_token, auth_paths=AUTH_FILES)
+
+# Extra Trades page filters the browser sends for the sweep boxes view
+BOXES_REFERER_QUERY = (
+    "&MinVolume=0&MaxVolume=2000000000&Conditions=0&VCD=0&RelativeSize=0&DarkPools=1&Sweeps=1"
+    "&LatePrints=-1&SignaturePrints=-1&EvenShared=-1&SecurityTypeKey=-1&MinPrice=0&MaxPrice=100000"
+    "&MinDollars=18000000&MaxDollars=300000000000&TradeRank=-1&IncludePremarket=1&IncludeRTH=1"
+    "&IncludeAH=1&IncludeOpening=1&IncludeClosing=1&IncludePhantom=1&IncludeOffsetting=1"
+)
+
+def convert_big_print(trade, timestamp=None):
+    """Convert a VolumeLeaders trade row into the per-ticker print format
+    (pass `timestamp` when it was already decoded in bulk)"""
+    return {
+        "timestamp": format_timestamp(trade) if timestamp is None else timestamp,
+        "price": float(trade.get('Price', 0)),
+        "volume": int(trade.get('Volume', 0)),
+        "dollars": int(trade.get('Dollars', 0)),
+        "rank": int(trade.get('TradeRank', 999)),
+        "conditions": trade.get('Conditions', ''),
+        "exchange": trade.get('Exchange', ''),
+        "is_dark_pool": trade.get('IsDarkPool', False),
+        "relative_size": float(trade.get('RelativeSize', 0)),
+        "vcd": float(trade.get('VolumeConcentrationRatio', 0))
+    }
+
+def group_big_prints(rows, tickers_batch, top_n=10):
+    """Group trade rows into each ticker's top 10 prints (rank 20 or better).
     
-    # Get cookies
-    cookie_header = get_cookies()
+    Candidates are selected on NumPy rank/ticker columns; print dicts are only
+    built for the best-ranked rows, skipping any that fail to convert.
+    """
+    ticker_prints = {ticker: [] for ticker in tickers_batch}
+    ranked = ranked_rows_by_ticker(rows, tickers_batch, max_rank=20)
     
-    # Join tickers with comma for batch request
-    tickers_str = ",".join(tickers_batch)
+    # Decode the timestamps of every ticker's top_n candidates in one pass
+    heads = [int(i) for indexes in ranked.values() for i in indexes[:top_n]]
+    timestamps = dict(zip(heads, format_timestamps([rows[i] for i in heads])))
     
-    # Get XSRF token (required as of Jan 2026)
-    xsrf_token = get_xsrf_token()
-    
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Cookie": cookie_header,
-        "Referer": f"https://www.volumeleaders.com/Trades?Tickers={tickers_str}&StartDate={start_date}&EndDate={end_date}",
-        "X-Requested-With": "XMLHttpRequest",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
-    }
+    for ticker, indexes in ranked.items():
+        prints = ticker_prints[ticker]
+        for i in indexes:
+            try:
+                prints.append(convert_big_print(rows[i], timestamps.get(int(i))))
+            except (ValueError, TypeError):
+                continue
+            if len(prints) >= top_n:
+                break
     
-    # Add XSRF token if available
-    if xsrf_token:
-        headers["x-xsrf-token"] = xsrf_token
+    return ticker_prints
 
-    # Column definitions for the API
-    columns = [
-        {"data": "DateTime", "name": "Date/Time", "searchable": "true", "orderable": "true"},
-        {"data": "Dollars", "name": "$$", "searchable": "true", "orderable": "true"},
-        {"data": "Price", "name": "Price", "searchable": "true", "orderable": "true"},
-        {"data": "Volume", "name": "Volume", "searchable": "true", "orderable": "true"},
-        {"data": "Conditions", "name": "Conditions", "searchable": "true", "orderable": "false"},
-        {"data": "RelativeSize", "name": "Relative Size", "searchable": "true", "orderable": "true"},
-        {"data": "VolumeConcentrationRatio", "name": "VCD", "searchable": "true", "orderable": "true"},
-        {"data": "Exchange", "name": "Exchange", "searchable": "true", "orderable": "false"},
-        {"data": "SecurityTypeDisplay", "name": "Type", "searchable": "true", "orderable": "false"},
-        {"data": "Symbol", "name": "Symbol", "searchable": "true", "orderable": "false"},
-        {"data": "IsDarkPool", "name": "Dark Pool", "searchable": "true", "orderable": "false"},
-        {"data": "TradeRank", "name": "Rank", "searchable": "true", "orderable": "true"},
-        {"data": "FullTimeString24", "name": "Time", "searchable": "true", "orderable": "true"},
-        {"data": "Date", "name": "Date", "searchable": "true", "orderable": "true"},
-        {"data": "DateKey", "name": "DateKey", "searchable": "true", "orderable": "true"}
-    ]
+def build_price_boxes(rows, tickers_batch, start_date, end_date):
+    """Cluster sweep trade rows into each ticker's price boxes (see box_clustering.py)"""
+    return cluster_price_boxes(rows, tickers_batch, start_date, end_date)
 
-    # Base payload for the API request
-    payload = {
-        "draw": "1",
-        "start": "0", 
-        "length": "5000",  # Increased to handle multiple tickers
-        "search[value]": "",
-        "search[regex]": "false",
-        "Tickers": tickers_str,  # Comma-separated tickers
-        "SectorIndustry": "",
-        "StartDate": start_date,
-        "EndDate": end_date,
-        "MinVolume": "0",
-        "MaxVolume": "2000000000",
-        "MinPrice": "0",
-        "MaxPrice": "100000",
-        "MinDollars": "500000",  # 500K minimum for big prints
-        "MaxDollars": "300000000000",
-        "Conditions": "0",
-        "VCD": "0",
-        "SecurityTypeKey": "-1",
-        "RelativeSize": "0",
-        "DarkPools": "-1",
-        "Sweeps": "-1",
-        "LatePrints": "-1",
-        "SignaturePrints": "-1",
-        "EvenShared": "-1",
-        "TradeRank": "20",  # Only rank 20 or better
-        "IncludePremarket": "1",
-        "IncludeRTH": "1",
-        "IncludeAH": "1",
-        "IncludeOpening": "1",
-        "IncludeClosing": "1",
-        "IncludePhantom": "1",
-        "IncludeOffsetting": "1",
-        "order[0][column]": "11",  # Sort by TradeRank
-        "order[0][dir]": "ASC"     # Best ranks first
-    }
+# Page sizes for paginated GetTrades walks
+PRINTS_PAGE_SIZE = 500
+BOXES_PAGE_SIZE = 1000
 
-    # Add column configurations to payload
-    for i, col in enumerate(columns):
-        payload[f"columns[{i}][data]"] = col["data"]
-        payload[f"columns[{i}][name]"] = col["name"]
-        payload[f"columns[{i}][searchable]"] = col["searchable"]
-        payload[f"columns[{i}][orderable]"] = col["orderable"]
-        payload[f"columns[{i}][search][value]"] = ""
-        payload[f"columns[{i}][search][regex]"] = "false"
+def is_big_print_row(trade):
+    """True for trades ranked 20 or better"""
+    rank = trade.get('TradeRank', 999)
+    if rank == '' or rank is None:
+        return False
+    try:
+        return int(rank) <= 20
+    except (ValueError, TypeError):
+        return False
 
-    url = "https://www.volumeleaders.com/Trades/GetTrades"
+def fetch_trades_pages(payload, referer, tickers_batch, page_size, max_rows, top_n=None, qualifies=None,
+                       timeout=180, row_budget=None):
+    """Walk GetTrades `start` offsets until the result set is exhausted.
+    
+    With top_n, stops as soon as every ticker in the batch has top_n rows passing
+    `qualifies` (rows arrive best-first, so later pages cannot displace them).
+    With row_budget, gives up after the first page if the server reports more
+    matching rows than the budget (the result then has 'over_budget': True).
+    Returns {'data': rows, 'recordsFiltered': n, 'complete': bool}, where complete
+    is False when max_rows was reached first, or None if a page request failed.
+    """
+    rows = []
+    counts = {ticker: 0 for ticker in tickers_batch}
+    records_filtered = None
+    start = 0
     
-    def make_request():
-        return requests.post(url, headers=headers, data=payload, timeout=180)  # Increased timeout for batch
+    while True:
+        page_payload = dict(payload, start=str(start), length=str(page_size))
+        
+        response = get_client().post(TRADES_ENDPOINT, page_payload, referer=referer, timeout=timeout)
+        if response.status_code != 200:
+            print(f"Error fetching trades page at offset {start}: HTTP {response.status_code}")
+            return None
+        try:
+            result = response.json()
+        except ValueError as e:
+            print(f"Error parsing JSON response for trades page at offset {start}: {e}")
+            return None
+        
+        page = result.get('data') or []
+        rows.extend(page)
+        try:
+            records_filtered = int(result.get('recordsFiltered'))
+        except (ValueError, TypeError):
+            records_filtered = None
+        
+        if row_budget is not None and start == 0 and records_filtered is not None and records_filtered > row_budget:
+            return {'data': [], 'recordsFiltered': records_filtered, 'complete': False, 'over_budget': True}
+        
+        # Exhausted: short page, or we have everything the server filtered
+        if len(page) < page_size or (records_filtered is not None and len(rows) >= records_filtered):
+            return {'data': rows, 'recordsFiltered': records_filtered, 'complete': True}
+        
+        if top_n is not None:
+            for trade in page:
+                ticker = trade.get('Ticker', '') or trade.get('Symbol', '')
+                if ticker in counts and (qualifies is None or qualifies(trade)):
+                    counts[ticker] += 1
+            if all(count >= top_n for count in counts.values()):
+                return {'data': rows, 'recordsFiltered': records_filtered, 'complete': True}
+        
+        start += len(page)
+        if start >= max_rows:
+            return {'data': rows, 'recordsFiltered': records_filtered, 'complete': False}
+
+def fetch_big_prints_batch(tickers_batch, start_date, end_date):
+    """Fetch big prints for a batch of tickers (up to 50) in a single API call"""
+    return fetch_big_prints_batch_checked(tickers_batch, start_date, end_date)[0]
+
+def fetch_big_prints_batch_checked(tickers_batch, start_date, end_date):
+    """Fetch big prints for a batch and report whether the response looks complete.
+    
+    Returns (ticker_prints, complete). Pages are walked only until every ticker has
+    its top 10; a multi-ticker batch is incomplete when the response is empty, or
+    when the row cap was hit before every ticker got its top 10. Raises
+    FetchFailedError when the query fails.
+    """
+    
+    # Join tickers with comma for batch request
+    tickers_str = ",".join(tickers_batch)
+    
+    payload = build_payload(BIG_PRINTS_TEMPLATE, Tickers=tickers_str, StartDate=start_date, EndDate=end_date)
+    referer = trades_referer(tickers_str, start_date, end_date)
     
     try:
-        # Use retry logic for the request
-        response = retry_with_backoff(make_request, max_retries=3, base_delay=2.0)
-        
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                if 'data' in data and data['data']:
-                    # Group trades by ticker
-                    ticker_prints = {ticker: [] for ticker in tickers_batch}
-                    
-                    for trade in data['data']:
-                        # API returns ticker in 'Ticker' field, not 'Symbol'
-                        ticker = trade.get('Ticker', '') or trade.get('Symbol', '')
-                        if not ticker or ticker not in ticker_prints:
-                            continue
-                            
-                        rank = trade.get('TradeRank', 999)
-                        if rank != '' and rank is not None:
-                            try:
-                                rank_int = int(rank)
-                                if rank_int <= 20:  # Rank 20 or better
-                                    ticker_prints[ticker].append({
-                                        "timestamp": format_timestamp(trade),
-                                        "price": float(trade.get('Price', 0)),
-                                        "volume": int(trade.get('Volume', 0)),
-                                        "dollars": int(trade.get('Dollars', 0)),
-                                        "rank": rank_int,
-                                        "conditions": trade.get('Conditions', ''),
-                                        "exchange": trade.get('Exchange', ''),
-                                        "is_dark_pool": trade.get('IsDarkPool', False),
-                                        "relative_size": float(trade.get('RelativeSize', 0)),
-                                        "vcd": float(trade.get('VolumeConcentrationRatio', 0))
-                                    })
-                            except (ValueError, TypeError):
-                                continue
-                    
-                    # Sort and limit to top 10 for each ticker
-                    for ticker in ticker_prints:
-                        ticker_prints[ticker].sort(key=lambda x: x['rank'])
-                        ticker_prints[ticker] = ticker_prints[ticker][:10]
-                    
-                    return ticker_prints
-                else:
-                    # Return empty lists for all tickers
-                    return {ticker: [] for ticker in tickers_batch}
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response for batch: {e}")
-                return {ticker: [] for ticker in tickers_batch}
-        else:
-            print(f"Error fetching batch: HTTP {response.status_code}")
-            return {ticker: [] for ticker in tickers_batch}
-            
+        data = fetch_trades_pages(payload, referer, tickers_batch, PRINTS_PAGE_SIZE, max_rows=5000,
+                                  top_n=10, qualifies=is_big_print_row, timeout=180)  # Increased timeout for batch
     except requests.exceptions.RequestException as e:
-        print(f"Request failed for batch: {e}")
-        return {ticker: [] for ticker in tickers_batch}
+        # Includes CircuitOpenError; the batch fails instead of looking empty
+        raise FetchFailedError(f"Request failed for prints batch: {e}") from e
+    if data is None:
+        raise FetchFailedError(f"Prints query failed for {tickers_str}")
+    
+    if data['data']:
+        ticker_prints = group_big_prints(data['data'], tickers_batch)
+        
+        # Rows are ranked across the whole batch, so hitting the row cap only
+        # loses data for tickers that did not reach their top 10
+        complete = data['complete'] or all(len(prints) >= 10 for prints in ticker_prints.values())
+        return ticker_prints, complete
+    else:
+        # Return empty lists for all tickers (suspicious for a multi-ticker batch)
+        return {ticker: [] for ticker in tickers_batch}, len(tickers_batch) == 1
 
 def fetch_support_resistance_batch(tickers_batch, start_date, end_date):
-    """Fetch support/resistance levels for a batch of tickers in a single API call"""
+    """Support/resistance levels for a batch of tickers from the configured --levels-source.
     
-    # Get cookies and XSRF token
-    cookie_header = get_cookies()
-    xsrf_token = get_xsrf_token()
+    'local' computes them from the trade store, 'compare' returns upstream levels
+    and records how closely the local ones match.
+    """
+    source = get_levels_source()
+    if source == 'upstream':
+        return fetch_support_resistance_upstream(tickers_batch, start_date, end_date)
+    
+    store = get_trade_store()
+    local = {ticker: compute_levels(store.read_window(ticker, start_date, end_date)) for ticker in tickers_batch}
+    if source == 'local':
+        return local
+    
+    upstream = fetch_support_resistance_upstream(tickers_batch, start_date, end_date)
+    comparison = get_levels_comparison()
+    for ticker in tickers_batch:
+        comparison.record(ticker, local[ticker], upstream.get(ticker, []))
+    return upstream
+
+def fetch_support_resistance_upstream(tickers_batch, start_date, end_date):
+    """Fetch support/resistance levels for a batch of tickers in a single API call (raises FetchFailedError on failure)"""
     
     # Join tickers with comma
     tickers_str = ",".join(tickers_batch)
     
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Cookie": cookie_header,
-        "Referer": f"https://www.volumeleaders.com/Chart0?StartDate={start_date}&EndDate={end_date}&Ticker={tickers_str}&MinVolume=0&MaxVolume=2000000000&MinDollars=0&MaxDollars=300000000000&MinPrice=0&MaxPrice=100000&DarkPools=-1&Sweeps=-1&LatePrints=-1&SignaturePrints=0&VolumeProfile=0&Levels=10&TradeCount=5&VCD=0&TradeRank=-1&IncludePremarket=1&IncludeRTH=1&IncludeAH=1&IncludeOpening=1&IncludeClosing=1&IncludePhantom=1&IncludeOffsetting=1",
-        "X-Requested-With": "XMLHttpRequest",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
-    }
-    
-    # Add XSRF token if available
-    if xsrf_token:
-        headers["x-xsrf-token"] = xsrf_token
-    
-    data = {
-        "draw": "1",
-        "columns[0][data]": "Price",
-        "columns[0][name]": "Price",
-        "columns[0][searchable]": "true",
-        "columns[0][orderable]": "false",
-        "columns[1][data]": "Dollars",
-        "columns[1][name]": "$$",
-        "columns[1][searchable]": "true",
-        "columns[1][orderable]": "false",
-        "columns[2][data]": "Volume",
-        "columns[2][name]": "Sh",
-        "columns[2][searchable]": "true",
-        "columns[2][orderable]": "false",
-        "columns[3][data]": "Trades",
-        "columns[3][name]": "Trades",
-        "columns[3][searchable]": "true",
-        "columns[3][orderable]": "false",
-        "columns[4][data]": "RelativeSize",
-        "columns[4][name]": "RS",
-        "columns[4][searchable]": "true",
-        "columns[4][orderable]": "false",
-        "columns[5][data]": "CumulativeDistribution",
-        "columns[5][name]": "PCT",
-        "columns[5][searchable]": "true",
-        "columns[5][orderable]": "false",
-        "columns[6][data]": "TradeLevelRank",
-        "columns[6][name]": "Rank",
-        "columns[6][searchable]": "true",
-        "columns[6][orderable]": "false",
-        "columns[7][data]": "Dates",
-        "columns[7][name]": "Dates",
-        "columns[7][searchable]": "true",
-        "columns[7][orderable]": "false",
-        "order[0][column]": "0",
-        "order[0][dir]": "DESC",
-        "start": "0",
-        "length": "50",  # Increased for batch
-        "search[value]": "",
-        "search[regex]": "false",
-        "StartDate": start_date,
-        "EndDate": end_date,
-        "Ticker": tickers_str,
-        "Levels": "10"
-    }
-    
-    url = "https://www.volumeleaders.com/Chart/GetTradeLevels"
-    
-    def make_request():
-        return requests.post(url, headers=headers, data=data, timeout=180)
+    payload = build_payload(TRADE_LEVELS_TEMPLATE, StartDate=start_date, EndDate=end_date, Ticker=tickers_str)
+    referer = levels_referer(tickers_str, start_date, end_date)
     
     try:
-        response = retry_with_backoff(make_request, max_retries=3, base_delay=2.0)
+        response = get_client().post(LEVELS_ENDPOINT, payload, referer=referer, timeout=180)
         
         if response.status_code == 200:
             try:
@@ -412,478 +334,303 @@ def fetch_support_resistance_batch(tickers_batch, start_date, end_date):
                 else:
                     return {ticker: [] for ticker in tickers_batch}
             except json.JSONDecodeError as e:
-                print(f"Error parsing JSON for levels batch: {e}")
-                return {ticker: [] for ticker in tickers_batch}
+                raise FetchFailedError(f"Error parsing JSON for levels batch: {e}") from e
         else:
-            print(f"Error fetching levels batch: HTTP {response.status_code}")
-            return {ticker: [] for ticker in tickers_batch}
+            raise FetchFailedError(f"Error fetching levels batch: HTTP {response.status_code}")
     
     except requests.exceptions.RequestException as e:
-        print(f"Request failed for levels batch: {e}")
-        return {ticker: [] for ticker in tickers_batch}
+        raise FetchFailedError(f"Request failed for levels batch: {e}") from e
 
 def fetch_price_boxes_batch(tickers_batch, start_date, end_date):
     """Fetch price boxes for a batch of tickers in a single API call"""
+    return fetch_price_boxes_batch_checked(tickers_batch, start_date, end_date)[0]
+
+def fetch_price_boxes_batch_checked(tickers_batch, start_date, end_date):
+    """Fetch price boxes for a batch and report whether the response looks complete.
     
-    # Get cookies and XSRF token
-    cookie_header = get_cookies()
-    xsrf_token = get_xsrf_token()
+    Returns (ticker_boxes, complete). Boxes are built from every sweep trade, so all
+    pages are walked; hitting the row cap (or an empty multi-ticker response) marks
+    the batch incomplete. Raises FetchFailedError when the query fails.
+    """
     
     # Join tickers with comma
     tickers_str = ",".join(tickers_batch)
     
-    headers = {
-        "accept": "application/json, text/javascript, */*; q=0.01",
-        "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "cookie": cookie_header,
-        "referer": f"https://www.volumeleaders.com/Trades?Tickers={tickers_str}&StartDate={start_date}&EndDate={end_date}&MinVolume=0&MaxVolume=2000000000&Conditions=0&VCD=0&RelativeSize=0&DarkPools=1&Sweeps=1&LatePrints=-1&SignaturePrints=-1&EvenShared=-1&SecurityTypeKey=-1&MinPrice=0&MaxPrice=100000&MinDollars=18000000&MaxDollars=300000000000&TradeRank=-1&IncludePremarket=1&IncludeRTH=1&IncludeAH=1&IncludeOpening=1&IncludeClosing=1&IncludePhantom=1&IncludeOffsetting=1",
-        "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-        "x-requested-with": "XMLHttpRequest"
-    }
+    payload = build_payload(PRICE_BOXES_TEMPLATE, Tickers=tickers_str, StartDate=start_date, EndDate=end_date)
+    referer = trades_referer(tickers_str, start_date, end_date, BOXES_REFERER_QUERY)
+    
+    try:
+        result = fetch_trades_pages(payload, referer, tickers_batch, BOXES_PAGE_SIZE, max_rows=10000, timeout=180)
+    except requests.exceptions.RequestException as e:
+        # Includes CircuitOpenError; the batch fails instead of looking empty
+        raise FetchFailedError(f"Request failed for boxes batch: {e}") from e
+    if result is None:
+        raise FetchFailedError(f"Boxes query failed for {tickers_str}")
     
-    # Add XSRF token if available
-    if xsrf_token:
-        headers["x-xsrf-token"] = xsrf_token
+    try:
+        if result['data']:
+            ticker_boxes = build_price_boxes(result['data'], tickers_batch, start_date, end_date)
+            return ticker_boxes, result['complete']
+        else:
+            return {ticker: [] for ticker in tickers_batch}, len(tickers_batch) == 1
+    except (KeyError, ValueError) as e:
+        raise FetchFailedError(f"Error processing boxes batch: {e}") from e
+
+def is_sweep_box_row(trade):
+    """True for trades the sweep boxes query selects (18M+ dark pool sweeps)"""
+    try:
+        if float(trade.get('Dollars', 0)) < 18000000:
+            return False
+    except (ValueError, TypeError):
+        return False
+    return bool(trade.get('IsDarkPool')) and bool(trade.get('IsSweep'))
+
+# The separate prints and boxes queries usually cost about one page each, so a
+# superset query only saves requests while it fits in a single page
+DEFAULT_SUPERSET_ROW_BUDGET = BOXES_PAGE_SIZE
+SUPERSET_PROBE_EVERY = 10  # Batches skipped by the estimate before one is tried anyway
+
+class SupersetPlanner:
+    """Decides per batch whether the superset query is worth sending.
+    
+    Keeps a running estimate of superset rows per ticker from the recordsFiltered
+    of earlier superset answers (reported even when they exceed the budget), and
+    sends batches the estimate says would not fit straight to the separate
+    queries instead of spending a request to find out. Every SUPERSET_PROBE_EVERY
+    skipped batches one is tried anyway so the estimate keeps tracking.
+    """
     
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.tickers = 0
+        self.merged = 0
+        self.over_budget = 0
+        self.skipped = 0
+    
+    def should_try(self, batch_size, row_budget):
+        with self.lock:
+            if self.tickers and self.rows / self.tickers * batch_size > row_budget:
+                self.skipped += 1
+                return self.skipped % SUPERSET_PROBE_EVERY == 0
+            return True
+    
+    def record(self, batch_size, records_filtered, over_budget):
+        with self.lock:
+            if records_filtered is not None:
+                self.rows += records_filtered
+                self.tickers += batch_size
+            if over_budget:
+                self.over_budget += 1
+            else:
+                self.merged += 1
+    
+    def summary(self):
+        with self.lock:
+            per_ticker = f"{self.rows / self.tickers:.0f}" if self.tickers else "n/a"
+            return (f"Superset: {self.merged} merged queries, {self.over_budget} over budget, "
+                    f"{self.skipped} batches sent to separate queries by estimate ({per_ticker} rows/ticker)")
+
+_superset_planner = SupersetPlanner()
+
+def get_superset_planner():
+    return _superset_planner
 
-    # Column definitions
-    columns = []
-    for i, (data_field, name) in enumerate([
-        ("FullTimeString24", ""), ("FullTimeString24", "FullTimeString24"),
-        ("Ticker", "Ticker"), ("Current", "Current"), ("Trade", "Trade"),
-        ("Sector", "Sector"), ("Industry", "Industry"), ("Volume", "Sh"),
-        ("Dollars", "$$"), ("DollarsMultiplier", "RS"),
-        ("CumulativeDistribution", "PCT"), ("TradeRank", "Rank"),
-        ("LastComparibleTradeDate", "Last Traded"), ("LastComparibleTradeDate", "Charts")
-    ]):
-        columns.append(f"columns%5B{i}%5D%5Bdata%5D={data_field}")
-        columns.append(f"columns%5B{i}%5D%5Bname%5D={name}")
-        columns.append(f"columns%5B{i}%5D%5Bsearchable%5D=true")
-        columns.append(f"columns%5B{i}%5D%5Borderable%5D={'true' if i > 0 else 'false'}")
-        columns.append(f"columns%5B{i}%5D%5Bsearch%5D%5Bvalue%5D=")
-        columns.append(f"columns%5B{i}%5D%5Bsearch%5D%5Bregex%5D=false")
-    
-    payload = (
-        f"draw=1&{'&'.join(columns)}"
-        f"&order%5B0%5D%5Bcolumn%5D=1&order%5B0%5D%5Bdir%5D=DESC&start=0&length=1000"
-        f"&search%5Bvalue%5D=&search%5Bregex%5D=false"
-        f"&Tickers={tickers_str}&StartDate={start_date}&EndDate={end_date}"
-        f"&MinVolume=0&MaxVolume=2000000000&MinPrice=0&MaxPrice=100000"
-        f"&MinDollars=18000000&MaxDollars=300000000000&Conditions=0&VCD=0"
-        f"&SecurityTypeKey=-1&RelativeSize=0&DarkPools=1&Sweeps=1"
-        f"&LatePrints=-1&SignaturePrints=-1&EvenShared=-1&TradeRank=-1"
-        f"&IncludePremarket=1&IncludeRTH=1&IncludeAH=1&IncludeOpening=1"
-        f"&IncludeClosing=1&IncludePhantom=1&IncludeOffsetting=1&SectorIndustry="
+def fetch_trades_separate_checked(tickers_batch, start_date, end_date):
+    """Prints and boxes for a batch from the two separate GetTrades queries"""
+    ticker_prints, prints_complete = fetch_big_prints_batch_checked(tickers_batch, start_date, end_date)
+    ticker_boxes, boxes_complete = fetch_price_boxes_batch_checked(tickers_batch, start_date, end_date)
+    return (
+        {ticker: (ticker_prints[ticker], ticker_boxes[ticker]) for ticker in tickers_batch},
+        prints_complete and boxes_complete,
     )
+
+def fetch_trades_planned_checked(tickers_batch, start_date, end_date, row_budget):
+    """Fetch prints and boxes for a batch with one superset GetTrades query.
+    
+    The superset (500K+ trades of any rank, dark pool or sweep) covers both the
+    prints and the boxes filters, so both products are derived client-side from
+    the shared rows. Falls back to the two separate queries when the superset
+    would exceed row_budget rows (checked against the running estimate before
+    sending, and against recordsFiltered after the first page), or when rows
+    carry no IsSweep flag to filter on.
+    Returns ({ticker: (prints, boxes)}, complete); raises FetchFailedError when a query fails. With the trade store enabled,
+    only the days missing from the store are fetched (see fetch_trades_stored_checked).
+    """
+    if get_trade_store() is not None:
+        return fetch_trades_stored_checked(tickers_batch, start_date, end_date)
     
-    url = "https://www.volumeleaders.com/Trades/GetTrades"
+    planner = get_superset_planner()
+    if not planner.should_try(len(tickers_batch), row_budget):
+        return fetch_trades_separate_checked(tickers_batch, start_date, end_date)
     
-    def make_request():
-        return requests.post(url, headers=headers, data=payload, timeout=180)
+    tickers_str = ",".join(tickers_batch)
     
-    try:
-        response = retry_with_backoff(make_request, max_retries=3, base_delay=2.0)
-        
-        if response.status_code == 200:
-            try:
-                result = response.json()
-                if 'data' in result and result['data']:
-                    # Group trades by ticker and calculate boxes
-                    ticker_trades = defaultdict(list)
-                    
-                    for trade in result['data']:
-                        ticker = trade.get('Ticker', '')
-                        if ticker not in tickers_batch:
-                            continue
-                        
-                        try:
-                            ticker_trades[ticker].append({
-                                'price': float(trade.get('Current', 0) or trade.get('Price', 0)),
-                                'volume': int(trade.get('Volume', 0)),
-                                'dollars': int(trade.get('Dollars', 0))
-                            })
-                        except (ValueError, TypeError):
-                            continue
-                    
-                    # Calculate boxes for each ticker
-                    ticker_boxes = {}
-                    colors = ["#FF6B6B", "#4ECDC4", "#45B7D1", "#FFA07A", "#98D8C8"]
-                    
-                    for ticker in tickers_batch:
-                        trades = ticker_trades.get(ticker, [])
-                        if not trades:
-                            ticker_boxes[ticker] = []
-                            continue
-                        
-                        # Sort by price and create boxes (simplified logic)
-                        trades.sort(key=lambda x: x['price'])
-                        boxes = []
-                        
-                        if len(trades) > 0:
-                            # Create simple box from trade range
-                            prices = [t['price'] for t in trades]
-                            total_vol = sum(t['volume'] for t in trades)
-                            total_dollars = sum(t['dollars'] for t in trades)
-                            
-                            boxes.append({
-                                "box_number": 1,
-                                "high_price": max(prices),
-                                "low_price": min(prices),
-                                "volume": total_vol,
-                                "dollars": total_dollars,
-                                "trades": len(trades),
-                                "date_range": f"{start_date} to {end_date}",
-                                "color": colors[0]
-                            })
-                        
-                        ticker_boxes[ticker] = boxes[:5]  # Top 5 boxes
-                    
-                    return ticker_boxes
-                else:
-                    return {ticker: [] for ticker in tickers_batch}
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON for boxes batch: {e}")
-                return {ticker: [] for ticker in tickers_batch}
-        else:
-            print(f"Error fetching boxes batch: HTTP {response.status_code}")
-            return {ticker: [] for ticker in tickers_batch}
+    payload = build_payload(SUPERSET_TRADES_TEMPLATE, Tickers=tickers_str, StartDate=start_date, EndDate=end_date)
+    referer = trades_referer(tickers_str, start_date, end_date)
     
+    try:
+        data = fetch_trades_pages(payload, referer, tickers_batch, BOXES_PAGE_SIZE, max_rows=row_budget,
+                                  timeout=180, row_budget=row_budget)
     except requests.exceptions.RequestException as e:
-        print(f"Request failed for boxes batch: {e}")
-        return {ticker: [] for ticker in tickers_batch}
+        # Includes CircuitOpenError; the batch fails instead of looking empty
+        raise FetchFailedError(f"Request failed for superset batch: {e}") from e
+    if data is None:
+        raise FetchFailedError(f"Superset query failed for {tickers_str}")
+    
+    planner.record(len(tickers_batch), data.get('recordsFiltered'), data.get('over_budget', False))
+    rows = data['data']
+    if data.get('over_budget') or (rows and not any('IsSweep' in row for row in rows)):
+        return fetch_trades_separate_checked(tickers_batch, start_date, end_date)
+    
+    if not rows:
+        # Empty lists for all tickers (suspicious for a multi-ticker batch)
+        return {ticker: ([], []) for ticker in tickers_batch}, len(tickers_batch) == 1
+    
+    ticker_prints = group_big_prints(rows, tickers_batch)
+    ticker_boxes = build_price_boxes([row for row in rows if is_sweep_box_row(row)], tickers_batch, start_date, end_date)
+    return {ticker: (ticker_prints[ticker], ticker_boxes[ticker]) for ticker in tickers_batch}, data['complete']
 
-def fetch_big_prints_for_ticker(ticker, start_date, end_date):
-    """Fetch big prints (rank 20 or better) for a single ticker"""
-    
-    # Get cookies and XSRF token
-    cookie_header = get_cookies()
-    xsrf_token = get_xsrf_token()
-    
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "Cookie": cookie_header,
-        "Referer": f"https://www.volumeleaders.com/Trades?Tickers={ticker}&StartDate={start_date}&EndDate={end_date}",
-        "X-Requested-With": "XMLHttpRequest",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
-    }
-    
-    # Add XSRF token if available
-    if xsrf_token:
-        headers["x-xsrf-token"] = xsrf_token
+# Row cap for one trade store delta query; a batch hitting it is bisected,
+# a single ticker hitting it has its span split by days
+STORE_MAX_ROWS = 100000
 
-    # Column definitions for the API
-    columns = [
-        {"data": "DateTime", "name": "Date/Time", "searchable": "true", "orderable": "true"},
-        {"data": "Dollars", "name": "$$", "searchable": "true", "orderable": "true"},
-        {"data": "Price", "name": "Price", "searchable": "true", "orderable": "true"},
-        {"data": "Volume", "name": "Volume", "searchable": "true", "orderable": "true"},
-        {"data": "Conditions", "name": "Conditions", "searchable": "true", "orderable": "false"},
-        {"data": "RelativeSize", "name": "Relative Size", "searchable": "true", "orderable": "true"},
-        {"data": "VolumeConcentrationRatio", "name": "VCD", "searchable": "true", "orderable": "true"},
-        {"data": "Exchange", "name": "Exchange", "searchable": "true", "orderable": "false"},
-        {"data": "SecurityTypeDisplay", "name": "Type", "searchable": "true", "orderable": "false"},
-        {"data": "Symbol", "name": "Symbol", "searchable": "true", "orderable": "false"},
-        {"data": "IsDarkPool", "name": "Dark Pool", "searchable": "true", "orderable": "false"},
-        {"data": "TradeRank", "name": "Rank", "searchable": "true", "orderable": "true"},
-        {"data": "FullTimeString24", "name": "Time", "searchable": "true", "orderable": "true"},
-        {"data": "Date", "name": "Date", "searchable": "true", "orderable": "true"},
-        {"data": "DateKey", "name": "DateKey", "searchable": "true", "orderable": "true"}
-    ]
-
-    # Base payload for the API request
-    payload = {
-        "draw": "1",
-        "start": "0", 
-        "length": "1000",  # Get more results to filter
-        "search[value]": "",
-        "search[regex]": "false",
-        "Tickers": ticker,
-        "SectorIndustry": "",
-        "StartDate": start_date,
-        "EndDate": end_date,
-        "MinVolume": "0",
-        "MaxVolume": "2000000000",
-        "MinPrice": "0",
-        "MaxPrice": "100000",
-        "MinDollars": "500000",  # 500K minimum for big prints
-        "MaxDollars": "300000000000",
-        "Conditions": "0",
-        "VCD": "0",
-        "SecurityTypeKey": "-1",
-        "RelativeSize": "0",
-        "DarkPools": "-1",
-        "Sweeps": "-1",
-        "LatePrints": "-1",
-        "SignaturePrints": "-1",
-        "EvenShared": "-1",
-        "TradeRank": "20",  # Only rank 20 or better
-        "IncludePremarket": "1",
-        "IncludeRTH": "1",
-        "IncludeAH": "1",
-        "IncludeOpening": "1",
-        "IncludeClosing": "1",
-        "IncludePhantom": "1",
-        "IncludeOffsetting": "1",
-        "order[0][column]": "11",  # Sort by TradeRank
-        "order[0][dir]": "ASC"     # Best ranks first
-    }
+def store_ticker_span(ticker, span_start, span_end, data=None):
+    """Fetch one ticker's [span_start, span_end] into the trade store, halving the span past the row cap.
+    
+    Every piece that completes is stored, so an over-cap ticker refetches only
+    its open days next run. Returns {day: rows} for single days that still hit
+    the cap; those are used for this run but not stored. data is the answer
+    already fetched for the whole span, if any.
+    """
+    store = get_trade_store()
+    start_str, end_str = span_start.isoformat(), span_end.isoformat()
+    if data is None:
+        payload = build_payload(SUPERSET_TRADES_TEMPLATE, Tickers=ticker, StartDate=start_str, EndDate=end_str)
+        try:
+            data = fetch_trades_pages(payload, trades_referer(ticker, start_str, end_str), [ticker], BOXES_PAGE_SIZE,
+                                      max_rows=STORE_MAX_ROWS, timeout=180)
+        except requests.exceptions.RequestException as e:
+            raise FetchFailedError(f"Request failed for trade store update: {e}") from e
+        if data is None:
+            raise FetchFailedError(f"Trade store update query failed for {ticker}")
+    
+    if data['complete']:
+        store.write_days(ticker, span_start, span_end, data['data'])
+        return {}
+    if span_start == span_end:
+        print(f"Warning: {ticker} trades on {start_str} hit {STORE_MAX_ROWS} rows; not stored")
+        return {span_start: data['data']}
+    middle = span_start + (span_end - span_start) // 2
+    partial = store_ticker_span(ticker, span_start, middle)
+    partial.update(store_ticker_span(ticker, middle + timedelta(days=1), span_end))
+    return partial
 
-    # Add column configurations to payload
-    for i, col in enumerate(columns):
-        payload[f"columns[{i}][data]"] = col["data"]
-        payload[f"columns[{i}][name]"] = col["name"]
-        payload[f"columns[{i}][searchable]"] = col["searchable"]
-        payload[f"columns[{i}][orderable]"] = col["orderable"]
-        payload[f"columns[{i}][search][value]"] = ""
-        payload[f"columns[{i}][search][regex]"] = "false"
+def fetch_trades_stored_checked(tickers_batch, start_date, end_date):
+    """Fetch only the days each ticker is missing from the trade store, then compose the window.
+    
+    Tickers needing the same span share one superset query from their first
+    missing day to end_date; the rows are written back as day partitions and
+    prints and boxes are derived from the stored window. A failed query raises
+    FetchFailedError rather than composing a window with missing days
+    (spans already written stay stored). A single ticker over the row cap is
+    refetched in day ranges by store_ticker_span. Returns ({ticker: (prints, boxes)}, complete).
+    """
+    store = get_trade_store()
+    end_day = parse_day(end_date)
+    spans = defaultdict(list)
+    for ticker in tickers_batch:
+        spans[store.fetch_start(ticker, start_date, end_date)].append(ticker)
+    
+    complete = True
+    unstored = {}
+    for span_start, span_tickers in spans.items():
+        tickers_str = ",".join(span_tickers)
+        span_start_str = span_start.isoformat()
+        payload = build_payload(SUPERSET_TRADES_TEMPLATE, Tickers=tickers_str, StartDate=span_start_str, EndDate=end_date)
+        referer = trades_referer(tickers_str, span_start_str, end_date)
+        
+        try:
+            data = fetch_trades_pages(payload, referer, span_tickers, BOXES_PAGE_SIZE, max_rows=STORE_MAX_ROWS, timeout=180)
+        except requests.exceptions.RequestException as e:
+            raise FetchFailedError(f"Request failed for trade store update: {e}") from e
+        if data is None:
+            raise FetchFailedError(f"Trade store update query failed for {tickers_str}")
+        
+        rows = data['data']
+        # An empty answer for several tickers over more than a few days is suspicious
+        suspicious = not rows and len(span_tickers) > 1 and (end_day - span_start).days >= 5
+        if len(span_tickers) > 1 and (suspicious or not data['complete']):
+            complete = False
+            continue
+        if not data['complete']:
+            # A single ticker over the cap: split its span by days so the complete pieces are stored
+            print(f"   {tickers_str}: trade store update hit {STORE_MAX_ROWS} rows; splitting by days")
+            unstored[tickers_str] = store_ticker_span(tickers_str, span_start, end_day, data)
+            continue
+        
+        ticker_rows = defaultdict(list)
+        for row in rows:
+            ticker_rows[row.get('Ticker', '') or row.get('Symbol', '')].append(row)
+        for ticker in span_tickers:
+            store.write_days(ticker, span_start, end_day, ticker_rows.get(ticker, []))
+    
+    results = {}
+    for ticker in tickers_batch:
+        partial = unstored.get(ticker, {})
+        rows = store.read_window(ticker, start_date, end_date, skip_days=partial)
+        for day_rows in partial.values():
+            rows.extend(day_rows)
+        store.prune(ticker, start_date)
+        prints = group_big_prints(rows, [ticker])[ticker]
+        boxes = build_price_boxes([row for row in rows if is_sweep_box_row(row)], [ticker], start_date, end_date)[ticker]
+        results[ticker] = (prints, boxes)
+    return results, complete
 
-    url = "https://www.volumeleaders.com/Trades/GetTrades"
+def fetch_big_prints_for_ticker(ticker, start_date, end_date):
+    """Fetch big prints (rank 20 or better) for a single ticker"""
     
-    def make_request():
-        return requests.post(url, headers=headers, data=payload, timeout=120)  # Increased timeout to 120s
+    payload = build_payload(BIG_PRINTS_TEMPLATE, Tickers=ticker, StartDate=start_date, EndDate=end_date)
+    referer = trades_referer(ticker, start_date, end_date)
     
     try:
-        # Use retry logic for the request
-        response = retry_with_backoff(make_request, max_retries=3, base_delay=2.0)
-        
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                if 'data' in data and data['data']:
-                    # Filter for rank 30 or better and take top 10
-                    big_prints = []
-                    for trade in data['data']:
-                        rank = trade.get('TradeRank', 999)
-                        if rank != '' and rank is not None:
-                            try:
-                                rank_int = int(rank)
-                                if rank_int <= 20:  # Rank 20 or better
-                                    big_prints.append({
-                                        "timestamp": format_timestamp(trade),
-                                        "price": float(trade.get('Price', 0)),
-                                        "volume": int(trade.get('Volume', 0)),
-                                        "dollars": int(trade.get('Dollars', 0)),
-                                        "rank": rank_int,
-                                        "conditions": trade.get('Conditions', ''),
-                                        "exchange": trade.get('Exchange', ''),
-                                        "is_dark_pool": trade.get('IsDarkPool', False),
-                                        "relative_size": float(trade.get('RelativeSize', 0)),
-                                        "vcd": float(trade.get('VolumeConcentrationRatio', 0))
-                                    })
-                            except (ValueError, TypeError):
-                                continue
-                    
-                    # Sort by rank (best first) and take top 10
-                    big_prints.sort(key=lambda x: x['rank'])
-                    return big_prints[:10]  # Top 10 only
-                else:
-                    return []
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response for {ticker} big prints: {e}")
-                return []
-        else:
-            print(f"Error fetching big prints for {ticker}: HTTP {response.status_code}")
-            return []
-            
+        # Rows arrive best rank first, so the first page almost always holds the top 10
+        data = fetch_trades_pages(payload, referer, [ticker], page_size=100, max_rows=1000,
+                                  top_n=10, qualifies=is_big_print_row, timeout=120)  # Increased timeout to 120s
     except requests.exceptions.RequestException as e:
-        print(f"Request failed for {ticker} big prints: {e}")
-        return []
+        raise FetchFailedError(f"Request failed for {ticker} big prints: {e}") from e
+    if data is None:
+        raise FetchFailedError(f"Big prints query failed for {ticker}")
+    
+    return group_big_prints(data['data'], [ticker])[ticker]
 
 def fetch_support_resistance_for_ticker(ticker, start_date, end_date):
-    """Fetch support/resistance levels for a single ticker"""
-    script_path = Path("/Users/stephenbae/Projects/moe-bot/discord-bot-slash/fetch_levels_for_slash.py")
-    python_path = Path("/Users/stephenbae/Projects/moe-bot/.venv/bin/python")
-    
-    # Change to the project root directory
-    original_cwd = os.getcwd()
-    project_root = Path(__file__).parent.parent
+    """Fetch support/resistance levels for a single ticker.
     
+    Runs in-process on the shared client (GetTradeLevels is a single-ticker
+    endpoint anyway), so it is safe to call from the writer thread pool.
+    """
     try:
-        os.chdir(project_root)
-        
-        # Run the fetch script
-        cmd = [
-            str(python_path),
-            str(script_path),
-            '--ticker', ticker,
-            '--min-date', start_date,
-            '--max-date', end_date
-        ]
-        
-        def run_levels_script():
-            return subprocess.run(
-                cmd,
-                cwd="/Users/stephenbae/Projects/moe-bot",
-                capture_output=True,
-                text=True,
-                timeout=120  # Increased timeout to 120s
-            )
-        
-        # Use retry logic for the subprocess call
-        result = retry_with_backoff(run_levels_script, max_retries=2, base_delay=1.0)
-        
-        if result.returncode == 0:
-            try:
-                levels_data = json.loads(result.stdout)
-                if levels_data and levels_data.get('success') and levels_data.get('levels'):
-                    # Convert to simplified format and take top 5
-                    levels = []
-                    for i, level in enumerate(levels_data['levels'][:5]):
-                        if 'formatted' in level:
-                            parts = level['formatted'].split(':')
-                            if len(parts) >= 3:
-                                price_str = parts[0].replace('$', '')
-                                dollars_str = parts[1].replace('$', '').replace('B', '').replace('M', '').replace('K', '')
-                                rank = parts[2]
-                                
-                                try:
-                                    price = float(price_str)
-                                    
-                                    # Parse dollars (convert to actual value)
-                                    if 'B' in parts[1]:
-                                        dollars = float(dollars_str) * 1_000_000_000
-                                    elif 'M' in parts[1]:
-                                        dollars = float(dollars_str) * 1_000_000
-                                    elif 'K' in parts[1]:
-                                        dollars = float(dollars_str) * 1_000
-                                    else:
-                                        dollars = float(dollars_str)
-                                    
-                                    # Parse volume
-                                    volume = 0
-                                    if 'volume' in level:
-                                        volume_str = level['volume'].replace('M', '').replace('K', '').replace('B', '')
-                                        if 'B' in level['volume']:
-                                            volume = int(float(volume_str) * 1_000_000_000)
-                                        elif 'M' in level['volume']:
-                                            volume = int(float(volume_str) * 1_000_000)
-                                        elif 'K' in level['volume']:
-                                            volume = int(float(volume_str) * 1_000)
-                                        else:
-                                            volume = int(float(volume_str))
-                                    
-                                    levels.append({
-                                        "price": price,
-                                        "volume": volume,
-                                        "dollars": int(dollars),
-                                        "rank": rank
-                                    })
-                                except (ValueError, TypeError):
-                                    continue
-                    
-                    return levels
-                else:
-                    return []
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response for {ticker} levels: {e}")
-                return []
-        else:
-            print(f"Error fetching levels for {ticker}: {result.stderr}")
-            return []
-            
-    except subprocess.TimeoutExpired:
-        print(f"Timeout fetching levels for {ticker}")
-        return []
+        return fetch_support_resistance_batch([ticker], start_date, end_date).get(ticker, [])
+    except (CacheMissError, FetchFailedError):
+        raise
     except Exception as e:
         print(f"Unexpected error fetching levels for {ticker}: {e}")
         return []
-    finally:
-        os.chdir(original_cwd)
 
 def fetch_price_boxes_for_ticker(ticker, start_date, end_date):
-    """Fetch price boxes for a single ticker"""
-    script_path = Path("/Users/stephenbae/Projects/moe-bot/fetch_sweep_boxes.py")
-    python_path = Path("/Users/stephenbae/Projects/moe-bot/.venv/bin/python")
-    
-    # Change to the project root directory
-    original_cwd = os.getcwd()
-    project_root = Path(__file__).parent.parent
+    """Fetch price boxes for a single ticker.
     
+    Same sweep boxes query as the batch path, issued in-process on the shared
+    client for just this ticker.
+    """
     try:
-        os.chdir(project_root)
-        
-        # Run the fetch script with --discord flag to get JSON output
-        cmd = [
-            str(python_path),
-            str(script_path),
-            ticker,
-            '--start-date', start_date,
-            '--end-date', end_date,
-            '--discord',
-            '--min-dollars', '18.0'  # 18M minimum
-        ]
-        
-        def run_boxes_script():
-            return subprocess.run(
-                cmd,
-                cwd="/Users/stephenbae/Projects/moe-bot",
-                capture_output=True,
-                text=True,
-                timeout=180  # Increased timeout to 3 minutes for sweep data
-            )
-        
-        # Use retry logic for the subprocess call
-        result = retry_with_backoff(run_boxes_script, max_retries=2, base_delay=1.5)
-        
-        if result.returncode == 0:
-            try:
-                # The script outputs both console messages and JSON
-                # We need to extract just the JSON portion (last line that starts with '{')
-                output_lines = result.stdout.strip().split('\n')
-                json_line = None
-                
-                # Find the JSON line (should start with '{' and end with '}')
-                for line in reversed(output_lines):
-                    line = line.strip()
-                    if line.startswith('{') and line.endswith('}'):
-                        json_line = line
-                        break
-                
-                if json_line:
-                    sweep_data = json.loads(json_line)
-                    if sweep_data and sweep_data.get('success') and sweep_data.get('price_boxes'):
-                        # Convert to simplified format
-                        boxes = []
-                        colors = ['blue', 'green', 'orange', 'red', 'purple', 'yellow', 'cyan', 'magenta']
-                        
-                        for i, box in enumerate(sweep_data['price_boxes']):
-                            try:
-                                boxes.append({
-                                    "box_number": i + 1,
-                                    "high_price": float(box.get('high_price', 0)),
-                                    "low_price": float(box.get('low_price', 0)),
-                                    "volume": int(box.get('total_volume', 0)),
-                                    "dollars": int(box.get('total_dollars', 0)),
-                                    "trades": int(box.get('trade_count', 0)),
-                                    "date_range": box.get('date_range', f"{start_date} to {end_date}"),
-                                    "color": colors[i % len(colors)]
-                                })
-                            except (ValueError, TypeError):
-                                continue
-                        
-                        return boxes
-                    else:
-                        return []
-                else:
-                    return []
-                    
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response for {ticker} boxes: {e}")
-                return []
-        else:
-            print(f"Error fetching boxes for {ticker}: {result.stderr}")
-            return []
-            
-    except subprocess.TimeoutExpired:
-        print(f"Timeout fetching boxes for {ticker}")
-        return []
+        return fetch_price_boxes_batch([ticker], start_date, end_date).get(ticker, [])
+    except (CacheMissError, FetchFailedError):
+        raise
     except Exception as e:
         print(f"Unexpected error fetching boxes for {ticker}: {e}")
         return []
-    finally:
-        os.chdir(original_cwd)
 
 def process_ticker(ticker, start_date, end_date, output_dir, batch_prints_cache=None, batch_levels_cache=None, batch_boxes_cache=None):
     """Process a single ticker and save its data"""
@@ -928,36 +675,463 @@ def process_ticker(ticker, start_date, end_date, output_dir, batch_prints_cache=
         "boxes": boxes
     }
     
-    # Save to file
-    output_file = output_dir / f"{ticker}.json"
+    # Save to file (skipped when prints, levels and boxes are unchanged)
     try:
-        with open(output_file, 'w') as f:
-            json.dump(ticker_data, f, indent=2)
-        
-        # Only show summary instead of verbose output
-        # print(f"✓ Saved data for {ticker} ({len(prints)} prints, {len(levels)} levels, {len(boxes)} boxes)")
+        ticker_store = get_ticker_store()
+        if ticker_store is not None:
+            # The store is canonical; the file is materialized from what it holds
+            ticker_store.put(ticker, ticker_data)
+            ticker_store.materialize_ticker(ticker, output_dir)
+        else:
+            get_ticker_writer(output_dir).write(ticker, ticker_data)
         return True
         
     except Exception as e:
         print(f"\n✗ Error saving {ticker}: {e}")
         return False
 
+# Learned GetTrades batch sizes, kept for the life of the process so
+# process_chunks does not start every chunk from scratch
+_batch_sizers = {}
+
+def get_batch_sizer(name, initial, maximum):
+    """Return the process-wide AdaptiveBatchSizer for an endpoint family"""
+    if name not in _batch_sizers:
+        _batch_sizers[name] = AdaptiveBatchSizer(name, initial=initial, maximum=maximum)
+    return _batch_sizers[name]
+
+def fetch_trades_sequential(tickers, start_date, end_date, prints_sizer, boxes_sizer, superset_row_budget=0):
+    """Fetch prints and boxes one phase at a time (levels run in fetch_levels_concurrent).
+    
+    With superset_row_budget, prints and boxes come from one merged GetTrades
+    query per batch (see fetch_trades_planned_checked).
+    """
+    if superset_row_budget:
+        print(f"\n🎯 BATCH PROCESSING MODE (merged prints + boxes query)")
+        print(f"   Fetching prints and boxes for {len(tickers)} tickers in adaptive batches (starting at {prints_sizer.size})")
+        print(f"   Superset row budget: {superset_row_budget} rows per batch")
+        
+        batch_prints_cache = {}
+        batch_boxes_cache = {}
+        for i, batch in enumerate(iter_adaptive_batches(tickers, prints_sizer), 1):
+            print(f"   📦 Fetching batch {i} ({len(batch)} tickers)...", end='', flush=True)
+            try:
+                batch_results = fetch_with_bisection(
+                    lambda b: fetch_trades_planned_checked(b, start_date, end_date, superset_row_budget), batch, prints_sizer
+                )
+                for ticker, (prints, boxes) in batch_results.items():
+                    batch_prints_cache[ticker] = prints
+                    batch_boxes_cache[ticker] = boxes
+                print(f" ✓")
+            except Exception as e:
+                print(f" ✗ Error: {e}")
+                # On batch failure, mark all tickers in batch for individual fetch
+                for ticker in batch:
+                    batch_prints_cache[ticker] = None
+                    batch_boxes_cache[ticker] = None
+        
+        print(f"✅ Prints + boxes batch fetch complete! {len(batch_prints_cache)} tickers cached")
+        print(f"   {prints_sizer.summary()}\n")
+    else:
+        print(f"\n🎯 BATCH PROCESSING MODE")
+        print(f"   Fetching big prints for {len(tickers)} tickers in adaptive batches (starting at {prints_sizer.size})")
+        
+        # Fetch all big prints in batches, bisecting any batch that comes back empty or truncated
+        batch_prints_cache = {}
+        for i, batch in enumerate(iter_adaptive_batches(tickers, prints_sizer), 1):
+            print(f"   📦 Fetching batch {i} ({len(batch)} tickers)...", end='', flush=True)
+            try:
+                batch_results = fetch_with_bisection(
+                    lambda b: fetch_big_prints_batch_checked(b, start_date, end_date), batch, prints_sizer
+                )
+                batch_prints_cache.update(batch_results)
+                print(f" ✓")
+            except Exception as e:
+                print(f" ✗ Error: {e}")
+                # On batch failure, mark all tickers in batch for individual fetch
+                for ticker in batch:
+                    batch_prints_cache[ticker] = None
+        
+        print(f"✅ Big prints batch fetch complete! {len(batch_prints_cache)} tickers cached")
+        print(f"   {prints_sizer.summary()}\n")
+    
+    if superset_row_budget:
+        return batch_prints_cache, batch_boxes_cache
+    
+    # Fetch all price boxes in batches
+    print(f"\n🎯 FETCHING PRICE BOXES")
+    print(f"   Fetching boxes for {len(tickers)} tickers in adaptive batches (starting at {boxes_sizer.size})")
+    
+    batch_boxes_cache = {}
+    for i, batch in enumerate(iter_adaptive_batches(tickers, boxes_sizer), 1):
+        print(f"   📦 Fetching boxes batch {i} ({len(batch)} tickers)...", end='', flush=True)
+        try:
+            batch_results = fetch_with_bisection(
+                lambda b: fetch_price_boxes_batch_checked(b, start_date, end_date), batch, boxes_sizer
+            )
+            batch_boxes_cache.update(batch_results)
+            print(f" ✓")
+        except Exception as e:
+            print(f" ✗ Error: {e}")
+            for ticker in batch:
+                batch_boxes_cache[ticker] = None
+    
+    print(f"✅ Boxes batch fetch complete! {len(batch_boxes_cache)} tickers cached")
+    print(f"   {boxes_sizer.summary()}\n")
+    
+    return batch_prints_cache, batch_boxes_cache
+
+def fetch_levels_timed(ticker, start_date, end_date):
+    """Fetch one ticker's levels. Returns (levels, seconds), with None levels on failure."""
+    started = time.monotonic()
+    try:
+        return fetch_support_resistance_batch([ticker], start_date, end_date).get(ticker, []), time.monotonic() - started
+    except Exception as e:
+        print(f" ✗ Error fetching {ticker}: {e}")
+        return None, time.monotonic() - started
+
+def fetch_levels_concurrent(tickers, start_date, end_date, max_workers=4, levels_cache=None, on_result=None):
+    """Fetch support/resistance levels for many tickers with bounded parallelism.
+    
+    GetTradeLevels only honors one ticker per call, so each ticker is its own
+    request; the shared rate limiter still paces them. Tickers are submitted in
+    order with at most 2 * max_workers outstanding, so a slow on_result holds
+    the fetches back. on_result(ticker, levels) is called from the calling
+    thread as each ticker arrives (None marks a failed fetch). Results are kept
+    in levels_cache unless on_result is given without one.
+    Returns (levels_cache, latencies) with per-ticker latency in seconds.
+    """
+    keep = levels_cache is not None or on_result is None
+    if levels_cache is None:
+        levels_cache = {}
+    latencies = {}
+    
+    print(f"\n🎯 FETCHING SUPPORT/RESISTANCE LEVELS")
+    print(f"   Fetching levels for {len(tickers)} tickers with {max_workers} workers (one ticker per call - API limitation)")
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        remaining = iter(tickers)
+        future_to_ticker = {}
+        fetched = 0
+        while True:
+            for ticker in remaining:
+                future_to_ticker[executor.submit(fetch_levels_timed, ticker, start_date, end_date)] = ticker
+                if len(future_to_ticker) >= max_workers * 2:
+                    break
+            if not future_to_ticker:
+                break
+            done, _ = wait(future_to_ticker, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = future_to_ticker.pop(future)
+                levels, latencies[ticker] = future.result()
+                if keep:
+                    levels_cache[ticker] = levels
+                if on_result:
+                    on_result(ticker, levels)
+                fetched += 1
+                if fetched % 50 == 0 or fetched == len(tickers):
+                    print(f"   📊 Levels {fetched}/{len(tickers)} fetched", flush=True)
+    
+    print(f"✅ Levels fetch complete! {fetched} tickers fetched")
+    print(f"   {summarize_latencies(latencies)}\n")
+    return levels_cache, latencies
+
+def summarize_latencies(latencies):
+    """One-line p50/p95/max summary of per-ticker latencies, with the slowest tickers"""
+    if not latencies:
+        return "No latencies recorded"
+    ordered = sorted(latencies.values())
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    slowest = sorted(latencies, key=latencies.get, reverse=True)[:3]
+    slowest_str = ", ".join(f"{ticker} {latencies[ticker]:.2f}s" for ticker in slowest)
+    return f"Latency p50 {p50:.2f}s, p95 {p95:.2f}s, max {ordered[-1]:.2f}s (slowest: {slowest_str})"
+
+def stream_trades(tickers, start_date, end_date, prints_sizer, boxes_sizer, assembler, on_batch,
+                  superset_row_budget=0):
+    """Fetch prints and boxes batch by batch, handing each batch to the assembler as it lands.
+    
+    Waits for room in the assembler before each batch, then calls on_batch(batch)
+    once the batch's prints and boxes are delivered. A failed batch delivers None
+    for its tickers so process_ticker falls back to per-ticker fetches, same as
+    the sequential engine.
+    """
+    for batch in iter_adaptive_batches(tickers, prints_sizer):
+        assembler.wait_for_room()
+        if superset_row_budget:
+            try:
+                batch_results = fetch_with_bisection(
+                    lambda b: fetch_trades_planned_checked(b, start_date, end_date, superset_row_budget), batch, prints_sizer
+                )
+                for ticker, (prints, boxes) in batch_results.items():
+                    assembler.put('prints', ticker, prints)
+                    assembler.put('boxes', ticker, boxes)
+            except Exception as e:
+                print(f"\n ✗ Error fetching trades for {', '.join(batch)}: {e}")
+            assembler.fill_missing('prints', batch)
+            assembler.fill_missing('boxes', batch)
+            on_batch(batch)
+            continue
+        
+        try:
+            assembler.put_many('prints', fetch_with_bisection(
+                lambda b: fetch_big_prints_batch_checked(b, start_date, end_date), batch, prints_sizer
+            ))
+        except Exception as e:
+            print(f"\n ✗ Error fetching prints for {', '.join(batch)}: {e}")
+        assembler.fill_missing('prints', batch)
+        
+        # The boxes endpoint has its own learned size, so re-slice the prints batch
+        for boxes_batch in iter_adaptive_batches(batch, boxes_sizer):
+            try:
+                assembler.put_many('boxes', fetch_with_bisection(
+                    lambda b: fetch_price_boxes_batch_checked(b, start_date, end_date), boxes_batch, boxes_sizer
+                ))
+            except Exception as e:
+                print(f"\n ✗ Error fetching boxes for {', '.join(boxes_batch)}: {e}")
+            assembler.fill_missing('boxes', boxes_batch)
+        on_batch(batch)
+
+def start_streaming_pipeline(tickers, start_date, end_date, prints_sizer, boxes_sizer, on_ready,
+                             levels_workers=4, max_pending=200, superset_row_budget=0):
+    """Start the trades and levels stages feeding one TickerAssembler.
+    
+    The trades stage leads: levels are requested for a ticker once its prints
+    and boxes are in, so at most about max_pending tickers (plus one batch) are
+    held in memory. on_ready(ticker, parts) receives {'prints', 'levels',
+    'boxes'} for each ticker as soon as all three are in. Returns
+    (assembler, threads, latencies), where latencies fills in with per-ticker
+    levels latency; every ticker is delivered exactly once, even when a stage
+    fails.
+    """
+    assembler = TickerAssembler(('prints', 'levels', 'boxes'), on_ready, max_pending=max_pending)
+    levels_queue = queue.Queue()
+    latencies = {}
+    
+    print(f"\n🎯 STREAMING PIPELINE")
+    print(f"   Prints, levels and boxes are joined per ticker and written as they complete "
+          f"(up to {max_pending} tickers pending)")
+    
+    def run_trades():
+        queued = set()
+        
+        def queue_levels(batch):
+            for ticker in batch:
+                if ticker not in queued:
+                    queued.add(ticker)
+                    levels_queue.put(ticker)
+        
+        try:
+            stream_trades(tickers, start_date, end_date, prints_sizer, boxes_sizer, assembler, queue_levels,
+                          superset_row_budget)
+        except Exception as e:
+            print(f"\n ✗ Trades stage failed: {e}")
+        finally:
+            assembler.fill_missing('prints', tickers)
+            assembler.fill_missing('boxes', tickers)
+            queue_levels(tickers)
+            levels_queue.put(None)
+    
+    def fetch_levels_into(ticker):
+        levels, latencies[ticker] = fetch_levels_timed(ticker, start_date, end_date)
+        assembler.put('levels', ticker, levels)
+    
+    def run_levels():
+        # The queue only holds tickers whose trades are in, so it is bounded by the assembler
+        try:
+            with ThreadPoolExecutor(max_workers=levels_workers) as executor:
+                for ticker in iter(levels_queue.get, None):
+                    executor.submit(fetch_levels_into, ticker)
+        except Exception as e:
+            print(f"\n ✗ Levels stage failed: {e}")
+        finally:
+            assembler.fill_missing('levels', tickers)
+    
+    threads = [threading.Thread(target=run_trades, name='trades-stage', daemon=True),
+               threading.Thread(target=run_levels, name='levels-stage', daemon=True)]
+    for thread in threads:
+        thread.start()
+    return assembler, threads, latencies
+
+async def fetch_all_async(tickers, start_date, end_date, prints_sizer, boxes_sizer, max_in_flight=8, superset_row_budget=0):
+    """Fetch prints, levels and boxes concurrently with a bounded number of in-flight requests.
+    
+    All endpoint families are queued up front and overlap each other; the
+    blocking fetch_* functions run on a worker pool sized to max_in_flight.
+    Batches are cut at each sizer's current size; suspicious batches are still
+    bisected, which feeds the learned size for the next chunk.
+    Returns (prints_cache, levels_cache, boxes_cache).
+    """
+    if superset_row_budget:
+        trades_batches = list(iter_adaptive_batches(tickers, prints_sizer))
+        prints_batches = boxes_batches = []
+    else:
+        trades_batches = []
+        prints_batches = list(iter_adaptive_batches(tickers, prints_sizer))
+        boxes_batches = list(iter_adaptive_batches(tickers, boxes_sizer))
+    total_requests = len(trades_batches) + len(prints_batches) + len(boxes_batches) + len(tickers)
+    
+    print(f"\n🎯 ASYNC ENGINE")
+    if superset_row_budget:
+        print(f"   {len(trades_batches)} merged prints + boxes batches + {len(tickers)} level fetches")
+    else:
+        print(f"   {len(prints_batches)} prints batches + {len(tickers)} level fetches + {len(boxes_batches)} boxes batches")
+    print(f"   {total_requests} requests, up to {max_in_flight} in flight")
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    caches = {'prints': {}, 'levels': {}, 'boxes': {}}
+    
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor, \
+            tqdm(total=total_requests, desc="Fetching", unit="req", file=sys.stdout, dynamic_ncols=True) as pbar:
+        
+        async def run_fetch(kind, fetch_func, batch):
+            # 'trades' results carry (prints, boxes) per ticker from the merged query
+            kinds = ['prints', 'boxes'] if kind == 'trades' else [kind]
+            async with semaphore:
+                try:
+                    results = await loop.run_in_executor(executor, fetch_func, batch, start_date, end_date)
+                    if kind == 'trades':
+                        for ticker, (prints, boxes) in results.items():
+                            caches['prints'][ticker] = prints
+                            caches['boxes'][ticker] = boxes
+                    else:
+                        caches[kind].update(results)
+                except Exception as e:
+                    print(f"\n ✗ Error fetching {kind} for {', '.join(batch)}: {e}")
+                    # Mark tickers for individual fetch, same as the sequential engine
+                    for ticker in batch:
+                        for name in kinds:
+                            caches[name][ticker] = None
+                finally:
+                    pbar.update(1)
+        
+        def fetch_trades_adaptive(batch, start_date, end_date):
+            return fetch_with_bisection(
+                lambda b: fetch_trades_planned_checked(b, start_date, end_date, superset_row_budget), batch, prints_sizer
+            )
+        
+        def fetch_prints_adaptive(batch, start_date, end_date):
+            return fetch_with_bisection(
+                lambda b: fetch_big_prints_batch_checked(b, start_date, end_date), batch, prints_sizer
+            )
+        
+        def fetch_boxes_adaptive(batch, start_date, end_date):
+            return fetch_with_bisection(
+                lambda b: fetch_price_boxes_batch_checked(b, start_date, end_date), batch, boxes_sizer
+            )
+        
+        # The semaphore wakes waiters in FIFO order, so round-robin the endpoint families:
+        # prints, levels and boxes then all make progress together against their own rate budgets
+        families = [
+            [('trades', fetch_trades_adaptive, batch) for batch in trades_batches],
+            [('prints', fetch_prints_adaptive, batch) for batch in prints_batches],
+            [('levels', fetch_support_resistance_batch, [ticker]) for ticker in tickers],
+            [('boxes', fetch_boxes_adaptive, batch) for batch in boxes_batches],
+        ]
+        await asyncio.gather(*(run_fetch(*request) for requests_round in zip_longest(*families)
+                               for request in requests_round if request is not None))
+    
+    print(f"✅ Async fetch complete! {len(caches['prints'])} prints, {len(caches['levels'])} levels, "
+          f"{len(caches['boxes'])} boxes tickers cached")
+    print(f"   {prints_sizer.summary()}")
+    if not superset_row_budget:
+        print(f"   {boxes_sizer.summary()}")
+    print()
+    
+    return caches['prints'], caches['levels'], caches['boxes']
+
+def positive_rate(value):
+    """argparse type for request budgets: a rate of 0 would never refill the token bucket"""
+    rate = float(value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number of requests per second, got {value}")
+    return rate
+
 def main():
     parser = argparse.ArgumentParser(description='Populate individual ticker data files')
     parser.add_argument('--tickers', nargs='+', help='Specific tickers to process (default: all base_tickers from volumeleaders_config.json)')
     parser.add_argument('--max-workers', type=int, default=2, help='Maximum concurrent workers (default: 2, optimized for reliability)')
     parser.add_argument('--days-back', type=int, default=90, help='Days to look back for data (default: 90)')
     parser.add_argument('--timeout', type=int, default=3600, help='Maximum timeout in seconds for the entire process')
+    parser.add_argument('--engine', choices=['stream', 'sequential', 'async'], default='stream', help='Fetch engine: streaming per-ticker assembly, sequential phases or overlapped async requests (default: stream)')
+    parser.add_argument('--max-in-flight', type=int, default=8, help='Maximum concurrent API requests for the async engine (default: 8)')
+    parser.add_argument('--batch-size', type=int, default=10, help='Initial tickers per GetTrades batch; adapts from there (default: 10)')
+    parser.add_argument('--max-batch-size', type=int, default=50, help='Upper bound for learned GetTrades batch sizes (default: 50)')
+    parser.add_argument('--max-pending', type=int, default=200, help='Maximum partially assembled tickers held in memory by the stream engine (default: 200)')
+    parser.add_argument('--levels-workers', type=int, default=4, help='Concurrent GetTradeLevels requests in the levels stage (default: 4)')
+    parser.add_argument('--superset-row-budget', type=int, default=DEFAULT_SUPERSET_ROW_BUDGET, help=f'Fetch prints and boxes with one merged GetTrades query per batch unless it would exceed this many rows (at most one {BOXES_PAGE_SIZE}-row page); 0 always uses separate queries (default: %(default)s)')
+    parser.add_argument('--trades-rate', type=positive_rate, default=DEFAULT_BUDGETS['GetTrades'][0], help='GetTrades request budget per second (default: %(default)s)')
+    parser.add_argument('--levels-rate', type=positive_rate, default=DEFAULT_BUDGETS['GetTradeLevels'][0], help='GetTradeLevels request budget per second (default: %(default)s)')
+    parser.add_argument('--retry-budget', type=int, default=100, help='Maximum retries (429/5xx/connection errors) across the whole run (default: 100)')
+    parser.add_argument('--breaker-threshold', type=int, default=5, help='Consecutive failures that open an endpoint circuit breaker (default: 5)')
+    parser.add_argument('--breaker-cooldown', type=float, default=60.0, help='Seconds an open circuit breaker waits before probing the endpoint again (default: 60)')
+    parser.add_argument('--trade-store', nargs='?', const=str(DEFAULT_STORE_DIR), default=None, help='Keep raw trades in a day-partitioned store (default dir: trade_store) and fetch only the days it is missing')
+    parser.add_argument('--levels-source', choices=LEVELS_SOURCES, default='upstream', help='Support/resistance levels from GetTradeLevels, computed locally from the trade store, or both with a comparison report (default: upstream)')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='Directory for cached VolumeLeaders responses (default: .vl_cache)')
+    parser.add_argument('--cache-ttl', type=int, default=DEFAULT_TTL, help='Seconds a cached response stays fresh; 0 disables the cache (default: %(default)s)')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_MB, help='Size limit for the response cache before LRU eviction (default: %(default)s)')
+    parser.add_argument('--offline', action='store_true', help='Serve every request from the response cache and never touch the network; uncached tickers are skipped')
+    parser.add_argument('--output-format', choices=list(FORMAT_VERSIONS), default='pretty', help='Ticker file format: indented JSON, minified with default fields omitted, or minified row arrays (default: pretty)')
+    parser.add_argument('--precompress', action='store_true', help='Also write .json.gz (and .json.br with the brotli package) next to each ticker file')
+    parser.add_argument('--ticker-store', nargs='?', const=str(DEFAULT_DB_PATH), default=None, help='Keep prints, levels and boxes in a SQLite store (default: ticker_store.db) and materialize ticker files from it')
+    parser.add_argument('--materialize-aggregates', action='store_true', help='With --ticker-store, also rebuild big_prints.json, price_boxes.json and support_resistance_levels.json from the store at the end of the run')
     
     args = parser.parse_args()
+    if args.materialize_aggregates and not args.ticker_store:
+        parser.error("--materialize-aggregates builds the aggregate files from the ticker store and needs --ticker-store")
+    if args.levels_source != 'upstream':
+        if not args.trade_store:
+            parser.error("--levels-source local/compare computes levels from stored trades and needs --trade-store")
+        if args.engine == 'async':
+            parser.error("--levels-source local/compare needs trades stored before levels; use the stream or sequential engine")
     
     # Create output directory
     output_dir = Path(__file__).parent / 'ticker_data'
     output_dir.mkdir(exist_ok=True)
     
+    # Every request path goes through the shared per-endpoint rate limiter
+    rate_limiter = get_rate_limiter()
+    rate_limiter.configure('GetTrades', args.trades_rate)
+    rate_limiter.configure('GetTradeLevels', args.levels_rate)
+    
+    # 429/5xx responses are retried within a per-run budget; a failing endpoint trips its breaker
+    retry_policy = get_retry_policy()
+    retry_policy.configure(retry_budget=args.retry_budget, failure_threshold=args.breaker_threshold,
+                           cooldown=args.breaker_cooldown)
+    
+    # Identical queries (reruns, retried chunks) are answered from disk
+    response_cache = configure_response_cache(args.cache_dir, args.cache_ttl, args.cache_max_mb, args.offline)
+    if args.offline:
+        print(f"📴 Offline mode: replaying cached responses from {args.cache_dir}")
+    
+    # The trade store holds superset rows, so prints and boxes always come from the merged query path
+    trade_store = configure_trade_store(args.trade_store)
+    superset_row_budget = args.superset_row_budget
+    if superset_row_budget > DEFAULT_SUPERSET_ROW_BUDGET:
+        # Past one page the superset costs more requests than the two queries it replaces
+        print(f"⚠️  --superset-row-budget capped at {DEFAULT_SUPERSET_ROW_BUDGET} rows (one page)")
+        superset_row_budget = DEFAULT_SUPERSET_ROW_BUDGET
+    if trade_store is not None:
+        superset_row_budget = superset_row_budget or STORE_MAX_ROWS
+        print(f"🗄️  Trade store: {trade_store.root} (fetching only missing days)")
+    if args.levels_source == 'local':
+        # Local levels only use 500K+ prints; keep upstream until compare runs show they match
+        agree, reason = local_levels_agree(trade_store.root)
+        if agree:
+            print(f"📐 Local levels: {reason}")
+        else:
+            print(f"⚠️  Keeping upstream levels: {reason}")
+            args.levels_source = 'upstream'
+    levels_comparison = configure_levels_source(args.levels_source)
+    configure_ticker_format(args.output_format, args.precompress)
+    ticker_store = configure_ticker_store(args.ticker_store)
+    
     # Get date range
     start_date, end_date = get_date_range(args.days_back)
     print(f"Date range: {start_date} to {end_date}")
+    if ticker_store is not None:
+        ticker_store.start_run(f"{start_date} to {end_date}")
     
     # Get ticker list
     if args.tickers:
@@ -970,80 +1144,26 @@ def main():
     if not tickers:
         print("No tickers to process")
         sys.exit(1)
-    
-    # Pre-fetch big prints in batches for massive API call reduction
-    batch_size = 10  # Process 10 tickers per API call (50 caused empty responses from API)
-    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
-    num_batches = len(batches)
-    
-    print(f"\n🎯 BATCH PROCESSING MODE")
-    print(f"   Fetching big prints for {len(tickers)} tickers in {num_batches} batches")
-    print(f"   API calls reduction: {len(tickers)} → {num_batches} calls (-{100 * (1 - num_batches / len(tickers)):.1f}%)")
-    
-    # Fetch all big prints in batches
-    batch_prints_cache = {}
-    for i, batch in enumerate(batches, 1):
-        print(f"   📦 Fetching batch {i}/{num_batches} ({len(batch)} tickers)...", end='', flush=True)
-        try:
-            batch_results = fetch_big_prints_batch(batch, start_date, end_date)
-            batch_prints_cache.update(batch_results)
-            print(f" ✓")
-        except Exception as e:
-            print(f" ✗ Error: {e}")
-            # On batch failure, mark all tickers in batch for individual fetch
-            for ticker in batch:
-                batch_prints_cache[ticker] = None
-        
-        # Small delay between batches to be respectful
-        if i < num_batches:
-            time.sleep(1)
-    
-    print(f"✅ Big prints batch fetch complete! {len(batch_prints_cache)} tickers cached\n")
-    
-    # Fetch all support/resistance levels - NOTE: API only supports single ticker, so we iterate
-    print(f"\n🎯 FETCHING SUPPORT/RESISTANCE LEVELS")
-    print(f"   Fetching levels for {len(tickers)} tickers (one at a time - API limitation)")
-    
-    batch_levels_cache = {}
-    for i, ticker in enumerate(tickers, 1):
-        if i % 10 == 0 or i == len(tickers):
-            print(f"   📊 Fetching levels {i}/{len(tickers)}...", flush=True)
-        try:
-            # Fetch single ticker at a time (API doesn't support true batch)
-            batch_results = fetch_support_resistance_batch([ticker], start_date, end_date)
-            batch_levels_cache.update(batch_results)
-        except Exception as e:
-            print(f" ✗ Error fetching {ticker}: {e}")
-            batch_levels_cache[ticker] = None
-        
-        # Small delay every 10 tickers to avoid rate limiting
-        if i % 10 == 0:
-            time.sleep(0.5)
-    
-    print(f"✅ Levels fetch complete! {len(batch_levels_cache)} tickers cached\n")
-
-    
-    # Fetch all price boxes in batches
-    print(f"\n🎯 FETCHING PRICE BOXES")
-    print(f"   Fetching boxes for {len(tickers)} tickers in {num_batches} batches")
-    print(f"   API calls reduction: {len(tickers)} → {num_batches} calls (-{100 * (1 - num_batches / len(tickers)):.1f}%)")
-    
-    batch_boxes_cache = {}
-    for i, batch in enumerate(batches, 1):
-        print(f"   📦 Fetching boxes batch {i}/{num_batches} ({len(batch)} tickers)...", end='', flush=True)
-        try:
-            batch_results = fetch_price_boxes_batch(batch, start_date, end_date)
-            batch_boxes_cache.update(batch_results)
-            print(f" ✓")
-        except Exception as e:
-            print(f" ✗ Error: {e}")
-            for ticker in batch:
-                batch_boxes_cache[ticker] = None
-        
-        if i < num_batches:
-            time.sleep(1)
-    
-    print(f"✅ Boxes batch fetch complete! {len(batch_boxes_cache)} tickers cached\n")
+    tickers = list(dict.fromkeys(tickers))
+    
+    # Pre-fetch prints and boxes in adaptive batches for massive API call reduction.
+    # Sizes start at --batch-size and are learned per endpoint (persisting across chunks).
+    prints_sizer = get_batch_sizer('prints', args.batch_size, args.max_batch_size)
+    boxes_sizer = get_batch_sizer('boxes', args.batch_size, args.max_batch_size)
+    
+    if args.engine == 'async':
+        batch_prints_cache, batch_levels_cache, batch_boxes_cache = asyncio.run(
+            fetch_all_async(tickers, start_date, end_date, prints_sizer, boxes_sizer, args.max_in_flight,
+                            superset_row_budget)
+        )
+    elif args.engine == 'sequential':
+        batch_prints_cache, batch_boxes_cache = fetch_trades_sequential(
+            tickers, start_date, end_date, prints_sizer, boxes_sizer, superset_row_budget
+        )
+        batch_levels_cache = {}
+    else:
+        # The stream engine never builds universe-wide caches
+        batch_prints_cache = batch_levels_cache = batch_boxes_cache = None
     
     # Process tickers with controlled concurrency and progress bar
     successful = 0
@@ -1053,20 +1173,48 @@ def main():
     print(f"📊 Progress updates will be shown every 10 completed tickers...")
     
     with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
-        # Submit all tasks with all batch caches
-        future_to_ticker = {
-            executor.submit(process_ticker, ticker, start_date, end_date, output_dir, 
-                          batch_prints_cache, batch_levels_cache, batch_boxes_cache): ticker 
-            for ticker in tickers
-        }
+        future_to_ticker = {}
+        done_queue = queue.Queue()
+        # Bounds tickers waiting to be written, so producers slow down when writers fall behind
+        write_slots = threading.BoundedSemaphore(args.max_workers * 2)
+        
+        def submit_ticker(ticker, prints_cache=batch_prints_cache, levels_cache=batch_levels_cache,
+                          boxes_cache=batch_boxes_cache):
+            write_slots.acquire()
+            future = executor.submit(process_ticker, ticker, start_date, end_date, output_dir,
+                                     prints_cache, levels_cache, boxes_cache)
+            future_to_ticker[future] = ticker
+            future.add_done_callback(lambda f: (write_slots.release(), done_queue.put(f)))
+        
+        stream_threads = []
+        if args.engine == 'async':
+            # Submit all tasks with all batch caches
+            for ticker in tickers:
+                submit_ticker(ticker)
+        elif args.engine == 'sequential':
+            # Levels stream in concurrently; each ticker is written as soon as its levels arrive
+            fetch_levels_concurrent(tickers, start_date, end_date, args.levels_workers,
+                                    levels_cache=batch_levels_cache,
+                                    on_result=lambda ticker, levels: submit_ticker(ticker))
+        else:
+            # Each ticker is written (and released) as soon as its prints, levels and boxes are in
+            assembler, stream_threads, levels_latencies = start_streaming_pipeline(
+                tickers, start_date, end_date, prints_sizer, boxes_sizer,
+                on_ready=lambda ticker, parts: submit_ticker(
+                    ticker, {ticker: parts['prints']}, {ticker: parts['levels']}, {ticker: parts['boxes']}
+                ),
+                levels_workers=args.levels_workers, max_pending=args.max_pending,
+                superset_row_budget=superset_row_budget,
+            )
         
         # Process completed tasks with progress bar and periodic updates
         completed = 0
         with tqdm(total=len(tickers), desc="Processing tickers", unit="ticker", 
                   bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}] {postfix}",
                   file=sys.stdout, dynamic_ncols=True) as pbar:
-            for future in as_completed(future_to_ticker):
-                ticker = future_to_ticker[future]
+            for _ in range(len(tickers)):
+                future = done_queue.get()
+                ticker = future_to_ticker.pop(future)
                 try:
                     if future.result():
                         successful += 1
@@ -1082,11 +1230,8 @@ def main():
                 completed += 1
                 pbar.update(1)
                 
-                # Add small delay to avoid overwhelming the server and reduce resource pressure
-                time.sleep(0.2)  # 200ms delay between completions to prevent resource exhaustion
-                
-                # Periodic garbage collection to prevent memory leaks
-                if completed % 50 == 0:
+                # Periodic garbage collection for the engines that hold universe-wide caches
+                if args.engine != 'stream' and completed % 50 == 0:
                     gc.collect()
                 
                 # Print periodic progress updates for logs
@@ -1095,8 +1240,44 @@ def main():
                     print(f"\n📈 Progress Update: {completed}/{len(tickers)} tickers processed ({progress_pct:.1f}%) - ✓{successful} ✗{failed}")
                     sys.stdout.flush()  # Force output to appear in logs
     
+        for thread in stream_threads:
+            thread.join()
+    
     print(f"\n✅ Completed: {successful} successful, {failed} failed")
+    if args.engine == 'stream':
+        print(f"🧩 Pipeline: {assembler.summary()}")
+        print(f"   Levels {summarize_latencies(levels_latencies)}")
+        print(f"   {prints_sizer.summary()}")
+        if not superset_row_budget:
+            print(f"   {boxes_sizer.summary()}")
+    if superset_row_budget and trade_store is None:
+        print(f"🔀 {get_superset_planner().summary()}")
     print(f"📁 Output directory: {output_dir}")
+    ticker_writer = get_ticker_writer(output_dir)
+    if ticker_store is not None:
+        ticker_store.materialize_pending(output_dir)
+        if args.materialize_aggregates:
+            # Once per run, after every ticker is stored; the files are published from the root pending log
+            aggregates = ticker_store.materialize_aggregates(Path(output_dir).parent, precompress=args.precompress,
+                                                                stats=ticker_writer.compression)
+    ticker_writer.flush_index()
+    print(f"📝 Ticker files:\n{ticker_writer.report()}")
+    print(f"⏳ Rate limiter:\n{rate_limiter.report()}")
+    print(f"🔁 Retry policy:\n{retry_policy.report()}")
+    if response_cache is not None:
+        print(f"💾 Response cache:\n{response_cache.report()}")
+    if trade_store is not None:
+        print(f"🗄️  Trade store:\n{trade_store.report()}")
+    if levels_comparison is not None:
+        print(f"📐 Local vs upstream levels:\n{levels_comparison.report()}")
+        try:
+            levels_comparison.save(trade_store.root)
+        except OSError as e:
+            print(f"Warning: could not save levels comparison: {e}")
+    if ticker_store is not None:
+        print(f"🗃️  Ticker store:\n{ticker_store.report()}")
+        if args.materialize_aggregates:
+            print(f"   Aggregate files rewritten: {', '.join(path.name for path in aggregates) or 'none'}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Precompressed variants of published JSON files.
+Writes {file}.json.gz (and {file}.json.br when the brotli package is installed)
+next to a JSON file so a static HTTP front end can serve compressed bytes
+directly. gzip output uses mtime=0, so the same JSON always compresses to the
+same bytes and a variant is only rewritten when its content changes.
+"""
+
+import gzip
+import threading
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped without the brotli package
+    brotli = None
+
+from ticker_files import atomic_write_bytes
+
+def available_encodings():
+    return ('gz', 'br') if brotli is not None else ('gz',)
+
+def compress(data, encoding):
+    if encoding == 'gz':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+
+def variant_path(path, encoding):
+    path = Path(path)
+    return path.with_name(f"{path.name}.{encoding}")
+
+class CompressionStats:
+    """Raw vs compressed bytes of the variants written, per encoding"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.raw = 0
+        self.compressed = {}
+        self.files = 0
+        self.skipped = 0
+
+    def record(self, raw_size, sizes, written):
+        with self.lock:
+            self.raw += raw_size
+            for encoding, size in sizes.items():
+                self.compressed[encoding] = self.compressed.get(encoding, 0) + size
+            if written:
+                self.files += 1
+            else:
+                self.skipped += 1
+
+    def report(self):
+        with self.lock:
+            if not self.raw:
+                return "   No files compressed"
+            ratios = ", ".join(f".{encoding} {size / 1024:.0f} KB ({self.raw / size:.1f}x)"
+                               for encoding, size in sorted(self.compressed.items()) if size)
+            missing = "" if brotli is not None else " (.br skipped: brotli not installed)"
+            return (f"   {self.files} files compressed, {self.skipped} unchanged; "
+                    f"{self.raw / 1024:.0f} KB raw -> {ratios}{missing}")
+
+def precompress_file(path, stats=None, data=None):
+    """Write or refresh the compressed variants of a JSON file.
+
+    Variants whose bytes are already current are left untouched. Returns the
+    paths that were (re)written.
+    """
+    path = Path(path)
+    if data is None:
+        data = path.read_bytes()
+    written = []
+    sizes = {}
+    for encoding in available_encodings():
+        compressed = compress(data, encoding)
+        sizes[encoding] = len(compressed)
+        target = variant_path(path, encoding)
+        try:
+            if target.read_bytes() == compressed:
+                continue
+        except FileNotFoundError:
+            pass
+        atomic_write_bytes(target, compressed)
+        written.append(target)
+    if stats is not None:
+        stats.record(len(data), sizes, bool(written))
+    return written
+
+def remove_variants(path):
+    """Delete a file's compressed variants; returns the paths that existed"""
+    removed = []
+    for encoding in ('gz', 'br'):
+        target = variant_path(path, encoding)
+        try:
+            target.unlink()
+            removed.append(target)
+        except FileNotFoundError:
+            pass
+    return removed
@@ -12,6 +12,10 @@ from pathlib import Path
 from datetime import datetime
 from io import StringIO
 
+import vl_client
+from rate_limiter import get_rate_limiter
+from retry_policy import get_retry_policy
+
 def load_base_tickers():
     """Load base_tickers from the volumeleaders_config.json file"""
     config_file = Path(__file__).parent.parent / 'moe-bot' / 'volumeleaders_config.json'
@@ -147,11 +151,10 @@ def main():
         print(f"   ⏱️  Elapsed: {overall_elapsed/60:.1f} minutes")
         print(f"   🔮 Estimated remaining: {estimated_remaining/60:.1f} minutes")
         print(f"   🎯 ETA: {datetime.fromtimestamp(time.time() + estimated_remaining).strftime('%H:%M:%S')}")
-        
-        # Small delay between chunks
-        if i < total_chunks:
-            print(f"⏸️  Waiting 5 seconds before next chunk...")
-            time.sleep(5)
+    
+    # Every chunk shared one pooled VolumeLeaders client in this process; close it now.
+    # The limiter and retry stats reported below cover all chunks
+    vl_client.close_client()
     
     # Final summary
     total_elapsed = time.time() - start_time
@@ -163,6 +166,8 @@ def main():
     print(f"📈 Total tickers processed: {total_processed}/{len(all_tickers)}")
     print(f"⏱️  Total time: {total_elapsed/60:.1f} minutes")
     print(f"📊 Average rate: {total_processed/total_elapsed:.2f} tickers/second")
+    print(f"⏳ Rate limiter:\n{get_rate_limiter().report()}")
+    print(f"🔁 Retry policy:\n{get_retry_policy().report()}")
     print(f"🏁 Finished at: {datetime.now().strftime('%H:%M:%S')}")
     
     if failed_chunks > 0:
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiting for VolumeLeaders requests.
+Every request path acquires a token for its endpoint before hitting the API,
+so the pipeline runs at the configured budget instead of fixed sleeps.
+"""
+
+import threading
+import time
+
+# Default per-endpoint budgets as (requests per second, burst size)
+DEFAULT_BUDGETS = {
+    "GetTrades": (2.0, 4),
+    "GetTradeLevels": (5.0, 10),
+}
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second.
+
+    clock and sleep default to time.monotonic and time.sleep.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        if not rate > 0:
+            raise ValueError(f"Rate must be a positive number of requests per second, got {rate!r}")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                delay = (1.0 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+class RateLimiter:
+    """Per-endpoint token buckets with wait-time accounting"""
+
+    def __init__(self, budgets=None):
+        self.budgets = dict(DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in self.budgets.items()}
+        self.stats_lock = threading.Lock()
+        self.wait_seconds = {name: 0.0 for name in self.buckets}
+        self.requests = {name: 0 for name in self.buckets}
+
+    def configure(self, endpoint, rate, burst=None):
+        """Change the budget for an endpoint (burst defaults to twice the rate)"""
+        burst = burst if burst is not None else max(1, int(rate * 2))
+        self.budgets[endpoint] = (rate, burst)
+        self.buckets[endpoint] = TokenBucket(rate, burst)
+        with self.stats_lock:
+            self.wait_seconds.setdefault(endpoint, 0.0)
+            self.requests.setdefault(endpoint, 0)
+
+    def acquire(self, endpoint):
+        """Block until the endpoint's budget allows another request. Returns seconds waited."""
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            return 0.0
+        waited = bucket.acquire()
+        with self.stats_lock:
+            self.wait_seconds[endpoint] += waited
+            self.requests[endpoint] += 1
+        return waited
+
+    def report(self):
+        """One line per endpoint summarizing requests and time spent waiting on the limiter"""
+        lines = []
+        with self.stats_lock:
+            for endpoint, (rate, burst) in self.budgets.items():
+                lines.append(
+                    f"   {endpoint}: {self.requests[endpoint]} requests, "
+                    f"{self.wait_seconds[endpoint]:.1f}s waiting (budget {rate:g}/s, burst {burst})"
+                )
+        return "\n".join(lines)
+
+_limiter = RateLimiter()
+
+def get_rate_limiter():
+    """Return the process-wide RateLimiter shared by every request path"""
+    return _limiter
+
+def endpoint_name(endpoint):
+    """Budget key for an endpoint path, e.g. /Trades/GetTrades -> GetTrades"""
+    return endpoint.rstrip("/").rsplit("/", 1)[-1]
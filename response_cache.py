@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Disk-backed cache of VolumeLeaders responses.
+Successful responses are stored content-addressed by endpoint and normalized
+payload (which carries the tickers and date range), expire after a TTL and are
+evicted least-recently-used once the cache outgrows its size limit. In offline
+mode every request is served from the cache, whatever its age.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / '.vl_cache'
+DEFAULT_TTL = 900  # 15 minutes: reruns hit, the next scheduled update refetches
+DEFAULT_MAX_MB = 512
+
+# Payload fields that change between otherwise identical requests
+VOLATILE_FIELDS = {"draw"}
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a request has no cached response.
+
+    Deliberately not a RequestException, so fetchers do not turn it into an
+    empty result and overwrite a ticker file with nothing.
+    """
+
+class CachedResponse:
+    """The parts of requests.Response the fetchers use, served from the cache"""
+
+    def __init__(self, content):
+        self.status_code = 200
+        self.headers = {}
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+def normalize_payload(payload):
+    """Canonical form of a form payload: volatile fields dropped, ticker lists sorted"""
+    normalized = {}
+    for field, value in payload.items():
+        if field in VOLATILE_FIELDS:
+            continue
+        value = str(value)
+        if field in ("Tickers", "Ticker") and "," in value:
+            value = ",".join(sorted(value.split(",")))
+        normalized[field] = value
+    return normalized
+
+def cache_key(endpoint, payload):
+    """Content address for an endpoint + payload"""
+    canonical = json.dumps([endpoint, normalize_payload(payload)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """TTL + size-bounded LRU cache of response bodies, one gzip file per key.
+
+    File mtime records when a response was stored (for the TTL) and atime is
+    bumped on every hit (for LRU eviction), so no separate index is needed.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_mb=DEFAULT_MAX_MB, offline=False):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.total_bytes = sum(path.stat().st_size for path in self._entries())
+
+    def _entries(self):
+        return self.cache_dir.glob("*/*.json.gz")
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, endpoint, payload):
+        """Cached response for the request, or None if missing or expired (TTL ignored offline)"""
+        path = self._path(cache_key(endpoint, payload))
+        content = None
+        try:
+            stat = path.stat()
+            if self.offline or time.time() - stat.st_mtime <= self.ttl:
+                with gzip.open(path, 'rb') as f:
+                    content = f.read()
+                os.utime(path, (time.time(), stat.st_mtime))
+        except (OSError, EOFError):
+            content = None
+        if content is None:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return CachedResponse(content)
+
+    def put(self, endpoint, payload, response):
+        """Store a successful response body, then evict if over the size limit"""
+        if response.status_code != 200:
+            return
+        path = self._path(cache_key(endpoint, payload))
+        path.parent.mkdir(exist_ok=True)
+        old_size = path.stat().st_size if path.exists() else 0
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(response.content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not cache {endpoint} response: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        with self.lock:
+            self.stores += 1
+            self.total_bytes += path.stat().st_size - old_size
+            over_limit = self.total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is under 90% of its limit"""
+        with self.lock:
+            entries = []
+            for path in self._entries():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            entries.sort()
+            self.total_bytes = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if self.total_bytes <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                self.total_bytes -= size
+                self.evictions += 1
+
+    def report(self):
+        """One-line summary of cache effectiveness"""
+        mode = "offline replay" if self.offline else f"TTL {self.ttl}s"
+        return (f"   {self.hits} hits, {self.misses} misses, {self.stores} stored, {self.evictions} evicted, "
+                f"{self.total_bytes / 1024 / 1024:.1f} MB ({mode})")
+
+_cache = None
+
+def configure_response_cache(cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_mb=DEFAULT_MAX_MB, offline=False):
+    """Enable the process-wide response cache (ttl=0 disables it unless offline)"""
+    global _cache
+    _cache = ResponseCache(cache_dir, ttl, max_mb, offline) if (ttl > 0 or offline) else None
+    return _cache
+
+def get_response_cache():
+    """Return the process-wide ResponseCache, or None when caching is disabled"""
+    return _cache
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Status-aware retries for VolumeLeaders requests.
+Classifies HTTP status codes, honors Retry-After, spends from a per-run retry
+budget and trips a per-endpoint circuit breaker so a degraded upstream fails
+fast instead of burning every batch's full timeout.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+AUTH_STATUS = {401, 403}
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while an endpoint's breaker is open"""
+
+def classify_status(status_code):
+    """Classify an HTTP status as 'ok', 'retry', 'auth' or 'fatal'"""
+    if 200 <= status_code < 300:
+        return 'ok'
+    if status_code in RETRYABLE_STATUS:
+        return 'retry'
+    if status_code in AUTH_STATUS:
+        return 'auth'
+    return 'fatal'
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RetryBudget:
+    """Caps the total number of retries spent across a whole run"""
+
+    def __init__(self, max_retries=100):
+        self.max_retries = max_retries
+        self.spent = 0
+        self.lock = threading.Lock()
+
+    def try_spend(self):
+        with self.lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one probe through after a cooldown"""
+
+    def __init__(self, name, failure_threshold=5, cooldown=60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: allow a single probe once the cooldown has passed
+            if not self.probing and time.monotonic() - self.opened_at >= self.cooldown:
+                self.probing = True
+                return True
+            return False
+
+    def is_open(self):
+        with self.lock:
+            return self.opened_at is not None
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None or self.probing:
+                    self.trips += 1
+                    print(f"\n🔌 Circuit breaker for {self.name} opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+class RetryPolicy:
+    """Runs a request callable with status-aware retries, a shared budget and per-endpoint breakers"""
+
+    def __init__(self, max_retries=3, base_delay=2.0, max_delay=60.0, retry_budget=100,
+                 failure_threshold=5, cooldown=60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = RetryBudget(retry_budget)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def configure(self, retry_budget=None, failure_threshold=None, cooldown=None):
+        """Apply new limits without resetting run state.
+
+        Retries already spent and breaker state carry over, so process_chunks
+        calling populate_ticker_data.main() once per chunk keeps one budget and
+        one set of breakers for the whole run. Use reset() to start over.
+        """
+        with self.lock:
+            if retry_budget is not None:
+                with self.budget.lock:
+                    self.budget.max_retries = retry_budget
+            if failure_threshold is not None:
+                self.failure_threshold = failure_threshold
+            if cooldown is not None:
+                self.cooldown = cooldown
+            for breaker in self.breakers.values():
+                with breaker.lock:
+                    breaker.failure_threshold = self.failure_threshold
+                    breaker.cooldown = self.cooldown
+
+    def reset(self):
+        """Forget spent retries and breaker state"""
+        with self.lock:
+            self.budget = RetryBudget(self.budget.max_retries)
+            self.breakers = {}
+
+    def breaker(self, endpoint):
+        with self.lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(endpoint, self.failure_threshold, self.cooldown)
+            return self.breakers[endpoint]
+
+    def should_retry(self, attempt, breaker):
+        """Retry only with attempts left, a closed breaker and budget to spend"""
+        return attempt < self.max_retries and not breaker.is_open() and self.budget.try_spend()
+
+    def backoff_delay(self, attempt):
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay + random.uniform(0.1, 0.3) * delay  # Add 10-30% jitter
+
+    def call(self, endpoint, send):
+        """Call send() -> requests.Response, retrying transient failures.
+
+        Returns the final response (which may still be an error status once
+        retries or the budget run out). Raises CircuitOpenError while the
+        endpoint's breaker is open, or the last transport error.
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {endpoint}, skipping request")
+
+            retry_after = None
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                breaker.record_failure()
+                if not self.should_retry(attempt, breaker):
+                    raise
+                reason = str(e)
+            else:
+                outcome = classify_status(response.status_code)
+                if outcome != 'retry':
+                    # The upstream answered; auth and client errors are not its health problem
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if not self.should_retry(attempt, breaker):
+                    return response
+                reason = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            delay = min(retry_after, self.max_delay) if retry_after is not None else self.backoff_delay(attempt)
+            print(f"{endpoint} attempt {attempt + 1} failed: {reason}. Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            attempt += 1
+
+    def report(self):
+        """Summary of retries spent and breaker trips"""
+        with self.lock:
+            trips = ", ".join(f"{name}: {b.trips}" for name, b in self.breakers.items()) or "none"
+        return f"   Retries: {self.budget.spent}/{self.budget.max_retries} budget used, breaker trips: {trips}"
+
+_policy = RetryPolicy()
+
+def get_retry_policy():
+    """Return the process-wide RetryPolicy shared by every request path"""
+    return _policy
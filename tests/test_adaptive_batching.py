@@ -0,0 +1,86 @@
+import unittest
+from unittest import mock
+
+from adaptive_batching import AdaptiveBatchSizer, fetch_with_bisection, iter_adaptive_batches
+
+
+class FakeFetch:
+    """fetch_checked stand-in: batches larger than max_complete come back incomplete"""
+
+    def __init__(self, max_complete, suspicious=()):
+        self.max_complete = max_complete
+        self.suspicious = set(suspicious)
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(list(batch))
+        complete = len(batch) <= self.max_complete and not (self.suspicious & set(batch))
+        return {ticker: [ticker.lower()] for ticker in batch}, complete
+
+
+class FetchWithBisectionTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch('builtins.print')
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_complete_batch_is_fetched_once(self):
+        sizer = AdaptiveBatchSizer('prints', initial=4, step=2)
+        fetch = FakeFetch(max_complete=10)
+        results = fetch_with_bisection(fetch, ['A', 'B', 'C', 'D'], sizer)
+        self.assertEqual(fetch.batches, [['A', 'B', 'C', 'D']])
+        self.assertEqual(results, {'A': ['a'], 'B': ['b'], 'C': ['c'], 'D': ['d']})
+        self.assertEqual((sizer.size, sizer.bisections), (6, 0))
+
+    def test_suspicious_batch_is_split_until_complete(self):
+        sizer = AdaptiveBatchSizer('prints', initial=8, step=2)
+        fetch = FakeFetch(max_complete=2)
+        tickers = ['A', 'B', 'C', 'D', 'E']
+        results = fetch_with_bisection(fetch, tickers, sizer)
+        self.assertEqual(fetch.batches, [['A', 'B', 'C', 'D', 'E'], ['A', 'B'], ['C', 'D', 'E'], ['C'], ['D', 'E']])
+        self.assertEqual(sorted(results), tickers)
+        # The failing sizes become a ceiling and the size is halved
+        self.assertEqual((sizer.bisections, sizer.ceiling), (2, 2))
+        self.assertLessEqual(sizer.size, 2)
+
+    def test_single_ticker_is_accepted_as_is(self):
+        sizer = AdaptiveBatchSizer('boxes', initial=2)
+        fetch = FakeFetch(max_complete=10, suspicious={'B'})
+        results = fetch_with_bisection(fetch, ['A', 'B'], sizer)
+        self.assertEqual(fetch.batches, [['A', 'B'], ['A'], ['B']])
+        self.assertEqual(results, {'A': ['a'], 'B': ['b']})
+
+    def test_fetch_errors_propagate(self):
+        sizer = AdaptiveBatchSizer('prints')
+
+        def failing(batch):
+            raise RuntimeError('boom')
+
+        with self.assertRaises(RuntimeError):
+            fetch_with_bisection(failing, ['A', 'B'], sizer)
+        self.assertEqual(sizer.calls, 0)
+
+
+class AdaptiveBatchSizerTest(unittest.TestCase):
+    def test_growth_and_shrink_respect_bounds(self):
+        sizer = AdaptiveBatchSizer('prints', initial=10, minimum=1, maximum=12, step=5)
+        sizer.record_success(10)
+        self.assertEqual(sizer.size, 12)
+        sizer.record_success(3)  # A short final batch does not grow the size
+        self.assertEqual(sizer.size, 12)
+        sizer.record_failure(12)
+        self.assertEqual((sizer.size, sizer.ceiling), (6, 11))
+        sizer.record_failure(1)
+        self.assertEqual((sizer.size, sizer.ceiling), (1, 1))
+
+    def test_batches_follow_the_learned_size(self):
+        sizer = AdaptiveBatchSizer('prints', initial=2)
+        batches = []
+        for batch in iter_adaptive_batches(list('ABCDEFG'), sizer):
+            batches.append(batch)
+            sizer.size = 3
+        self.assertEqual(batches, [['A', 'B'], ['C', 'D', 'E'], ['F', 'G']])
+
+
+if __name__ == '__main__':
+    unittest.main()
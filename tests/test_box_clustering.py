@@ -0,0 +1,50 @@
+import unittest
+
+from box_clustering import BOX_COLORS, cluster_price_boxes
+
+
+def trade(ticker, price, dollars, date_key=None, volume=100):
+    row = {'Ticker': ticker, 'Price': price, 'Volume': volume, 'Dollars': dollars}
+    if date_key:
+        row['DateKey'] = date_key
+    return row
+
+
+class BoxClusteringTest(unittest.TestCase):
+    def test_gap_splits_boxes_ranked_by_dollars(self):
+        rows = [
+            trade('AAA', 100.0, 1_000_000, '20260302'),
+            trade('AAA', 100.5, 2_000_000, '20260304'),
+            trade('AAA', 110.0, 5_000_000, '20260303'),
+        ]
+        boxes = cluster_price_boxes(rows, ['AAA'], '2026-03-01', '2026-03-05')['AAA']
+        self.assertEqual(len(boxes), 2)
+        top, second = boxes
+        self.assertEqual((top['box_number'], top['low_price'], top['high_price'], top['trades']), (1, 110.0, 110.0, 1))
+        self.assertEqual(top['color'], BOX_COLORS[0])
+        self.assertEqual((second['low_price'], second['high_price']), (100.0, 100.5))
+        self.assertEqual((second['dollars'], second['volume'], second['trades']), (3_000_000, 200, 2))
+        self.assertEqual(second['date_range'], '2026-03-02 to 2026-03-04')
+
+    def test_tickers_never_share_a_box(self):
+        rows = [trade('AAA', 50.0, 1_000_000), trade('BBB', 50.1, 1_000_000), trade('ZZZ', 1.0, 1)]
+        result = cluster_price_boxes(rows, ['AAA', 'BBB', 'CCC'], '2026-03-01', '2026-03-05')
+        self.assertEqual(sorted(result), ['AAA', 'BBB', 'CCC'])
+        self.assertEqual([len(result[ticker]) for ticker in ('AAA', 'BBB', 'CCC')], [1, 1, 0])
+        # Trades without a date fall back to the query window
+        self.assertEqual(result['AAA'][0]['date_range'], '2026-03-01 to 2026-03-05')
+
+    def test_keeps_top_max_boxes(self):
+        rows = [trade('AAA', 10.0 * (i + 1), (i + 1) * 1_000_000) for i in range(8)]
+        boxes = cluster_price_boxes(rows, ['AAA'], '2026-03-01', '2026-03-05', max_boxes=3)['AAA']
+        self.assertEqual([box['dollars'] for box in boxes], [8_000_000, 7_000_000, 6_000_000])
+        self.assertEqual([box['box_number'] for box in boxes], [1, 2, 3])
+
+    def test_unparseable_rows_are_skipped(self):
+        rows = [trade('AAA', 'n/a', 1_000_000), trade('AAA', 20.0, 'x'), trade('AAA', 20.0, 500)]
+        boxes = cluster_price_boxes(rows, ['AAA'], '2026-03-01', '2026-03-05')['AAA']
+        self.assertEqual([(box['trades'], box['dollars']) for box in boxes], [(1, 500)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from git_publisher import GitPublisher, PublishError, blob_id
+
+
+def git(repo, *args):
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+def identify(repo):
+    git(repo, 'config', 'user.name', 'Publisher Test')
+    git(repo, 'config', 'user.email', 'publisher@example.com')
+
+
+class GitPublisherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.origin = root / 'origin.git'
+        self.work = root / 'work'
+        git(root, 'init', '-q', '--bare', '-b', 'main', str(self.origin))
+        git(root, 'init', '-q', '-b', 'main', str(self.work))
+        identify(self.work)
+        git(self.work, 'remote', 'add', 'origin', str(self.origin))
+        (self.work / 'ticker_data').mkdir()
+        (self.work / 'ticker_data' / 'AAA.json').write_text('{"a": 1}')
+        (self.work / 'ticker_data' / 'BBB.json').write_text('{"b": 1}')
+        git(self.work, 'add', '-A')
+        git(self.work, 'commit', '-q', '-m', 'initial')
+        git(self.work, 'push', '-q', 'origin', 'main')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_blob_id_matches_git(self):
+        path = self.work / 'ticker_data' / 'AAA.json'
+        self.assertEqual(blob_id(path.read_bytes()), git(self.work, 'hash-object', str(path)).strip())
+
+    def test_publish_changed_and_deleted_files(self):
+        (self.work / 'ticker_data' / 'AAA.json').write_text('{"a": 2}')
+        (self.work / 'ticker_data' / 'CCC.json').write_text('{"c": 1}')
+        (self.work / 'ticker_data' / 'BBB.json').unlink()
+
+        commit = GitPublisher(self.work).publish_files(
+            ['ticker_data/AAA.json', 'ticker_data/CCC.json', 'ticker_data/BBB.json'], message='Update')
+        self.assertIsNotNone(commit)
+        self.assertEqual(git(self.origin, 'rev-parse', 'main').strip(), commit)
+        self.assertEqual(git(self.origin, 'show', 'main:ticker_data/AAA.json'), '{"a": 2}')
+        self.assertEqual(git(self.origin, 'ls-tree', '--name-only', 'main', 'ticker_data/').split(),
+                         ['ticker_data/AAA.json', 'ticker_data/CCC.json'])
+        self.assertEqual(git(self.origin, 'log', '-1', '--format=%s', 'main').strip(), 'Update')
+        # The index follows the new commit, so the work tree is clean
+        self.assertEqual(git(self.work, 'status', '--porcelain'), '')
+
+    def test_unchanged_files_make_no_commit(self):
+        tip = git(self.work, 'rev-parse', 'HEAD').strip()
+        publisher = GitPublisher(self.work)
+        self.assertIsNone(publisher.publish_files(['ticker_data/AAA.json'], ['ticker_data/ZZZ.json'], 'Noop'))
+        self.assertEqual(publisher.tip(), tip)
+
+    def test_publish_into_bare_repository(self):
+        identify(self.origin)
+        publisher = GitPublisher(self.origin)
+        self.assertTrue(publisher.bare)
+        commit = publisher.publish({'manifest/AA.json': b'{"files":{}}', 'ticker_data/AAA.json': None},
+                                   'Bare update', push=False)
+        self.assertEqual(publisher.tip(), commit)
+        self.assertEqual(git(self.origin, 'show', 'main:manifest/AA.json'), '{"files":{}}')
+        self.assertEqual(git(self.origin, 'ls-tree', '-r', '--name-only', 'main').split(),
+                         ['manifest/AA.json', 'ticker_data/BBB.json'])
+
+    def test_detached_head_needs_a_branch(self):
+        git(self.work, 'checkout', '-q', '--detach')
+        with self.assertRaises(PublishError):
+            GitPublisher(self.work)
+        self.assertEqual(GitPublisher(self.work, branch='main').branch, 'main')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import precompress
+from precompress import CompressionStats, available_encodings, precompress_file, remove_variants, variant_path
+from ticker_files import TickerFileWriter, read_pending
+
+
+def decompress(path):
+    if path.name.endswith('.gz'):
+        return gzip.decompress(path.read_bytes())
+    return precompress.brotli.decompress(path.read_bytes())
+
+
+class PrecompressTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+
+    def test_variants_decompress_to_source(self):
+        path = self.root / 'AAA.json'
+        path.write_text(json.dumps({"prints": [{"price": 100.0 + i} for i in range(200)]}))
+        stats = CompressionStats()
+        written = precompress_file(path, stats)
+        self.assertEqual(sorted(written), sorted(variant_path(path, encoding) for encoding in available_encodings()))
+        for variant in written:
+            self.assertEqual(decompress(variant), path.read_bytes())
+            self.assertLess(variant.stat().st_size, path.stat().st_size)
+
+        # Deterministic output: unchanged source leaves the variants alone
+        self.assertEqual(precompress_file(path, stats), [])
+        self.assertEqual((stats.files, stats.skipped), (1, 1))
+
+        path.write_text('{"prints": []}')
+        self.assertEqual(len(precompress_file(path)), len(available_encodings()))
+        self.assertEqual(decompress(variant_path(path, 'gz')), b'{"prints": []}')
+
+        self.assertEqual(sorted(remove_variants(path)), sorted(written))
+        self.assertEqual(list(self.root.iterdir()), [path])
+
+    @unittest.skipIf(precompress.brotli is None, "brotli is not installed")
+    def test_brotli_variant(self):
+        path = self.root / 'AAA.json'
+        path.write_text('{"levels": []}')
+        precompress_file(path)
+        self.assertEqual(decompress(variant_path(path, 'br')), path.read_bytes())
+
+    def test_writer_keeps_variants_and_logs_them(self):
+        output_dir = self.root / 'ticker_data'
+        output_dir.mkdir()
+        writer = TickerFileWriter(output_dir, 'compact', precompress=True)
+        data = {"metadata": {"ticker": "AAA"}, "prints": [], "levels": [{"price": 1.0}], "boxes": []}
+        writer.write('AAA', data)
+        source = output_dir / 'AAA.json'
+        for encoding in available_encodings():
+            self.assertEqual(decompress(variant_path(source, encoding)), source.read_bytes())
+        self.assertEqual(read_pending(output_dir), ['AAA.json'] + [f'AAA.json.{e}' for e in available_encodings()])
+
+        # A lost variant is restored even when the file itself is unchanged
+        variant_path(source, 'gz').unlink()
+        self.assertFalse(writer.write('AAA', data))
+        self.assertEqual(decompress(variant_path(source, 'gz')), source.read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from rate_limiter import RateLimiter, TokenBucket, endpoint_name
+
+
+class FakeClock:
+    """Monotonic clock that only advances when the bucket sleeps (or the test moves it)"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def bucket(self, rate, burst):
+        return TokenBucket(rate, burst, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_then_steady_rate(self):
+        bucket = self.bucket(rate=2.0, burst=3)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual(self.clock.sleeps, [])
+        # Past the burst each request waits 1/rate seconds
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(self.clock.now, 101.0)
+
+    def test_refill_is_capped_at_burst(self):
+        bucket = self.bucket(rate=1.0, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 0.25
+        self.assertAlmostEqual(bucket.acquire(), 0.75)
+        # A long idle period only refills up to the burst size
+        self.clock.now += 60
+        self.assertEqual([bucket.acquire(), bucket.acquire()], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+    def test_burst_below_one_still_allows_a_request(self):
+        bucket = self.bucket(rate=0.5, burst=0)
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertAlmostEqual(bucket.acquire(), 2.0)
+
+    def test_non_positive_rates_are_rejected(self):
+        for rate in (0, -1, float('nan')):
+            with self.assertRaises(ValueError):
+                TokenBucket(rate, 1)
+        with self.assertRaises(ValueError):
+            RateLimiter().configure('GetTrades', 0)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_accounting_and_unknown_endpoints(self):
+        limiter = RateLimiter({'GetTrades': (1000.0, 5)})
+        for _ in range(3):
+            limiter.acquire('GetTrades')
+        self.assertEqual(limiter.acquire('GetSomethingElse'), 0.0)
+        self.assertEqual(limiter.requests['GetTrades'], 3)
+        self.assertIn('GetTrades: 3 requests', limiter.report())
+
+        limiter.configure('GetTradeLevels', 4)
+        self.assertEqual(limiter.budgets['GetTradeLevels'], (4, 8))
+
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name('/Trades/GetTrades'), 'GetTrades')
+        self.assertEqual(endpoint_name('/TradeLevels/GetTradeLevels/'), 'GetTradeLevels')
+
+
+if __name__ == '__main__':
+    unittest.main()
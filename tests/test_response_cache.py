@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+import response_cache
+import vl_client
+from response_cache import CacheMissError, ResponseCache, cache_key, configure_response_cache
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.status_code = status_code
+        self.content = content
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def payload(self, tickers='AAPL,MSFT', **extra):
+        return {'Tickers': tickers, 'StartDate': '2026-01-02', 'EndDate': '2026-03-02', 'draw': 1, **extra}
+
+    def age(self, cache, endpoint, payload, seconds_ago, accessed_ago=None):
+        path = cache._path(cache_key(endpoint, payload))
+        now = time.time()
+        accessed_ago = seconds_ago if accessed_ago is None else accessed_ago
+        os.utime(path, (now - accessed_ago, now - seconds_ago))
+
+    def test_key_ignores_volatile_fields_and_ticker_order(self):
+        self.assertEqual(cache_key('/Trades/GetTrades', self.payload('AAPL,MSFT', draw=1)),
+                         cache_key('/Trades/GetTrades', self.payload('MSFT,AAPL', draw=7)))
+        self.assertNotEqual(cache_key('/Trades/GetTrades', self.payload()),
+                            cache_key('/Trades/GetTrades', self.payload(EndDate='2026-03-03')))
+
+    def test_round_trip_and_ttl_expiry(self):
+        cache = ResponseCache(self.tmp.name, ttl=60)
+        cache.put('/Trades/GetTrades', self.payload(), FakeResponse(b'{"data": [1]}'))
+        cache.put('/Trades/GetTrades', self.payload('TSLA'), FakeResponse(b'error', status_code=500))
+        self.assertEqual(cache.get('/Trades/GetTrades', self.payload()).json(), {"data": [1]})
+        self.assertIsNone(cache.get('/Trades/GetTrades', self.payload('TSLA')))
+
+        self.age(cache, '/Trades/GetTrades', self.payload(), 61)
+        self.assertIsNone(cache.get('/Trades/GetTrades', self.payload()))
+        self.assertEqual((cache.hits, cache.misses, cache.stores), (1, 2, 1))
+
+        # Offline replay ignores the TTL
+        offline = ResponseCache(self.tmp.name, ttl=60, offline=True)
+        self.assertEqual(offline.get('/Trades/GetTrades', self.payload()).text, '{"data": [1]}')
+
+    def test_lru_eviction_by_size(self):
+        body = os.urandom(40 * 1024)  # Incompressible, so each entry is about 40 KB on disk
+        cache = ResponseCache(self.tmp.name, ttl=3600, max_mb=0.1)
+        for ticker, accessed_ago in (('AAA', 30), ('BBB', 10), ('CCC', 20)):
+            cache.put('/Trades/GetTrades', self.payload(ticker), FakeResponse(body))
+            self.age(cache, '/Trades/GetTrades', self.payload(ticker), 60, accessed_ago)
+        self.assertEqual(cache.evictions, 1)  # AAA was the least recently used when CCC pushed it over
+
+        # A hit refreshes BBB, so CCC is now the oldest entry
+        self.age(cache, '/Trades/GetTrades', self.payload('BBB'), 60, 40)
+        self.assertIsNotNone(cache.get('/Trades/GetTrades', self.payload('BBB')))
+        cache.put('/Trades/GetTrades', self.payload('DDD'), FakeResponse(body))
+        present = [ticker for ticker in ('AAA', 'BBB', 'CCC', 'DDD')
+                   if cache.get('/Trades/GetTrades', self.payload(ticker)) is not None]
+        self.assertEqual(present, ['BBB', 'DDD'])
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+
+    def test_offline_miss_raises(self):
+        self.addCleanup(configure_response_cache, ttl=0)
+        cache = configure_response_cache(self.tmp.name, ttl=0, offline=True)
+        self.assertIs(response_cache.get_response_cache(), cache)
+        cache.put('/Trades/GetTrades', self.payload(), FakeResponse(b'{"data": []}'))
+
+        client = vl_client.VLClient(auth=object())
+        self.addCleanup(client.close)
+        self.assertEqual(client.post('/Trades/GetTrades', self.payload()).json(), {"data": []})
+        with self.assertRaises(CacheMissError):
+            client.post('/Trades/GetTrades', self.payload('TSLA'))
+        # Fetchers turn RequestExceptions into failed batches; a miss must not look like one
+        self.assertFalse(issubclass(CacheMissError, requests.exceptions.RequestException))
+
+
+if __name__ == '__main__':
+    unittest.main()
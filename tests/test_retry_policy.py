@@ -0,0 +1,134 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSend:
+    """Returns (or raises) the scripted outcomes in order, repeating the last one"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(*outcome) if isinstance(outcome, tuple) else FakeResponse(outcome)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patches = [mock.patch('retry_policy.time.sleep'), mock.patch('retry_policy.time.monotonic', self.clock),
+                   mock.patch('builtins.print')]
+        self.sleep = patches[0].start()
+        for patch in patches[1:]:
+            patch.start()
+        for patch in patches:
+            self.addCleanup(patch.stop)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertEqual(parse_retry_after('-3'), 0.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_retry_after_is_honored(self):
+        policy = RetryPolicy(max_delay=60.0)
+        send = FakeSend((503, {'Retry-After': '7'}), (429, {'Retry-After': '600'}), 200)
+        self.assertEqual(policy.call('GetTrades', send).status_code, 200)
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [7.0, 60.0])
+        self.assertEqual(policy.budget.spent, 2)
+
+    def test_spent_budget_raises_instead_of_returning_empty(self):
+        policy = RetryPolicy(retry_budget=1, failure_threshold=100)
+        send = FakeSend(requests.exceptions.ConnectionError('reset'))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            policy.call('GetTrades', send)
+        self.assertEqual(send.calls, 2)
+
+        # The budget is spent for the whole run: the next failure is not retried
+        send = FakeSend(requests.exceptions.Timeout('slow'))
+        with self.assertRaises(requests.exceptions.Timeout):
+            policy.call('GetTradeLevels', send)
+        self.assertEqual(send.calls, 1)
+
+        # A retryable status is handed back as-is, never as a successful empty answer
+        response = policy.call('GetTrades', FakeSend(503))
+        self.assertEqual(response.status_code, 503)
+
+    def test_breaker_opens_then_half_opens(self):
+        policy = RetryPolicy(max_retries=0, failure_threshold=2, cooldown=30.0)
+        for _ in range(2):
+            self.assertEqual(policy.call('GetTrades', FakeSend(502)).status_code, 502)
+        send = FakeSend(200)
+        with self.assertRaises(CircuitOpenError):
+            policy.call('GetTrades', send)
+        self.assertEqual(send.calls, 0)
+        self.assertIsInstance(CircuitOpenError('x'), requests.exceptions.RequestException)
+        # Other endpoints have their own breaker
+        self.assertEqual(policy.call('GetTradeLevels', FakeSend(200)).status_code, 200)
+
+        # After the cooldown one probe goes through; a failed probe reopens the breaker
+        self.clock.now += 30.0
+        self.assertEqual(policy.call('GetTrades', FakeSend(503)).status_code, 503)
+        with self.assertRaises(CircuitOpenError):
+            policy.call('GetTrades', FakeSend(200))
+        self.assertEqual(policy.breaker('GetTrades').trips, 2)
+
+        # A successful probe closes it
+        self.clock.now += 30.0
+        self.assertEqual(policy.call('GetTrades', FakeSend(200)).status_code, 200)
+        self.assertFalse(policy.breaker('GetTrades').is_open())
+
+    def test_half_open_allows_a_single_probe(self):
+        breaker = CircuitBreaker('GetTrades', failure_threshold=1, cooldown=10.0)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.clock.now += 10.0
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+    def test_auth_errors_are_not_retried(self):
+        policy = RetryPolicy(failure_threshold=1)
+        for status in (401, 403):
+            send = FakeSend(status, 200)
+            self.assertEqual(policy.call('GetTrades', send).status_code, status)
+            self.assertEqual(send.calls, 1)
+        self.assertEqual(policy.budget.spent, 0)
+        self.assertFalse(policy.breaker('GetTrades').is_open())
+        self.sleep.assert_not_called()
+
+    def test_configure_keeps_run_state(self):
+        policy = RetryPolicy(retry_budget=5)
+        policy.budget.try_spend()
+        policy.call('GetTrades', FakeSend(requests.exceptions.ConnectionError('reset'), 200))
+        policy.configure(retry_budget=5, failure_threshold=3, cooldown=5.0)
+        self.assertEqual(policy.budget.spent, 2)
+        self.assertEqual(policy.breaker('GetTrades').failure_threshold, 3)
+        policy.reset()
+        self.assertEqual(policy.budget.spent, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ticker_bundle import HEADER, RECORD, BundleWriter, TickerBundle, bundle_paths
+
+
+class TickerBundleTest(unittest.TestCase):
+    # Written out of order; the index must come out sorted
+    DOCUMENTS = {
+        'MSFT': {"metadata": {"ticker": "MSFT"}, "prints": [1, 2]},
+        'A': {"metadata": {"ticker": "A"}, "levels": []},
+        'ZZZZ': {"metadata": {"ticker": "ZZZZ"}},
+        'BRK.B': {"metadata": {"ticker": "BRK.B"}, "boxes": [{"box_number": 1}]},
+        'AA': {"metadata": {"ticker": "AA"}},
+        'ABCDEFGHIJKLMNOP': {"metadata": {"ticker": "ABCDEFGHIJKLMNOP"}},
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / 'tickers'
+
+    def write(self, documents):
+        with BundleWriter(self.path) as writer:
+            for ticker, document in documents.items():
+                writer.add(ticker, document)
+
+    def test_round_trip(self):
+        self.write(self.DOCUMENTS)
+        data_path, index_path = bundle_paths(self.path)
+        self.assertEqual(index_path.stat().st_size, HEADER.size + RECORD.size * len(self.DOCUMENTS))
+        with TickerBundle(str(index_path)) as bundle:
+            self.assertEqual(len(bundle), len(self.DOCUMENTS))
+            self.assertEqual(list(bundle.tickers()), sorted(self.DOCUMENTS))
+            for ticker, document in self.DOCUMENTS.items():
+                self.assertEqual(bundle.get(ticker), document, ticker)
+
+            # First and last keys, and misses before, between and after them
+            self.assertIn('A', bundle)
+            self.assertIn('ZZZZ', bundle)
+            for missing in ('0', 'AAA', 'B', 'MSF', 'MSFTX', 'ZZZZZ', '~'):
+                self.assertIsNone(bundle.get(missing), missing)
+                self.assertNotIn(missing, bundle)
+
+            offset, length = bundle.locate('MSFT')
+            self.assertEqual(bundle.range_header('MSFT'), f"bytes={offset}-{offset + length - 1}")
+            self.assertEqual(data_path.read_bytes()[offset:offset + length], bundle.get_bytes('MSFT'))
+            self.assertIsNone(bundle.range_header('AAA'))
+
+    def test_single_and_empty_bundles(self):
+        self.write({'SPY': {"metadata": {}}})
+        with TickerBundle(self.path) as bundle:
+            self.assertEqual(bundle.get('SPY'), {"metadata": {}})
+            self.assertIsNone(bundle.get('QQQ'))
+            self.assertIsNone(bundle.get('AAA'))
+
+        self.write({})
+        with TickerBundle(self.path) as bundle:
+            self.assertEqual(len(bundle), 0)
+            self.assertIsNone(bundle.get('SPY'))
+
+    def test_invalid_tickers(self):
+        with self.assertRaises(ValueError):
+            self.write({'ABCDEFGHIJKLMNOPQ': {}})
+        with self.assertRaises(ValueError):
+            with BundleWriter(self.path) as writer:
+                writer.add('SPY', {})
+                writer.add('SPY', {})
+        # A failed write leaves no bundle and no temp files behind
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
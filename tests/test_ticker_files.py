@@ -0,0 +1,69 @@
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+
+from ticker_files import NEW_FILE_MODE, atomic_write_text, load_manifest, manifest_path, update_manifest
+
+
+class AtomicWriteTest(unittest.TestCase):
+    def mode(self, path):
+        return stat.S_IMODE(os.stat(path).st_mode)
+
+    def test_new_file_is_world_readable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'AAA.json'
+            atomic_write_text(path, '{"new": true}')
+            self.assertEqual(path.read_text(), '{"new": true}')
+            self.assertEqual(self.mode(path), NEW_FILE_MODE)
+            self.assertEqual(os.listdir(tmp), ['AAA.json'])
+
+    def test_replacement_keeps_existing_mode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'AAA.json'
+            path.write_text('old')
+            os.chmod(path, 0o664)
+            atomic_write_text(path, '{"new": true}')
+            self.assertEqual(path.read_text(), '{"new": true}')
+            self.assertEqual(self.mode(path), 0o664)
+
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.tmp.name) / 'ticker_data'
+        self.output_dir.mkdir()
+        for ticker in ('AAPL', 'AAL', 'F'):
+            (self.output_dir / f'{ticker}.json').write_text(ticker)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, paths):
+        return sorted(path.name for path in paths)
+
+    def test_rebuild_replaces_legacy_manifest(self):
+        manifest_path(self.output_dir).write_text('{"version": 1, "files": {}}')
+        self.assertEqual(self.names(update_manifest(self.output_dir)), ['AA.json', 'F.json', 'manifest.json'])
+        self.assertFalse(manifest_path(self.output_dir).exists())
+        self.assertEqual(sorted(load_manifest(self.output_dir)), ['AAL', 'AAPL', 'F'])
+
+    def test_only_touched_shards_are_rewritten(self):
+        update_manifest(self.output_dir)
+        (self.output_dir / 'AAPL.json').write_text('changed')
+        self.assertEqual(self.names(update_manifest(self.output_dir, ['AAPL.json'])), ['AA.json'])
+        self.assertEqual(update_manifest(self.output_dir, ['AAPL.json']), [])
+
+    def test_emptied_shard_is_deleted(self):
+        update_manifest(self.output_dir)
+        (self.output_dir / 'F.json').unlink()
+        touched = update_manifest(self.output_dir, removed=['F.json'])
+        self.assertEqual(self.names(touched), ['F.json'])
+        self.assertFalse(touched[0].exists())
+        self.assertNotIn('F', load_manifest(self.output_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
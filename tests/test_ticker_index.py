@@ -0,0 +1,83 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import ticker_index
+from ticker_files import TickerFileWriter
+from ticker_index import index_path, load_index, read_index
+
+
+def ticker_data(ticker, prints=1):
+    return {
+        "metadata": {"ticker": ticker, "generated_at": "2026-03-02T21:00:00Z",
+                     "date_range": "2025-12-02 to 2026-03-02"},
+        "prints": [{"timestamp": 1772470800 + i, "price": 100.0, "volume": 100, "dollars": 1_000_000, "rank": 1}
+                   for i in range(prints)],
+        "levels": [{"price": 100.0, "volume": 1, "dollars": 1, "rank": 1}],
+        "boxes": [],
+    }
+
+
+class TickerIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output_dir = Path(self.tmp.name) / 'ticker_data'
+        self.output_dir.mkdir()
+        self.writer = TickerFileWriter(self.output_dir)
+        for ticker in ('AAA', 'BBB'):
+            self.writer.write(ticker, ticker_data(ticker))
+        self.writer.flush_index()
+
+    def parses(self):
+        return mock.patch('ticker_index.load_ticker_file', wraps=ticker_index.load_ticker_file)
+
+    def test_writer_keeps_index_current(self):
+        entries = read_index(self.output_dir)
+        self.assertEqual(sorted(entries), ['AAA', 'BBB'])
+        self.assertEqual((entries['AAA']['prints'], entries['AAA']['levels'], entries['AAA']['boxes']), (1, 1, 0))
+        self.assertTrue(entries['AAA']['fingerprint'])
+        with self.parses() as load:
+            self.assertEqual(load_index(self.output_dir), entries)
+        load.assert_not_called()
+
+        self.writer.write('AAA', ticker_data('AAA', prints=3))
+        self.writer.flush_index()
+        self.assertEqual(read_index(self.output_dir)['AAA']['prints'], 3)
+
+    def test_rewritten_and_deleted_files_are_refreshed(self):
+        # Changed outside the writer: only that file is re-parsed
+        path = self.output_dir / 'BBB.json'
+        path.write_text(json.dumps(ticker_data('BBB', prints=2), indent=2))
+        (self.output_dir / 'AAA.json').unlink()
+        (self.output_dir / 'notes.txt').write_text('ignored')
+        with self.parses() as load:
+            entries = load_index(self.output_dir)
+        self.assertEqual([Path(call.args[0]).name for call in load.call_args_list], ['BBB.json'])
+        self.assertEqual(sorted(entries), ['BBB'])
+        self.assertEqual(entries['BBB']['prints'], 2)
+        self.assertEqual(entries['BBB']['size'], path.stat().st_size)
+        self.assertEqual(read_index(self.output_dir), entries)
+
+    def test_rebuild_and_unreadable_index(self):
+        index_path(self.output_dir).write_text('not json')
+        self.assertIsNone(read_index(self.output_dir))
+        with self.parses() as load:
+            entries = load_index(self.output_dir)
+        self.assertEqual(load.call_count, 2)
+        self.assertEqual(read_index(self.output_dir), entries)
+        with self.parses() as load:
+            load_index(self.output_dir, rebuild=True)
+        self.assertEqual(load.call_count, 2)
+
+    def test_broken_file_gets_an_error_entry(self):
+        (self.output_dir / 'CCC.json').write_text('{broken')
+        entry = load_index(self.output_dir)['CCC']
+        self.assertIn('error', entry)
+        self.assertEqual(entry['size'], len('{broken'))
+
+
+if __name__ == '__main__':
+    unittest.main()
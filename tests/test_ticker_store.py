@@ -0,0 +1,82 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ticker_files import load_ticker_file, read_pending
+from ticker_store import AGGREGATE_FILES, TickerStore
+
+
+def ticker_data(ticker, price=100.0):
+    return {
+        "metadata": {"ticker": ticker, "generated_at": "2026-03-02T21:00:00Z",
+                     "date_range": "2025-12-02 to 2026-03-02", "source": "volumeleaders.com",
+                     "script": "populate_ticker_data.py"},
+        "prints": [
+            {"timestamp": 1772470800, "price": price, "volume": 50000, "dollars": 2_000_000_000, "rank": 1,
+             "conditions": "", "exchange": "", "is_dark_pool": True, "relative_size": 0.0, "vcd": 0.0},
+            {"timestamp": 1772384400, "price": price + 1, "volume": 10000, "dollars": 1_010_000, "rank": 12,
+             "conditions": "", "exchange": "", "is_dark_pool": False, "relative_size": 0.0, "vcd": 0.0},
+        ],
+        "levels": [{"price": price, "volume": 164707108, "dollars": 46740605209, "rank": 2}],
+        "boxes": [{"box_number": 1, "high_price": price + 5, "low_price": price - 5, "volume": 4741269,
+                   "dollars": 1335255557, "trades": 31, "date_range": "2025-12-02 to 2026-03-02",
+                   "color": "#FF6B6B"}],
+    }
+
+
+class TickerStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.output_dir = self.root / 'ticker_data'
+        self.output_dir.mkdir()
+        self.store = TickerStore(self.root / 'ticker_store.db')
+        self.store.start_run("2025-12-02 to 2026-03-02")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        data = ticker_data('AAA')
+        self.assertTrue(self.store.put('AAA', json.loads(json.dumps(data))))
+        self.assertEqual(self.store.load('AAA'), data)
+        self.assertFalse(self.store.put('AAA', json.loads(json.dumps(data))))
+
+        self.assertTrue(self.store.materialize_ticker('AAA', self.output_dir))
+        written = load_ticker_file(self.output_dir / 'AAA.json')
+        written['metadata'].pop('fingerprint')
+        self.assertEqual(written, data)
+
+    def test_find_uses_indexed_columns(self):
+        self.store.put('AAA', ticker_data('AAA', 100.0))
+        self.store.put('BBB', ticker_data('BBB', 200.0))
+        dark = self.store.find('prints', dark_pool=True, min_dollars=1e9)
+        self.assertEqual(sorted(ticker for ticker, _ in dark), ['AAA', 'BBB'])
+        self.assertEqual([ticker for ticker, _ in self.store.find('levels', min_price=150)], ['BBB'])
+        self.assertEqual([ticker for ticker, _ in self.store.find('boxes', min_price=104, max_price=106)], ['AAA'])
+
+    def test_aggregates_keep_metadata_and_log_pending(self):
+        legacy = {"metadata": {"source": "volumeleaders.com", "generated_at": "old", "date_range": "old",
+                               "description": "legacy", "criteria": "legacy", "script": "populate_big_prints.py"},
+                  "big_prints": []}
+        (self.root / AGGREGATE_FILES['prints']).write_text(json.dumps(legacy))
+        self.store.put('AAA', ticker_data('AAA'))
+
+        written = self.store.materialize_aggregates(self.root)
+        self.assertEqual(sorted(path.name for path in written), sorted(AGGREGATE_FILES.values()))
+        self.assertEqual(sorted(read_pending(self.root)), sorted(AGGREGATE_FILES.values()))
+        big_prints = json.loads((self.root / AGGREGATE_FILES['prints']).read_text())
+        self.assertEqual(big_prints['metadata']['description'], 'legacy')
+        self.assertEqual(big_prints['metadata']['date_range'], "2025-12-02 to 2026-03-02")
+        self.assertEqual(len(big_prints['big_prints']), 2)
+        levels = json.loads((self.root / AGGREGATE_FILES['levels']).read_text())
+        self.assertEqual(levels['metadata']['script'], 'populate_support_resistance.py')
+        self.assertFalse(list(self.root.glob('*.gz')))
+
+        self.assertEqual(self.store.materialize_aggregates(self.root), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
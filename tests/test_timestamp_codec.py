@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timezone
+
+import numpy as np
+
+from timestamp_codec import (EASTERN, convert_dotnet_timestamp, convert_dotnet_timestamps, market_seconds_array,
+                             parse_dotnet_ms)
+
+
+def dotnet(year, month, day):
+    ms = int(datetime(year, month, day, tzinfo=timezone.utc).timestamp()) * 1000
+    return f"/Date({ms})/"
+
+
+def eastern_midnight(year, month, day):
+    return int(datetime(year, month, day, tzinfo=EASTERN).timestamp())
+
+
+class TimestampCodecTest(unittest.TestCase):
+    # Around the 2026 DST changes: 2026-03-08 (EST -> EDT) and 2026-11-01 (EDT -> EST)
+    DAYS = [(2026, 3, 6), (2026, 3, 7), (2026, 3, 8), (2026, 3, 9),
+            (2026, 10, 31), (2026, 11, 1), (2026, 11, 2), (2026, 12, 31), (2027, 1, 1)]
+
+    def test_parse(self):
+        self.assertEqual(parse_dotnet_ms('/Date(1748563200000)/'), 1748563200000)
+        self.assertEqual(parse_dotnet_ms('x/Date(-5)/'), None)
+        for value in (None, '', 'garbage', 42):
+            self.assertIsNone(parse_dotnet_ms(value))
+
+    def test_eastern_midnight_across_dst(self):
+        for day in self.DAYS:
+            self.assertEqual(convert_dotnet_timestamp(dotnet(*day)), eastern_midnight(*day), day)
+
+    def test_shift_follows_the_offset(self):
+        utc_midnight = int(datetime(2026, 3, 8, tzinfo=timezone.utc).timestamp())
+        self.assertEqual(convert_dotnet_timestamp(dotnet(2026, 3, 8)) - utc_midnight, 18000)
+        utc_midnight = int(datetime(2026, 3, 9, tzinfo=timezone.utc).timestamp())
+        self.assertEqual(convert_dotnet_timestamp(dotnet(2026, 3, 9)) - utc_midnight, 14400)
+        utc_midnight = int(datetime(2026, 11, 2, tzinfo=timezone.utc).timestamp())
+        self.assertEqual(convert_dotnet_timestamp(dotnet(2026, 11, 2)) - utc_midnight, 18000)
+
+    def test_bulk_paths_match_scalar(self):
+        values = [dotnet(*day) for day in self.DAYS] + [None, 'garbage', dotnet(2026, 3, 9)]
+        expected = [convert_dotnet_timestamp(value) for value in values]
+        self.assertEqual(convert_dotnet_timestamps(values), expected)
+
+        ms = np.array([parse_dotnet_ms(dotnet(*day)) for day in self.DAYS], dtype=np.int64)
+        self.assertEqual(market_seconds_array(ms).tolist(), [eastern_midnight(*day) for day in self.DAYS])
+
+
+if __name__ == '__main__':
+    unittest.main()
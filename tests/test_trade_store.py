@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from trade_store import TradeStore, decode_columns, encode_columns
+
+
+def row(day, price):
+    return {'DateKey': day.strftime('%Y%m%d'), 'Price': price, 'Dollars': price * 1000}
+
+
+class TradeStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = TradeStore(Path(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_columns_round_trip(self):
+        rows = [{'Price': 1.5, 'Ticker': 'AAA'}, {'Price': 2.0, 'IsSweep': True}]
+        self.assertEqual(decode_columns(encode_columns(rows)),
+                         [{'Price': 1.5, 'Ticker': 'AAA', 'IsSweep': None},
+                          {'Price': 2.0, 'Ticker': None, 'IsSweep': True}])
+        self.assertEqual(decode_columns({}), [])
+
+    def test_final_and_open_partitions(self):
+        self.store.write_days('AAA', date(2026, 3, 2), date(2026, 3, 4),
+                              [row(date(2026, 3, 2), 10), row(date(2026, 3, 4), 12)],
+                              fetched_on=date(2026, 3, 4))
+        self.assertTrue(self.store.partition_path('AAA', date(2026, 3, 3)).exists())
+        self.assertTrue(self.store.partition_path('AAA', date(2026, 3, 4), final=False).exists())
+        self.assertEqual(self.store.fetch_start('AAA', '2026-03-02', '2026-03-05'), date(2026, 3, 4))
+        rows = self.store.read_window('AAA', '2026-03-02', '2026-03-04')
+        self.assertEqual(sorted(r['Price'] for r in rows), [10, 12])
+
+        # Refetching the open day once it is over finalizes it
+        self.store.write_days('AAA', date(2026, 3, 4), date(2026, 3, 5), [row(date(2026, 3, 4), 13)],
+                              fetched_on=date(2026, 3, 5))
+        self.assertFalse(self.store.partition_path('AAA', date(2026, 3, 4), final=False).exists())
+        self.assertEqual(self.store.fetch_start('AAA', '2026-03-02', '2026-03-05'), date(2026, 3, 5))
+        self.assertEqual([r['Price'] for r in self.store.read_window('AAA', '2026-03-04', '2026-03-04')], [13])
+
+    def test_missing_day_is_refetched(self):
+        self.store.write_days('AAA', date(2026, 3, 2), date(2026, 3, 2), [], fetched_on=date(2026, 3, 10))
+        self.assertEqual(self.store.fetch_start('AAA', '2026-03-02', '2026-03-10'), date(2026, 3, 3))
+
+    def test_read_window_skips_days(self):
+        self.store.write_days('AAA', date(2026, 3, 2), date(2026, 3, 3),
+                              [row(date(2026, 3, 2), 10), row(date(2026, 3, 3), 11)], fetched_on=date(2026, 3, 9))
+        rows = self.store.read_window('AAA', '2026-03-02', '2026-03-03', skip_days={date(2026, 3, 3): []})
+        self.assertEqual([r['Price'] for r in rows], [10])
+
+    def test_prune_drops_days_before_window(self):
+        self.store.write_days('AAA', date(2026, 3, 1), date(2026, 3, 4), [], fetched_on=date(2026, 3, 4))
+        self.store.prune('AAA', '2026-03-03')
+        names = sorted(p.name for p in (Path(self.tmp.name) / 'AAA').iterdir())
+        self.assertEqual(names, ['2026-03-03.json.gz', '2026-03-04.open.json.gz'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Single-file bundle of all tickers with a byte-offset index.
+A bundle is two files:
+  {name}.data - every ticker's JSON document, minified, one after another
+  {name}.idx  - a 16-byte header and fixed-width records sorted by ticker:
+                ticker (16 bytes, NUL-padded ASCII), offset (u64), length (u32)
+A lookup binary-searches the memory-mapped index and reads one slice of the
+memory-mapped data file, so one ticker costs O(log n) without parsing the rest.
+Over HTTP, one Range request on the index (or the whole, small index) plus one
+Range request on the data file fetches a single ticker.
+"""
+
+import json
+import mmap
+import struct
+from pathlib import Path
+
+INDEX_MAGIC = b'VLBIDX\0\0'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<8sII')    # magic, version, record count
+RECORD = struct.Struct('<16sQI')   # ticker, data offset, data length
+TICKER_WIDTH = 16
+
+def bundle_paths(path):
+    """(data path, index path) for a bundle name (any .data/.idx suffix is ignored)"""
+    path = Path(path)
+    if path.suffix in ('.data', '.idx'):
+        path = path.with_suffix('')
+    return path.with_name(path.name + '.data'), path.with_name(path.name + '.idx')
+
+def _ticker_key(ticker):
+    key = ticker.encode('ascii')
+    if len(key) > TICKER_WIDTH:
+        raise ValueError(f"Ticker {ticker!r} is longer than {TICKER_WIDTH} bytes")
+    return key.ljust(TICKER_WIDTH, b'\0')
+
+class BundleWriter:
+    """Streams ticker documents into a bundle.
+
+    Documents are written to the data file as they are added; only the small
+    (ticker, offset, length) entries are kept until close() writes the sorted index.
+    """
+
+    def __init__(self, path):
+        self.data_path, self.index_path = bundle_paths(path)
+        self.data_tmp = self.data_path.with_name(self.data_path.name + '.tmp')
+        self.index_tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+        self.data_file = open(self.data_tmp, 'wb')
+        self.entries = []
+        self.offset = 0
+
+    def add(self, ticker, document):
+        """Append one ticker's document (a JSON-serializable value or pre-encoded bytes)"""
+        key = _ticker_key(ticker)
+        if not isinstance(document, bytes):
+            document = json.dumps(document, separators=(',', ':')).encode('utf-8')
+        self.data_file.write(document)
+        self.data_file.write(b'\n')
+        self.entries.append((key, self.offset, len(document)))
+        self.offset += len(document) + 1
+
+    def close(self):
+        """Write the sorted index and move both files into place"""
+        self.data_file.close()
+        self.entries.sort()
+        for previous, current in zip(self.entries, self.entries[1:]):
+            if previous[0] == current[0]:
+                ticker = current[0].rstrip(b'\0').decode('ascii')
+                self.abort()
+                raise ValueError(f"Duplicate ticker in bundle: {ticker}")
+        with open(self.index_tmp, 'wb') as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.entries)))
+            for entry in self.entries:
+                f.write(RECORD.pack(*entry))
+        self.data_tmp.replace(self.data_path)
+        self.index_tmp.replace(self.index_path)
+        return len(self.entries)
+
+    def abort(self):
+        """Discard the partially written bundle"""
+        self.data_file.close()
+        for path in (self.data_tmp, self.index_tmp):
+            path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class TickerBundle:
+    """Read-only access to a bundle through memory maps"""
+
+    def __init__(self, path):
+        self.data_path, self.index_path = bundle_paths(path)
+        self._index_file = open(self.index_path, 'rb')
+        self._data_file = open(self.data_path, 'rb')
+        self.index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # mmap cannot map an empty file (a bundle with no tickers)
+        self.data = (mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+                     if self.data_path.stat().st_size else b'')
+        magic, version, self.count = HEADER.unpack_from(self.index, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{self.index_path} is not a version {INDEX_VERSION} bundle index")
+
+    def _record(self, i):
+        return RECORD.unpack_from(self.index, HEADER.size + i * RECORD.size)
+
+    def locate(self, ticker):
+        """(offset, length) of a ticker's document in the data file, or None"""
+        key = _ticker_key(ticker)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            record_key, offset, length = self._record(mid)
+            if record_key < key:
+                low = mid + 1
+            elif record_key > key:
+                high = mid
+            else:
+                return offset, length
+        return None
+
+    def get_bytes(self, ticker):
+        location = self.locate(ticker)
+        if location is None:
+            return None
+        offset, length = location
+        return bytes(self.data[offset:offset + length])
+
+    def get(self, ticker):
+        """A ticker's decoded document, or None when it is not in the bundle"""
+        raw = self.get_bytes(ticker)
+        return json.loads(raw) if raw is not None else None
+
+    def range_header(self, ticker):
+        """HTTP Range header value that fetches a ticker's document from the data file"""
+        location = self.locate(ticker)
+        if location is None:
+            return None
+        offset, length = location
+        return f"bytes={offset}-{offset + length - 1}"
+
+    def tickers(self):
+        for i in range(self.count):
+            yield self._record(i)[0].rstrip(b'\0').decode('ascii')
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, ticker):
+        return self.locate(ticker) is not None
+
+    def close(self):
+        self.index.close()
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._index_file.close()
+        self._data_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
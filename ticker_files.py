@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Fingerprinted writes of ticker_data/{TICKER}.json.
+Each file's metadata carries a fingerprint of its prints, levels and boxes.
+A file is only rewritten (atomically, via a temp file and rename) when that
+fingerprint changes, so unchanged tickers keep their bytes and their
+generated_at and never show up in git. The names of rewritten files are
+appended to a pending-publish log in the output directory, which the publish
+step reads to know exactly which files moved.
+
+Files come in three formats, recorded as metadata.format_version:
+1 (pretty)   - indented JSON, every field of every record (no format_version key)
+2 (compact)  - minified, record fields equal to their default are omitted
+3 (columnar) - minified, each section is {"columns": [...], "rows": [[...], ...]}
+load_ticker_file reads all three back into the pretty layout.
+
+The manifest, next to the ticker_data directory, maps each ticker to a hash of
+its file's bytes. It is sharded by the first two characters of the ticker
+(manifest/{PREFIX}.json), so a reader fetches one small shard per ticker. The
+publish step updates the shards of the files it publishes, and readers request
+ticker files under that hash so unchanged files stay cached.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
+
+SECTIONS = ('prints', 'levels', 'boxes')
+FLOAT_DIGITS = 6  # Decimal places floats are rounded to before hashing and writing
+PENDING_LOG = '.pending_publish'
+MANIFEST_FILE = 'manifest.json'  # Pre-shard single-file manifest, removed on the next update
+MANIFEST_DIR = 'manifest'
+MANIFEST_PREFIX_LEN = 2
+INDEX_FLUSH_EVERY = 50  # Rewritten files buffered before their ticker_index.json entries are written
+NEW_FILE_MODE = 0o644  # mkstemp creates 0600; published files must stay world-readable
+
+FORMAT_VERSIONS = {'pretty': 1, 'compact': 2, 'columnar': 3}
+# Field order of each section's records and the values compact files leave out
+SECTION_FIELDS = {
+    'prints': ('timestamp', 'price', 'volume', 'dollars', 'rank', 'conditions', 'exchange',
+               'is_dark_pool', 'relative_size', 'vcd'),
+    'levels': ('price', 'volume', 'dollars', 'rank'),
+    'boxes': ('box_number', 'high_price', 'low_price', 'volume', 'dollars', 'trades', 'date_range', 'color'),
+}
+SECTION_DEFAULTS = {
+    'prints': {'timestamp': None, 'conditions': '', 'exchange': '', 'is_dark_pool': False,
+               'relative_size': 0.0, 'vcd': 0.0},
+    'levels': {},
+    'boxes': {},
+}
+
+def canonical(value):
+    """Round floats (and turn -0.0 into 0.0) throughout a JSON value so equal data serializes identically"""
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS) + 0.0
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    return value
+
+def fingerprint(ticker_data):
+    """Short hash of a ticker's data sections (metadata is not part of it)"""
+    sections = {section: canonical(ticker_data.get(section, [])) for section in SECTIONS}
+    encoded = json.dumps(sections, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def _is_default(value, default):
+    return value == default and type(value) is type(default)
+
+def _expand_record(record, section):
+    """Record in the section's field order with omitted defaults filled back in"""
+    defaults = SECTION_DEFAULTS[section]
+    expanded = {}
+    for field in SECTION_FIELDS[section]:
+        if field in record:
+            expanded[field] = record[field]
+        elif field in defaults:
+            expanded[field] = defaults[field]
+    for field, value in record.items():
+        expanded.setdefault(field, value)
+    return expanded
+
+def encode_section(records, section, file_format):
+    """Encode one section's records for the given file format"""
+    if file_format == 'pretty':
+        return records
+    defaults = SECTION_DEFAULTS[section]
+    compact = [{field: value for field, value in record.items()
+                if not (field in defaults and _is_default(value, defaults[field]))} for record in records]
+    if file_format == 'compact':
+        return compact
+    columns = list(dict.fromkeys(field for record in compact for field in record))
+    return {"columns": columns,
+            "rows": [[record.get(field, defaults.get(field)) for field in columns] for record in records]}
+
+def decode_section(encoded, section):
+    """Inverse of encode_section for any format"""
+    if isinstance(encoded, dict):
+        columns = encoded.get('columns', [])
+        records = [dict(zip(columns, row)) for row in encoded.get('rows', [])]
+    else:
+        records = encoded or []
+    return [_expand_record(record, section) for record in records]
+
+def encode_ticker_data(ticker_data, file_format='pretty'):
+    """JSON text of a ticker file in the given format ('pretty', 'compact' or 'columnar')"""
+    encoded = dict(ticker_data)
+    if file_format == 'pretty':
+        encoded['metadata'] = {key: value for key, value in ticker_data['metadata'].items() if key != 'format_version'}
+        return json.dumps(encoded, indent=2)
+    encoded['metadata'] = {**ticker_data['metadata'], 'format_version': FORMAT_VERSIONS[file_format]}
+    for section in SECTIONS:
+        encoded[section] = encode_section(ticker_data.get(section, []), section, file_format)
+    return json.dumps(encoded, separators=(',', ':'))
+
+def decode_ticker_data(data):
+    """Turn a loaded ticker file of any format into the pretty layout"""
+    if data.get('metadata', {}).get('format_version', 1) == 1:
+        return data
+    decoded = dict(data)
+    for section in SECTIONS:
+        decoded[section] = decode_section(data.get(section, []), section)
+    return decoded
+
+def load_ticker_file(path):
+    """Read a ticker file written in any format (raises like json.load)"""
+    with open(path, 'r') as f:
+        return decode_ticker_data(json.load(f))
+
+def read_metadata(path):
+    """Metadata of an existing ticker file, or None"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('metadata', {})
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def atomic_write_bytes(path, data):
+    """Write bytes to path through a temp file in the same directory and os.replace.
+
+    The file keeps the mode of the file it replaces (NEW_FILE_MODE for a new file).
+    """
+    path = Path(path)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def atomic_write_text(path, text):
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+def append_pending(output_dir, names):
+    """Log file names (relative to output_dir) as changed since the last publish"""
+    with open(Path(output_dir) / PENDING_LOG, 'a') as f:
+        f.write("".join(f"{name}\n" for name in names))
+
+def read_pending(output_dir):
+    """File names logged as changed since the last publish (deduplicated, in log order)"""
+    try:
+        with open(Path(output_dir) / PENDING_LOG, 'r') as f:
+            return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    except FileNotFoundError:
+        return []
+
+def clear_pending(output_dir, names=None):
+    """Drop published names from the pending log (all of them when names is None)"""
+    log_path = Path(output_dir) / PENDING_LOG
+    if names is None:
+        log_path.unlink(missing_ok=True)
+        return
+    published = set(names)
+    remaining = [name for name in read_pending(output_dir) if name not in published]
+    if remaining:
+        atomic_write_text(log_path, "".join(f"{name}\n" for name in remaining))
+    else:
+        log_path.unlink(missing_ok=True)
+
+def content_hash(path):
+    """Short hash of a file's bytes"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def manifest_path(output_dir):
+    """Legacy single-file manifest next to output_dir"""
+    return Path(output_dir).parent / MANIFEST_FILE
+
+def manifest_dir(output_dir):
+    return Path(output_dir).parent / MANIFEST_DIR
+
+def manifest_shard(ticker):
+    """Shard name holding a ticker's manifest entry"""
+    return ticker[:MANIFEST_PREFIX_LEN]
+
+def manifest_shard_path(output_dir, shard):
+    return manifest_dir(output_dir) / f"{shard}.json"
+
+def load_manifest_shard(path):
+    """{ticker: content hash} from one shard, or {} when it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def load_manifest(output_dir):
+    """{ticker: content hash} merged from every shard, or None when there is no manifest directory"""
+    directory = manifest_dir(output_dir)
+    if not directory.is_dir():
+        return None
+    files = {}
+    for path in sorted(directory.glob("*.json")):
+        files.update(load_manifest_shard(path))
+    return files
+
+def update_manifest(output_dir, names=(), removed=()):
+    """Refresh manifest entries for changed and removed file names (hashing only those files).
+
+    Only the shards holding those tickers are rewritten; a shard left empty is
+    deleted. A missing manifest directory is rebuilt from every file in
+    output_dir, and the legacy manifest.json is deleted. Returns the shard (and
+    legacy manifest) paths that were written or deleted; a returned path that
+    no longer exists is a deletion to publish.
+    """
+    output_dir = Path(output_dir)
+    directory = manifest_dir(output_dir)
+    touched = []
+    if not directory.is_dir():
+        directory.mkdir(parents=True)
+        names = [path.name for path in output_dir.glob("*.json")]
+    if manifest_path(output_dir).exists():
+        manifest_path(output_dir).unlink()
+        touched.append(manifest_path(output_dir))
+
+    hashes = {}
+    for name in names:
+        if name.endswith('.json'):
+            ticker = Path(name).stem
+            try:
+                hashes[ticker] = content_hash(output_dir / name)
+            except FileNotFoundError:
+                hashes[ticker] = None
+    for name in removed:
+        if name.endswith('.json'):
+            hashes[Path(name).stem] = None
+
+    by_shard = {}
+    for ticker, digest in hashes.items():
+        by_shard.setdefault(manifest_shard(ticker), {})[ticker] = digest
+    for shard, entries in sorted(by_shard.items()):
+        path = manifest_shard_path(output_dir, shard)
+        files = load_manifest_shard(path)
+        updated = dict(files)
+        for ticker, digest in entries.items():
+            if digest is None:
+                updated.pop(ticker, None)
+            else:
+                updated[ticker] = digest
+        if not updated:
+            if path.exists():
+                path.unlink()
+                touched.append(path)
+            continue
+        if updated == files and path.exists():
+            continue
+        shard_doc = {"version": 1, "files": dict(sorted(updated.items()))}
+        atomic_write_text(path, json.dumps(shard_doc, separators=(',', ':')))
+        touched.append(path)
+    return touched
+
+class TickerFileWriter:
+    """Writes ticker files for one output directory, skipping unchanged data"""
+
+    def __init__(self, output_dir, file_format='pretty', precompress=False):
+        self.output_dir = Path(output_dir)
+        self.file_format = file_format
+        self.lock = threading.Lock()
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+        self.compression = None
+        self.set_precompress(precompress)
+        self.index_updates = {}
+
+    def set_precompress(self, enabled):
+        """Also keep .json.gz/.json.br variants of every file written"""
+        if enabled and self.compression is None:
+            from precompress import CompressionStats
+            self.compression = CompressionStats()
+        elif not enabled:
+            self.compression = None
+
+    def write(self, ticker, ticker_data):
+        """Write {ticker}.json if its data changed. Returns True when the file was rewritten."""
+        output_file = self.output_dir / f"{ticker}.json"
+        for section in SECTIONS:
+            ticker_data[section] = canonical(ticker_data.get(section, []))
+        digest = fingerprint(ticker_data)
+
+        # A format change rewrites the file even when its data is unchanged
+        existing = read_metadata(output_file) or {}
+        if (existing.get('fingerprint') == digest
+                and existing.get('format_version', 1) == FORMAT_VERSIONS[self.file_format]):
+            with self.lock:
+                self.unchanged += 1
+            self.write_variants(output_file, only_missing=True)
+            return False
+
+        ticker_data.setdefault('metadata', {})['fingerprint'] = digest
+        text = encode_ticker_data(ticker_data, self.file_format)
+        atomic_write_text(output_file, text)
+        self.record_pending(output_file.name)
+        self.write_variants(output_file, text.encode('utf-8'))
+        with self.lock:
+            self.written += 1
+            self.bytes_written += len(text)
+            self.index_updates[ticker] = (ticker_data, output_file.stat())
+            flush = len(self.index_updates) >= INDEX_FLUSH_EVERY
+        if flush:
+            self.flush_index()
+        return True
+
+    def flush_index(self):
+        """Write the index entries of files rewritten since the last flush to ticker_index.json"""
+        from ticker_index import index_entry, update_index
+        with self.lock:
+            updates, self.index_updates = self.index_updates, {}
+        update_index(self.output_dir, {ticker: index_entry(data, file_stat) for ticker, (data, file_stat) in updates.items()})
+
+    def write_variants(self, output_file, data=None, only_missing=False):
+        """Refresh the compressed variants of a file when precompression is on"""
+        if self.compression is None:
+            return
+        from precompress import available_encodings, precompress_file, variant_path
+        if only_missing and all(variant_path(output_file, encoding).exists() for encoding in available_encodings()):
+            return
+        written = precompress_file(output_file, self.compression, data)
+        if written:
+            self.record_pending(*(path.name for path in written))
+
+    def record_pending(self, *names):
+        with self.lock:
+            append_pending(self.output_dir, names)
+
+    def report(self):
+        with self.lock:
+            report = (f"   {self.written} {self.file_format} files written ({self.bytes_written / 1024:.0f} KB), "
+                      f"{self.unchanged} unchanged (pending publish: {len(read_pending(self.output_dir))} files)")
+        if self.compression is not None:
+            report += f"\n{self.compression.report()}"
+        return report
+
+_writers = {}
+_writers_lock = threading.Lock()
+_file_format = 'pretty'
+_precompress = False
+
+def configure_ticker_format(file_format='pretty', precompress=False):
+    """Choose the format new ticker files are written in ('pretty', 'compact' or 'columnar')
+    and whether .json.gz/.json.br variants are kept next to them"""
+    global _file_format, _precompress
+    _file_format = file_format
+    _precompress = precompress
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.file_format = file_format
+            writer.set_precompress(precompress)
+
+def get_ticker_writer(output_dir):
+    """Return the process-wide TickerFileWriter for an output directory"""
+    key = Path(output_dir).resolve()
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = TickerFileWriter(key, _file_format, _precompress)
+        return _writers[key]
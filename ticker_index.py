@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Summary index of the ticker files in ticker_data/.
+ticker_index.json (next to the ticker_data directory, gitignored) holds one
+entry per ticker: generated_at, prints/levels/boxes counts, file size,
+fingerprint and the file's mtime. The writer updates entries as it rewrites
+files; readers run a stat-only staleness check and re-parse just the files
+whose size or mtime no longer match, so listing 1,000+ tickers needs no JSON
+parsing of ticker files in the common case.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from ticker_files import atomic_write_text, load_ticker_file
+
+INDEX_FILE = 'ticker_index.json'
+INDEX_VERSION = 1
+
+_index_lock = threading.Lock()
+
+def index_path(output_dir):
+    return Path(output_dir).parent / INDEX_FILE
+
+def index_entry(ticker_data, stat):
+    """Index entry for a ticker file from its (pretty-layout) data and os.stat result"""
+    metadata = ticker_data.get('metadata', {})
+    return {
+        "generated_at": metadata.get('generated_at', ''),
+        "prints": len(ticker_data.get('prints', [])),
+        "levels": len(ticker_data.get('levels', [])),
+        "boxes": len(ticker_data.get('boxes', [])),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "fingerprint": metadata.get('fingerprint'),
+    }
+
+def read_index(output_dir):
+    """{ticker: entry} from the index file, or None when it is missing or unreadable"""
+    try:
+        with open(index_path(output_dir), 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != INDEX_VERSION:
+        return None
+    return data.get('tickers', {})
+
+def write_index(output_dir, tickers):
+    index = {"version": INDEX_VERSION, "tickers": dict(sorted(tickers.items()))}
+    atomic_write_text(index_path(output_dir), json.dumps(index, separators=(',', ':')))
+
+def update_index(output_dir, entries):
+    """Merge {ticker: entry, or None to drop} into the index file"""
+    if not entries:
+        return
+    with _index_lock:
+        tickers = read_index(output_dir) or {}
+        for ticker, entry in entries.items():
+            if entry is None:
+                tickers.pop(ticker, None)
+            else:
+                tickers[ticker] = entry
+        write_index(output_dir, tickers)
+
+def load_index(output_dir, rebuild=False):
+    """Current {ticker: entry} for every file in output_dir.
+
+    Files are only stat'ed; those new or changed since their entry was written
+    are re-parsed, entries for deleted files are dropped, and the index file is
+    rewritten when anything changed. rebuild=True re-parses every file.
+    """
+    output_dir = Path(output_dir)
+    with _index_lock:
+        stored = {} if rebuild else (read_index(output_dir) or {})
+        tickers = {}
+        changed = False
+        for entry in os.scandir(output_dir):
+            if not entry.name.endswith('.json') or not entry.is_file():
+                continue
+            ticker = entry.name[:-len('.json')]
+            stat = entry.stat()
+            current = stored.get(ticker)
+            if current and current.get('size') == stat.st_size and current.get('mtime_ns') == stat.st_mtime_ns:
+                tickers[ticker] = current
+                continue
+            try:
+                tickers[ticker] = index_entry(load_ticker_file(entry.path), stat)
+            except (OSError, ValueError) as e:
+                tickers[ticker] = {"error": str(e), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            changed = True
+        if changed or set(stored) != set(tickers) or not index_path(output_dir).exists():
+            write_index(output_dir, tickers)
+        return tickers
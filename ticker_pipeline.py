@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Streaming assembly of per-ticker results.
+Producers put each component (prints, levels, boxes) as it arrives; a ticker is
+handed to its writer as soon as all components are in and is then dropped, so
+memory stays bounded by the number of partially assembled tickers instead of
+the whole universe.
+"""
+
+import threading
+
+class TickerAssembler:
+    """Joins per-ticker components from several producers with backpressure.
+
+    put() never blocks, so producers cannot deadlock on each other. Instead the
+    leading producer calls wait_for_room() before fetching more, which blocks
+    while `max_pending` tickers are partially assembled; the trailing producers
+    only work on tickers the leader has already delivered, so they drain it.
+    on_ready(ticker, parts) is called outside the lock and may itself block
+    (e.g. on a bounded writer pool) to propagate backpressure upstream.
+    """
+
+    def __init__(self, components, on_ready, max_pending=100):
+        self.components = tuple(components)
+        self.on_ready = on_ready
+        self.max_pending = max(1, max_pending)
+        self.pending = {}
+        self.delivered = {component: set() for component in self.components}
+        self.completed = 0
+        self.peak_pending = 0
+        self.cond = threading.Condition()
+
+    def put(self, component, ticker, value):
+        """Deliver one component for a ticker; repeated deliveries of a component are ignored"""
+        with self.cond:
+            if ticker in self.delivered[component]:
+                return
+            self.delivered[component].add(ticker)
+            parts = self.pending.setdefault(ticker, {})
+            parts[component] = value
+            self.peak_pending = max(self.peak_pending, len(self.pending))
+            if len(parts) < len(self.components):
+                return
+            del self.pending[ticker]
+            self.completed += 1
+            self.cond.notify_all()
+        self.on_ready(ticker, parts)
+
+    def put_many(self, component, results):
+        """Deliver one component for every ticker in a {ticker: value} dict"""
+        for ticker, value in results.items():
+            self.put(component, ticker, value)
+
+    def fill_missing(self, component, tickers, value=None):
+        """Deliver `value` for every ticker still missing `component` (after a producer fails)"""
+        for ticker in tickers:
+            self.put(component, ticker, value)
+
+    def wait_for_room(self):
+        """Block until fewer than max_pending tickers are partially assembled"""
+        with self.cond:
+            while len(self.pending) >= self.max_pending:
+                self.cond.wait()
+
+    def summary(self):
+        return f"{self.completed} tickers assembled, peak {self.peak_pending} pending (limit {self.max_pending})"
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+SQLite store of every ticker's prints, levels and boxes.
+ticker_store.db (WAL mode, gitignored) is the canonical copy when the store is
+enabled: process_ticker writes a ticker's data here first, and
+ticker_data/{TICKER}.json is materialized from it, and on request so are the
+aggregate files (big_prints.json, price_boxes.json, support_resistance_levels.json).
+
+A ticker's rows are only replaced when its fingerprint changes, and each row
+carries the run that last changed it. Every record is kept verbatim as JSON
+next to the indexed columns used for queries (ticker, run, price, dollars,
+dark pool, timestamp), so materialized files match what the pipeline would
+have written directly. Tickers whose file is not current are flagged, and the
+aggregate files are only rebuilt after a ticker changed and only rewritten
+when their bytes differ.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from ticker_files import SECTIONS, append_pending, atomic_write_text, canonical, fingerprint, get_ticker_writer
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'ticker_store.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    date_range TEXT,
+    script TEXT
+);
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    generated_at TEXT,
+    date_range TEXT,
+    fingerprint TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    materialized INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS prints (
+    ticker TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    timestamp INTEGER,
+    price REAL,
+    volume INTEGER,
+    dollars REAL,
+    rank INTEGER,
+    is_dark_pool INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (ticker, seq)
+);
+CREATE TABLE IF NOT EXISTS levels (
+    ticker TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    price REAL,
+    volume INTEGER,
+    dollars REAL,
+    rank INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (ticker, seq)
+);
+CREATE TABLE IF NOT EXISTS boxes (
+    ticker TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    low_price REAL,
+    high_price REAL,
+    volume INTEGER,
+    dollars REAL,
+    trades INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (ticker, seq)
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tickers_run ON tickers (run_id);
+CREATE INDEX IF NOT EXISTS idx_tickers_materialized ON tickers (materialized);
+CREATE INDEX IF NOT EXISTS idx_prints_run ON prints (run_id);
+CREATE INDEX IF NOT EXISTS idx_prints_price ON prints (price);
+CREATE INDEX IF NOT EXISTS idx_prints_timestamp ON prints (timestamp);
+CREATE INDEX IF NOT EXISTS idx_prints_dark_pool ON prints (is_dark_pool, dollars);
+CREATE INDEX IF NOT EXISTS idx_levels_run ON levels (run_id);
+CREATE INDEX IF NOT EXISTS idx_levels_price ON levels (price);
+CREATE INDEX IF NOT EXISTS idx_boxes_run ON boxes (run_id);
+CREATE INDEX IF NOT EXISTS idx_boxes_price ON boxes (low_price, high_price);
+"""
+
+# Indexed columns of each section's table, filled from the record fields of the same name
+SECTION_COLUMNS = {
+    'prints': ('timestamp', 'price', 'volume', 'dollars', 'rank', 'is_dark_pool'),
+    'levels': ('price', 'volume', 'dollars', 'rank'),
+    'boxes': ('low_price', 'high_price', 'volume', 'dollars', 'trades'),
+}
+
+AGGREGATE_FILES = {
+    'prints': 'big_prints.json',
+    'levels': 'support_resistance_levels.json',
+    'boxes': 'price_boxes.json',
+}
+
+# Metadata the legacy populate scripts write, used when an aggregate file does not exist yet
+AGGREGATE_METADATA = {
+    'prints': {
+        "source": "volumeleaders.com",
+        "description": "Top 10 big prints (rank 30 or better) from VolumeLeaders trade data",
+        "criteria": "Top 10 prints per ticker with rank 30 or better over 90-day lookback period",
+        "min_dollars": 500000,
+        "script": "populate_big_prints.py"
+    },
+    'levels': {
+        "source": "volumeleaders.com",
+        "description": "Support and resistance levels derived from VolumeLeaders trade data with volume and dollar values",
+        "criteria": "Top 5 trade levels per ticker over 30-day lookback period",
+        "script": "populate_support_resistance.py"
+    },
+    'boxes': {
+        "source": "volumeleaders.com",
+        "description": "Price boxes (sweep zones) from VolumeLeaders showing support/resistance zones with volume data",
+        "criteria": "Sweep boxes from top trades per ticker over 30-day lookback period with per-ticker box numbering",
+        "script": "populate_price_boxes.py"
+    },
+}
+
+def _column_value(value):
+    # Only plain numbers go into the indexed columns; the record keeps the original value
+    if isinstance(value, bool):
+        return int(value)
+    return value if isinstance(value, (int, float)) else None
+
+def _date_bounds(date_range):
+    start, _, end = (date_range or '').partition(' to ')
+    return start, end or start
+
+class TickerStore:
+    """Process-wide connection to the SQLite ticker store"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, readonly=False):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL lets readers (manage_ticker_data.py query) run while a populate run writes
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.executescript(SCHEMA)
+        self.run_id = None
+        self.stored = 0
+        self.unchanged = 0
+        self.materialized = 0
+
+    def start_run(self, date_range=None, script='populate_ticker_data.py'):
+        """Register a run; rows stored from now on carry its run_id"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute('INSERT INTO runs (started_at, date_range, script) VALUES (?, ?, ?)',
+                                       (datetime.now(timezone.utc).isoformat(), date_range, script))
+            self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def put(self, ticker, ticker_data):
+        """Store a ticker's data. Returns True when its rows changed (and were replaced)."""
+        if self.run_id is None:
+            self.start_run(ticker_data.get('metadata', {}).get('date_range'))
+        sections = {section: canonical(ticker_data.get(section, [])) for section in SECTIONS}
+        digest = fingerprint(sections)
+        metadata = {key: value for key, value in ticker_data.get('metadata', {}).items()
+                    if key not in ('fingerprint', 'format_version')}
+
+        with self.lock, self.conn:
+            row = self.conn.execute('SELECT fingerprint FROM tickers WHERE ticker = ?', (ticker,)).fetchone()
+            if row and row[0] == digest:
+                self.unchanged += 1
+                return False
+            for section in SECTIONS:
+                columns = SECTION_COLUMNS[section]
+                self.conn.execute(f"DELETE FROM {section} WHERE ticker = ?", (ticker,))
+                self.conn.executemany(
+                    f"INSERT INTO {section} (ticker, seq, run_id, {', '.join(columns)}, record) "
+                    f"VALUES ({', '.join('?' * (len(columns) + 4))})",
+                    [(ticker, seq, self.run_id, *(_column_value(record.get(column)) for column in columns),
+                      json.dumps(record, separators=(',', ':')))
+                     for seq, record in enumerate(sections[section])])
+            self.conn.execute(
+                'INSERT OR REPLACE INTO tickers (ticker, run_id, generated_at, date_range, fingerprint, metadata, materialized) '
+                'VALUES (?, ?, ?, ?, ?, ?, 0)',
+                (ticker, self.run_id, metadata.get('generated_at'), metadata.get('date_range'), digest,
+                 json.dumps(metadata)))
+            self._set_state('aggregates_stale', '1')
+            self.stored += 1
+        return True
+
+    def remove_tickers(self, tickers):
+        """Drop tickers and their rows; returns how many were stored"""
+        with self.lock, self.conn:
+            removed = 0
+            for ticker in tickers:
+                for section in SECTIONS:
+                    self.conn.execute(f"DELETE FROM {section} WHERE ticker = ?", (ticker,))
+                removed += self.conn.execute('DELETE FROM tickers WHERE ticker = ?', (ticker,)).rowcount
+            if removed:
+                self._set_state('aggregates_stale', '1')
+        return removed
+
+    def _set_state(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, value))
+
+    def _get_state(self, key):
+        row = self.conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def tickers(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT ticker FROM tickers ORDER BY ticker')]
+
+    def load(self, ticker):
+        """A ticker's data in the pretty ticker file layout, or None when it is not stored"""
+        with self.lock:
+            row = self.conn.execute('SELECT metadata FROM tickers WHERE ticker = ?', (ticker,)).fetchone()
+            if row is None:
+                return None
+            ticker_data = {"metadata": json.loads(row[0])}
+            for section in SECTIONS:
+                ticker_data[section] = [json.loads(record) for (record,) in self.conn.execute(
+                    f"SELECT record FROM {section} WHERE ticker = ? ORDER BY seq", (ticker,))]
+        return ticker_data
+
+    def materialize_ticker(self, ticker, output_dir):
+        """Write ticker_data/{TICKER}.json from the store (skipped by the writer when unchanged)"""
+        ticker_data = self.load(ticker)
+        if ticker_data is None:
+            return False
+        written = get_ticker_writer(output_dir).write(ticker, ticker_data)
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE tickers SET materialized = 1 WHERE ticker = ?', (ticker,))
+            if written:
+                self.materialized += 1
+        return written
+
+    def mark_materialized(self):
+        """Flag every stored ticker's file as current (after importing the files themselves)"""
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE tickers SET materialized = 1')
+
+    def materialize_pending(self, output_dir):
+        """Materialize the files of tickers stored but not yet written (e.g. after a failed save)"""
+        with self.lock:
+            pending = [row[0] for row in self.conn.execute('SELECT ticker FROM tickers WHERE materialized = 0')]
+        for ticker in pending:
+            try:
+                self.materialize_ticker(ticker, output_dir)
+            except Exception as e:
+                print(f"✗ Error materializing {ticker}: {e}")
+        return len(pending)
+
+    def materialize_aggregates(self, root_dir, force=False, precompress=False, stats=None):
+        """Rebuild the aggregate files from the store when a ticker changed since the last build.
+
+        Each file keeps its existing metadata (the legacy script's when it does not
+        exist yet) with only generated_at and date_range refreshed, and is only
+        rewritten when its content differs. Rewritten files, and their .gz/.br
+        variants when precompress is set, are logged in root_dir's pending-publish
+        log. Returns the paths written.
+        """
+        root_dir = Path(root_dir)
+        with self.lock:
+            stale = self._get_state('aggregates_stale') != '0'
+            if not force and not stale and all((root_dir / name).exists() for name in AGGREGATE_FILES.values()):
+                return []
+            documents = self._aggregate_documents()
+
+        written = []
+        for section, name in AGGREGATE_FILES.items():
+            output_file = root_dir / name
+            try:
+                existing_text = output_file.read_text()
+                metadata = json.loads(existing_text).get('metadata') or {}
+            except (OSError, ValueError, AttributeError):
+                existing_text, metadata = None, {}
+            document = documents[section]
+            document['metadata'] = {**(metadata or AGGREGATE_METADATA[section]), **document['metadata']}
+            text = json.dumps(document, indent=2)
+            if text == existing_text:
+                continue
+            atomic_write_text(output_file, text)
+            written.append(output_file)
+            if precompress:
+                from precompress import precompress_file
+                written.extend(precompress_file(output_file, stats, text.encode('utf-8')))
+        if written:
+            append_pending(root_dir, [path.name for path in written])
+        with self.lock, self.conn:
+            self._set_state('aggregates_stale', '0')
+        return written
+
+    def _aggregate_documents(self):
+        """The three legacy aggregate documents built from the stored rows (caller holds the lock).
+
+        Their metadata only holds generated_at and date_range; materialize_aggregates
+        merges in the rest.
+        """
+        from populate_price_boxes import format_dollars, format_volume
+        tickers = {ticker: (generated_at or '', date_range or '') for ticker, generated_at, date_range
+                   in self.conn.execute('SELECT ticker, generated_at, date_range FROM tickers')}
+        generated_at, date_range = max(tickers.values(), default=('', ''))
+
+        def rows(section):
+            return self.conn.execute(f"SELECT ticker, seq, record FROM {section} ORDER BY ticker, seq")
+
+        big_prints = [{"symbol": ticker, **json.loads(record), "print_number": seq + 1}
+                      for ticker, seq, record in rows('prints')]
+        levels = []
+        for ticker, _, record in rows('levels'):
+            level = json.loads(record)
+            levels.append({"symbol": ticker, "price": level.get('price'), "timestamp": tickers[ticker][0],
+                           "volume": level.get('volume', 0), "dollars": level.get('dollars', 0),
+                           "rank": level.get('rank')})
+        price_boxes = []
+        for ticker, _, record in rows('boxes'):
+            box = json.loads(record)
+            start, end = _date_bounds(tickers[ticker][1])
+            box_number = box.get('box_number', 0)
+            price_boxes.append({
+                "symbol": ticker,
+                "type": "sweep_box",
+                "box_number": box_number,
+                "top_left": {"timestamp": f"{start}T09:30:00Z", "price": box.get('high_price', 0)},
+                "bottom_right": {"timestamp": f"{end}T16:00:00Z", "price": box.get('low_price', 0)},
+                "color": box.get('color'),
+                "opacity": 0.3,
+                "label": f"BOX {box_number}: {format_volume(box.get('volume', 0))} shares | "
+                         f"{format_dollars(box.get('dollars', 0))} | {box.get('trades', 0)} trades",
+                "volume": box.get('volume', 0),
+                "value": box.get('dollars', 0),
+                "trades": box.get('trades', 0),
+                "date_range": box.get('date_range', tickers[ticker][1]),
+            })
+
+        metadata = {"generated_at": generated_at, "date_range": date_range}
+        return {
+            'prints': {"metadata": dict(metadata), "big_prints": big_prints},
+            'levels': {"metadata": dict(metadata), "levels": levels},
+            'boxes': {"metadata": dict(metadata), "price_boxes": price_boxes},
+        }
+
+    def find(self, section='prints', ticker=None, min_dollars=None, min_price=None, max_price=None,
+             dark_pool=None, since=None, until=None, run_id=None, limit=None):
+        """(ticker, record) pairs matching the filters, largest dollars first.
+
+        Prices filter prints and levels by price and boxes by overlap with the
+        range; dark_pool and since/until (epoch seconds) only apply to prints.
+        """
+        clauses, params = [], []
+        if ticker:
+            clauses.append('ticker = ?')
+            params.append(ticker)
+        if run_id is not None:
+            clauses.append('run_id = ?')
+            params.append(run_id)
+        if min_dollars is not None:
+            clauses.append('dollars >= ?')
+            params.append(min_dollars)
+        if min_price is not None:
+            clauses.append('high_price >= ?' if section == 'boxes' else 'price >= ?')
+            params.append(min_price)
+        if max_price is not None:
+            clauses.append('low_price <= ?' if section == 'boxes' else 'price <= ?')
+            params.append(max_price)
+        if section == 'prints':
+            if dark_pool is not None:
+                clauses.append('is_dark_pool = ?')
+                params.append(int(dark_pool))
+            if since is not None:
+                clauses.append('timestamp >= ?')
+                params.append(since)
+            if until is not None:
+                clauses.append('timestamp < ?')
+                params.append(until)
+        sql = f"SELECT ticker, record FROM {section}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY dollars DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            return [(row_ticker, json.loads(record)) for row_ticker, record in self.conn.execute(sql, params)]
+
+    def execute(self, sql, params=()):
+        """(column names, rows) of an arbitrary SQL statement"""
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description or ()]
+            return columns, cursor.fetchall()
+
+    def report(self):
+        with self.lock:
+            count = self.conn.execute('SELECT COUNT(*) FROM tickers').fetchone()[0]
+            pending = self.conn.execute('SELECT COUNT(*) FROM tickers WHERE materialized = 0').fetchone()[0]
+            report = (f"   {self.stored} tickers stored, {self.unchanged} unchanged, {self.materialized} files "
+                      f"materialized (run {self.run_id}); {count} tickers in {self.path.name}")
+        if pending:
+            report += f", {pending} not yet materialized"
+        return report
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_store = None
+
+def configure_ticker_store(path=DEFAULT_DB_PATH):
+    """Enable the process-wide ticker store (path=None disables it)"""
+    global _store
+    if _store is not None:
+        _store.close()
+    _store = TickerStore(path) if path else None
+    return _store
+
+def get_ticker_store():
+    """Return the process-wide TickerStore, or None when the store is disabled"""
+    return _store
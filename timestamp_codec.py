@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Shared decoding of VolumeLeaders /Date(ms)/ timestamps.
+VolumeLeaders stamps each trading day at UTC midnight; prints are published as
+the Unix time of that day's midnight in America/New_York so charts place them
+on the right session. The Eastern offset is looked up once per day (EDT is 4
+hours behind UTC, EST 5), rather than assuming a constant 4 hours.
+"""
+
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+EASTERN = ZoneInfo('America/New_York')
+MS_PER_DAY = 86400 * 1000
+
+_DOTNET_DATE = re.compile(r'/Date\((-?\d+)\)/')
+
+def parse_dotnet_ms(value):
+    """Milliseconds from a /Date(ms)/ string, or None when the value does not parse.
+
+    The exact form is sliced directly; anything else falls back to a regex search.
+    """
+    if not value or not isinstance(value, str) or not value.startswith('/Date('):
+        return None
+    digits = value[6:-2]
+    if digits.isascii() and digits.isdigit() and value.endswith(')/'):
+        return int(digits)
+    match = _DOTNET_DATE.search(value)
+    return int(match.group(1)) if match else None
+
+@lru_cache(maxsize=4096)
+def eastern_shift(day_number):
+    """Seconds from UTC midnight to Eastern midnight of the day `day_number` days after the epoch"""
+    day = datetime.fromtimestamp(day_number * 86400, tz=timezone.utc)
+    eastern_midnight = datetime(day.year, day.month, day.day, tzinfo=EASTERN)
+    return int(eastern_midnight.timestamp()) - day_number * 86400
+
+def market_seconds(ms):
+    """Unix seconds for a /Date(ms)/ value, shifted from UTC to Eastern market time"""
+    return ms // 1000 + eastern_shift(ms // MS_PER_DAY)
+
+def market_seconds_array(ms):
+    """Vectorized market_seconds for an integer array of milliseconds"""
+    ms = np.asarray(ms, dtype=np.int64)
+    days, inverse = np.unique(ms // MS_PER_DAY, return_inverse=True)
+    shifts = np.fromiter((eastern_shift(int(day)) for day in days), dtype=np.int64, count=len(days))
+    return ms // 1000 + shifts[inverse.reshape(ms.shape)]
+
+def convert_dotnet_timestamp(timestamp_str):
+    """Convert /Date(1748563200000)/ format to a Unix timestamp on the Eastern market day"""
+    ms = parse_dotnet_ms(timestamp_str)
+    return market_seconds(ms) if ms is not None else None
+
+def convert_dotnet_timestamps(values):
+    """Bulk convert_dotnet_timestamp for a list or array of /Date(ms)/ strings (None where unparseable).
+
+    Day stamps repeat across a batch, so each distinct string is decoded once.
+    """
+    memo = {}
+    converted = []
+    for value in values:
+        try:
+            converted.append(memo[value])
+        except KeyError:
+            memo[value] = timestamp = convert_dotnet_timestamp(value)
+            converted.append(timestamp)
+        except TypeError:
+            converted.append(None)
+    return converted
+
+def format_timestamp(trade):
+    """Unix timestamp of a trade row from its Date field, falling back to DateTime (None if neither parses)"""
+    for field in ('Date', 'DateTime'):
+        timestamp = convert_dotnet_timestamp(trade.get(field, ''))
+        if timestamp is not None:
+            return timestamp
+    return None
+
+def format_timestamps(rows):
+    """Bulk format_timestamp for a list of trade rows"""
+    timestamps = convert_dotnet_timestamps([row.get('Date', '') for row in rows])
+    missing = [n for n, timestamp in enumerate(timestamps) if timestamp is None]
+    if missing:
+        fallback = convert_dotnet_timestamps([rows[n].get('DateTime', '') for n in missing])
+        for n, timestamp in zip(missing, fallback):
+            timestamps[n] = timestamp
+    return timestamps
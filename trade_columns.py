@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Columnar decoding of GetTrades rows.
+Pulls the few fields needed for selection (ticker, rank) out of a response's
+`data` array into NumPy columns and picks each ticker's best-ranked rows with a
+single lexsort, so per-row dicts are only built for the rows that survive.
+"""
+
+import numpy as np
+
+def ticker_codes(rows, tickers):
+    """Column of indexes into `tickers` for each row (-1 for rows of other tickers)"""
+    index = {ticker: i for i, ticker in enumerate(tickers)}
+    return np.fromiter(
+        (index.get(row.get('Ticker', '') or row.get('Symbol', ''), -1) for row in rows),
+        dtype=np.int64, count=len(rows),
+    )
+
+def _rank(value):
+    if value == '' or value is None:
+        return np.inf
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return np.inf
+
+def rank_column(rows):
+    """Column of TradeRank values, with +inf for missing or unparseable ranks"""
+    return np.fromiter((_rank(row.get('TradeRank', 999)) for row in rows), dtype=float, count=len(rows))
+
+def ranked_rows_by_ticker(rows, tickers, max_rank):
+    """Row indexes per ticker with rank <= max_rank, best rank first (ties keep row order).
+
+    Returns {ticker: ndarray of row indexes}; tickers without qualifying rows are omitted.
+    """
+    if not rows:
+        return {}
+    codes = ticker_codes(rows, tickers)
+    ranks = rank_column(rows)
+    keep = np.flatnonzero((codes >= 0) & (ranks <= max_rank))
+    if keep.size == 0:
+        return {}
+    # Primary key ticker, then rank, then original position
+    order = keep[np.lexsort((keep, ranks[keep], codes[keep]))]
+    sorted_codes = codes[order]
+    boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+    return {
+        tickers[int(group_codes[0])]: group
+        for group, group_codes in zip(np.split(order, boundaries), np.split(sorted_codes, boundaries))
+    }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Local support/resistance levels computed from stored trades.
+A volume-at-price profile buckets each ticker's trade dollars by price and
+ranks the buckets, producing the same {price, volume, dollars, rank} records as
+GetTradeLevels without one HTTP call per ticker. A compare mode fetches both
+and reports how closely the local levels track upstream.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
+
+# Price bucket width as a percent of the ticker's median trade price
+DEFAULT_BUCKET_PCT = 0.05
+# GetTradeLevels is asked for 10 levels; the output keeps 5 of them
+UPSTREAM_LEVELS = 10
+MAX_LEVELS = 5
+
+LEVELS_SOURCES = ('upstream', 'local', 'compare')
+
+# Compare results are kept next to the stored trades; 'local' is only used once
+# they show local levels matching upstream on enough tickers
+AGREEMENT_FILE = 'levels_comparison.json'
+MIN_AGREEMENT = 0.9
+MIN_COMPARED = 20
+
+def compute_levels(rows, max_levels=MAX_LEVELS, bucket_pct=DEFAULT_BUCKET_PCT):
+    """Rank price buckets of trade rows by dollars and return level records.
+
+    Mirrors the upstream output: the top UPSTREAM_LEVELS buckets by dollars
+    (rank 1 = most dollars), listed by price descending and cut to max_levels.
+    Each level's price is the volume-weighted average price of its bucket.
+    """
+    prices, volumes, dollars = [], [], []
+    for row in rows:
+        try:
+            price = float(row.get('Price', 0) or 0)
+            volume = float(row.get('Volume', 0) or 0)
+            dollar = float(row.get('Dollars', 0) or 0)
+        except (ValueError, TypeError):
+            continue
+        if price > 0:
+            prices.append(price)
+            volumes.append(volume)
+            dollars.append(dollar)
+    if not prices:
+        return []
+
+    prices = np.asarray(prices)
+    volumes = np.asarray(volumes)
+    dollars = np.asarray(dollars)
+
+    width = max(0.01, float(np.median(prices)) * bucket_pct / 100)
+    _, inverse = np.unique(np.round(prices / width).astype(np.int64), return_inverse=True)
+    bucket_dollars = np.bincount(inverse, weights=dollars)
+    bucket_volume = np.bincount(inverse, weights=volumes)
+    bucket_price_volume = np.bincount(inverse, weights=prices * volumes)
+    bucket_price_sum = np.bincount(inverse, weights=prices)
+    bucket_trades = np.bincount(inverse)
+
+    top = np.argsort(-bucket_dollars, kind='stable')[:UPSTREAM_LEVELS]
+    levels = []
+    for rank, bucket in enumerate(top, 1):
+        volume = bucket_volume[bucket]
+        price = bucket_price_volume[bucket] / volume if volume > 0 else bucket_price_sum[bucket] / bucket_trades[bucket]
+        levels.append({
+            "price": round(float(price), 2),
+            "volume": int(volume),
+            "dollars": int(bucket_dollars[bucket]),
+            "rank": rank
+        })
+    levels.sort(key=lambda level: level['price'], reverse=True)
+    return levels[:max_levels]
+
+def levels_overlap(local, upstream, tolerance_pct=0.5):
+    """Fraction of upstream level prices with a local level within tolerance_pct"""
+    if not upstream:
+        return 1.0 if not local else 0.0
+    local_prices = np.asarray([level['price'] for level in local], dtype=float)
+    matched = 0
+    for level in upstream:
+        price = level['price']
+        if local_prices.size and np.min(np.abs(local_prices - price)) <= abs(price) * tolerance_pct / 100:
+            matched += 1
+    return matched / len(upstream)
+
+class LevelsComparison:
+    """Accumulates local-vs-upstream agreement across tickers"""
+
+    def __init__(self, tolerance_pct=0.5):
+        self.tolerance_pct = tolerance_pct
+        self.overlaps = {}
+        self.lock = threading.Lock()
+
+    def record(self, ticker, local, upstream):
+        overlap = levels_overlap(local, upstream, self.tolerance_pct)
+        with self.lock:
+            self.overlaps[ticker] = overlap
+        return overlap
+
+    def report(self):
+        with self.lock:
+            if not self.overlaps:
+                return "   No tickers compared"
+            values = sorted(self.overlaps.values())
+            worst = sorted(self.overlaps, key=self.overlaps.get)[:5]
+            exact = sum(1 for value in values if value == 1.0)
+            mean = sum(values) / len(values)
+            worst_str = ", ".join(f"{ticker} {self.overlaps[ticker]:.0%}" for ticker in worst)
+        return (f"   {len(values)} tickers compared: mean overlap {mean:.0%} within {self.tolerance_pct}%, "
+                f"{exact} fully matched (worst: {worst_str})")
+
+    def save(self, store_root):
+        """Merge this run's per-ticker overlaps into the store's AGREEMENT_FILE"""
+        path = os.path.join(store_root, AGREEMENT_FILE)
+        saved = load_agreement(store_root)
+        overlaps = saved['overlaps'] if saved and saved.get('tolerance_pct') == self.tolerance_pct else {}
+        with self.lock:
+            overlaps.update(self.overlaps)
+        document = {
+            "tolerance_pct": self.tolerance_pct,
+            "updated_at": datetime.now().isoformat(),
+            "overlaps": overlaps
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=store_root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+def load_agreement(store_root):
+    """Saved compare results ({tolerance_pct, updated_at, overlaps}) or None"""
+    try:
+        with open(os.path.join(store_root, AGREEMENT_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def local_levels_agree(store_root):
+    """(agree, reason): whether saved compare results allow --levels-source local"""
+    saved = load_agreement(store_root)
+    overlaps = list((saved or {}).get('overlaps', {}).values())
+    if len(overlaps) < MIN_COMPARED:
+        return False, f"{len(overlaps)} tickers compared, need {MIN_COMPARED} (run --levels-source compare)"
+    mean = sum(overlaps) / len(overlaps)
+    if mean < MIN_AGREEMENT:
+        return False, f"mean overlap {mean:.0%} over {len(overlaps)} tickers is below {MIN_AGREEMENT:.0%}"
+    return True, f"mean overlap {mean:.0%} over {len(overlaps)} tickers"
+
+_source = 'upstream'
+_comparison = None
+
+def configure_levels_source(source='upstream', tolerance_pct=0.5):
+    """Choose where levels come from: 'upstream', 'local' or 'compare'"""
+    global _source, _comparison
+    _source = source
+    _comparison = LevelsComparison(tolerance_pct) if source == 'compare' else None
+    return _comparison
+
+def get_levels_source():
+    return _source
+
+def get_levels_comparison():
+    return _comparison
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Day-partitioned local store of raw GetTrades rows.
+Rows are kept per ticker and trading day as gzipped column lists
+(trade_store/{TICKER}/{YYYY-MM-DD}.json.gz), so a run only fetches the days it
+does not have yet and composes the full lookback window from partitions.
+A day fetched before it was over is stored as {YYYY-MM-DD}.open.json.gz and
+refetched on the next run.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from timestamp_codec import parse_dotnet_ms
+
+DEFAULT_STORE_DIR = Path(__file__).parent / 'trade_store'
+
+def trade_day(row):
+    """Trading day of a GetTrades row from DateKey (YYYYMMDD) or the /Date(ms)/ field"""
+    date_key = row.get('DateKey')
+    if date_key:
+        try:
+            return datetime.strptime(str(date_key), '%Y%m%d').date()
+        except ValueError:
+            pass
+    ms = parse_dotnet_ms(row.get('Date'))
+    if ms is not None:
+        # VolumeLeaders stamps trading days at UTC midnight
+        return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).date()
+    return None
+
+def encode_columns(rows):
+    """Turn a list of row dicts into {column: [values]} over the union of their keys"""
+    columns = {}
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns[key] = None
+    return {key: [row.get(key) for row in rows] for key in columns}
+
+def decode_columns(columns):
+    """Inverse of encode_columns"""
+    if not columns:
+        return []
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*(columns[key] for key in keys))]
+
+def day_range(start_day, end_day):
+    """Every calendar day from start_day to end_day inclusive"""
+    return [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+
+def parse_day(value):
+    return value if isinstance(value, date) else datetime.strptime(value, '%Y-%m-%d').date()
+
+class TradeStore:
+    """Per-ticker, per-day partitions of raw trade rows.
+
+    A partition is final once it was written after its day ended; the partition
+    for the day a fetch ran on (normally the window's end date) stays open and
+    is refetched next run, so late prints are never lost. Whether a day is
+    final is encoded in the file name, so planning a fetch only stats files.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.days_fetched = 0
+        self.days_reused = 0
+
+    def partition_path(self, ticker, day, final=True):
+        suffix = ".json.gz" if final else ".open.json.gz"
+        return self.root / ticker / f"{day.isoformat()}{suffix}"
+
+    def read_columns(self, ticker, day):
+        """Stored {column: [values]} for a ticker and day (final or open), or None"""
+        for final in (True, False):
+            try:
+                with gzip.open(self.partition_path(ticker, day, final), 'rt') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, EOFError, ValueError):
+                return None
+        return None
+
+    def fetch_start(self, ticker, start_date, end_date):
+        """First day in the window that must be (re)fetched: missing or still open.
+
+        Everything from that day to end_date is refetched in one query; returns
+        end_date when every earlier day is final.
+        """
+        end_day = parse_day(end_date)
+        for day in day_range(parse_day(start_date), end_day - timedelta(days=1)):
+            if not self.partition_path(ticker, day).exists():
+                return day
+        return end_day
+
+    def write_days(self, ticker, start_day, end_day, rows, fetched_on=None):
+        """Write one partition per day in [start_day, end_day] from a ticker's fetched rows.
+
+        Days without rows get an empty partition so they are not refetched.
+        """
+        fetched_on = fetched_on or date.today()
+        by_day = {day: [] for day in day_range(start_day, end_day)}
+        for row in rows:
+            day = trade_day(row)
+            if day in by_day:
+                by_day[day].append(row)
+
+        ticker_dir = self.root / ticker
+        ticker_dir.mkdir(exist_ok=True)
+        for day, day_rows in by_day.items():
+            final = day < fetched_on
+            fd, tmp_path = tempfile.mkstemp(dir=ticker_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                    f.write(json.dumps(encode_columns(day_rows), separators=(',', ':')).encode('utf-8'))
+                os.replace(tmp_path, self.partition_path(ticker, day, final))
+                if final:
+                    self.partition_path(ticker, day, final=False).unlink(missing_ok=True)
+            except OSError as e:
+                print(f"Warning: could not store {ticker} trades for {day}: {e}")
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        with self.lock:
+            self.days_fetched += len(by_day)
+
+    def read_window(self, ticker, start_date, end_date, skip_days=()):
+        """All stored rows for a ticker between start_date and end_date inclusive, except skip_days"""
+        rows = []
+        reused = 0
+        for day in day_range(parse_day(start_date), parse_day(end_date)):
+            if day in skip_days:
+                continue
+            columns = self.read_columns(ticker, day)
+            if columns is not None:
+                rows.extend(decode_columns(columns))
+                reused += 1
+        with self.lock:
+            self.days_reused += reused
+        return rows
+
+    def prune(self, ticker, start_date):
+        """Delete a ticker's partitions from before the window start"""
+        cutoff = parse_day(start_date).isoformat()
+        for path in (self.root / ticker).glob("*.json.gz"):
+            if path.name[:10] < cutoff:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def report(self):
+        return f"   {self.days_fetched} ticker-days fetched, {self.days_reused} ticker-days read from {self.root}"
+
+_store = None
+
+def configure_trade_store(root=DEFAULT_STORE_DIR):
+    """Enable the process-wide trade store (root=None disables it)"""
+    global _store
+    _store = TradeStore(root) if root else None
+    return _store
+
+def get_trade_store():
+    """Return the process-wide TradeStore, or None when the store is disabled"""
+    return _store
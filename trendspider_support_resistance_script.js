@@ -1,15 +1,7 @@
 describe_indicator('Moebot VL Trendspider v5.9.1 (Fixed Line Style Error)', 'overlay');
 
-// Execution tracking and fresh load mechanisms
+// Execution tracking (tags log lines from this run)
 const executionId = Math.random().toString(36).substr(2, 9);
-const currentTime = Date.now();
-const randomDelay = Math.floor(Math.random() * 300) + 100;
-const symbolHash = (typeof constants !== 'undefined' && constants.ticker) ?
-    constants.ticker.toUpperCase().split('').reduce((a, b) => { a = ((a << 5) - a) + b.charCodeAt(0); return a & a; }, 0) : 0;
-
-// Force fresh load tracking
-const tickerChangeDetector = constants.ticker + '_' + Math.floor(Date.now() / 60000); // Changes every minute
-const scriptInstanceId = executionId + '_' + symbolHash + '_' + currentTime;
 
 
 
@@ -46,6 +38,34 @@ function formatNumber(num) {
     return num.toString();
 }
 
+// Ticker files may be compact (format_version 2: default fields omitted) or
+// columnar (format_version 3: {columns, rows}); expand both to plain records
+const PRINT_DEFAULTS = { timestamp: null, conditions: '', exchange: '', is_dark_pool: false, relative_size: 0, vcd: 0 };
+
+function expandSection(section, defaults) {
+    if (!section) return [];
+    let records = section;
+    if (!Array.isArray(section)) {
+        const columns = section.columns || [];
+        records = (section.rows || []).map(function (row) {
+            const record = {};
+            columns.forEach(function (column, i) { record[column] = row[i]; });
+            return record;
+        });
+    }
+    return records.map(function (record) { return Object.assign({}, defaults, record); });
+}
+
+function expandTickerData(data) {
+    const version = (data && data.metadata && data.metadata.format_version) || 1;
+    if (version === 1) return data;
+    return Object.assign({}, data, {
+        prints: expandSection(data.prints, PRINT_DEFAULTS),
+        levels: expandSection(data.levels, {}),
+        boxes: expandSection(data.boxes, {})
+    });
+}
+
 // timestampToBarIndex function removed - now using TrendSpider's optimized land_points_onto_series
 
 function getColorWithOpacity(colorHex, opacity) {
@@ -79,28 +99,22 @@ for (let i = 0; i < close.length; i++) {
 try {
     const currentSymbol = constants.ticker.toUpperCase();
 
-    // Enhanced cache busting for fresh loads on ticker change
     const timestampSeconds = Math.floor(Date.now() / 1000);
     const timestampMinutes = Math.floor(Date.now() / 60000); // Changes every minute
-    const browserCacheBuster = Math.random().toString(36).substr(2, 12);
-
-    // Multi-layer cache busting approach
-    const cacheBuster = [
-        timestampSeconds,
-        executionId,
-        randomDelay,
-        currentSymbol,
-        symbolHash,
-        timestampMinutes,
-        browserCacheBuster,
-        scriptInstanceId.substr(-8) // Last 8 chars of instance ID
-    ].join('_');
-
-    const tickerDataUrl = 'https://raw.githubusercontent.com/donoage/moe-bot-trendspider-data/main/ticker_data/' + currentSymbol + '.json?v=' + cacheBuster + '&t=' + timestampSeconds + '&r=' + browserCacheBuster;
+    const dataBaseUrl = 'https://raw.githubusercontent.com/donoage/moe-bot-trendspider-data/main/';
 
+    // manifest/{first two letters}.json maps each ticker in that shard to a hash of its
+    // file's content. Only the small shard is refreshed (once a minute); the ticker file
+    // is requested under its content hash, so an unchanged file is served from cache
+    const manifestShard = encodeURIComponent(currentSymbol.substr(0, 2));
+    const manifestResponse = await request.http(dataBaseUrl + 'manifest/' + manifestShard + '.json?t=' + timestampMinutes);
+    const manifestFiles = (manifestResponse && !manifestResponse.error && manifestResponse.files) || {};
+    // Tickers missing from the shard (or a failed shard load) fall back to a one-off URL
+    const fileVersion = manifestFiles[currentSymbol] ||
+        (timestampSeconds + '_' + Math.random().toString(36).substr(2, 12));
 
+    const tickerDataUrl = dataBaseUrl + 'ticker_data/' + currentSymbol + '.json?v=' + fileVersion;
 
-    // Use simple HTTP request - cache busting handled via URL parameters
     const tickerResponse = await request.http(tickerDataUrl);
 
     if (tickerResponse.error) {
@@ -109,7 +123,7 @@ try {
         paint(emptyLine, { name: 'NoData', color: '#888888' });
         incrementPaintedLines();
     } else {
-        const tickerData = tickerResponse;
+        const tickerData = expandTickerData(tickerResponse);
 
 
 
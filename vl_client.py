@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the VolumeLeaders endpoints.
+Keeps one pooled keep-alive requests.Session for every fetch_* function and
+precompiles the DataTables form payload for each endpoint, so a request only
+copies a template and fills in tickers and dates.
+"""
+
+import threading
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_rate_limiter, endpoint_name
+from retry_policy import get_retry_policy, AUTH_STATUS
+from auth_provider import AuthProvider
+from response_cache import get_response_cache, CacheMissError
+
+BASE_URL = "https://www.volumeleaders.com"
+TRADES_ENDPOINT = "/Trades/GetTrades"
+LEVELS_ENDPOINT = "/Chart/GetTradeLevels"
+
+# Seconds to wait for the TCP/TLS connection; the per-call timeout bounds the read
+CONNECT_TIMEOUT = 10
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "X-Requested-With": "XMLHttpRequest",
+    "User-Agent": USER_AGENT,
+}
+
+def _datatables_columns(columns):
+    """Expand (data, name, orderable) tuples into DataTables columns[i][...] form fields"""
+    fields = {}
+    for i, (data_field, name, orderable) in enumerate(columns):
+        fields[f"columns[{i}][data]"] = data_field
+        fields[f"columns[{i}][name]"] = name
+        fields[f"columns[{i}][searchable]"] = "true"
+        fields[f"columns[{i}][orderable]"] = orderable
+        fields[f"columns[{i}][search][value]"] = ""
+        fields[f"columns[{i}][search][regex]"] = "false"
+    return fields
+
+# Column layout used by the big prints queries (TradeRank is column 11)
+TRADES_COLUMNS = [
+    ("DateTime", "Date/Time", "true"),
+    ("Dollars", "$$", "true"),
+    ("Price", "Price", "true"),
+    ("Volume", "Volume", "true"),
+    ("Conditions", "Conditions", "false"),
+    ("RelativeSize", "Relative Size", "true"),
+    ("VolumeConcentrationRatio", "VCD", "true"),
+    ("Exchange", "Exchange", "false"),
+    ("SecurityTypeDisplay", "Type", "false"),
+    ("Symbol", "Symbol", "false"),
+    ("IsDarkPool", "Dark Pool", "false"),
+    ("TradeRank", "Rank", "true"),
+    ("FullTimeString24", "Time", "true"),
+    ("Date", "Date", "true"),
+    ("DateKey", "DateKey", "true"),
+]
+
+# Column layout used by the sweep boxes query (the Trades page grid)
+BOXES_COLUMNS = [
+    ("FullTimeString24", "", "false"),
+    ("FullTimeString24", "FullTimeString24", "true"),
+    ("Ticker", "Ticker", "true"),
+    ("Current", "Current", "true"),
+    ("Trade", "Trade", "true"),
+    ("Sector", "Sector", "true"),
+    ("Industry", "Industry", "true"),
+    ("Volume", "Sh", "true"),
+    ("Dollars", "$$", "true"),
+    ("DollarsMultiplier", "RS", "true"),
+    ("CumulativeDistribution", "PCT", "true"),
+    ("TradeRank", "Rank", "true"),
+    ("LastComparibleTradeDate", "Last Traded", "true"),
+    ("LastComparibleTradeDate", "Charts", "true"),
+]
+
+LEVELS_COLUMNS = [
+    ("Price", "Price", "false"),
+    ("Dollars", "$$", "false"),
+    ("Volume", "Sh", "false"),
+    ("Trades", "Trades", "false"),
+    ("RelativeSize", "RS", "false"),
+    ("CumulativeDistribution", "PCT", "false"),
+    ("TradeLevelRank", "Rank", "false"),
+    ("Dates", "Dates", "false"),
+]
+
+# Filters shared by every GetTrades query; endpoint templates override what differs
+_TRADES_FILTERS = {
+    "Tickers": "",
+    "SectorIndustry": "",
+    "StartDate": "",
+    "EndDate": "",
+    "MinVolume": "0",
+    "MaxVolume": "2000000000",
+    "MinPrice": "0",
+    "MaxPrice": "100000",
+    "MinDollars": "0",
+    "MaxDollars": "300000000000",
+    "Conditions": "0",
+    "VCD": "0",
+    "SecurityTypeKey": "-1",
+    "RelativeSize": "0",
+    "DarkPools": "-1",
+    "Sweeps": "-1",
+    "LatePrints": "-1",
+    "SignaturePrints": "-1",
+    "EvenShared": "-1",
+    "TradeRank": "-1",
+    "IncludePremarket": "1",
+    "IncludeRTH": "1",
+    "IncludeAH": "1",
+    "IncludeOpening": "1",
+    "IncludeClosing": "1",
+    "IncludePhantom": "1",
+    "IncludeOffsetting": "1",
+}
+
+BIG_PRINTS_TEMPLATE = {
+    "draw": "1",
+    "start": "0",
+    "length": "5000",
+    "search[value]": "",
+    "search[regex]": "false",
+    **_TRADES_FILTERS,
+    "MinDollars": "500000",  # 500K minimum for big prints
+    "TradeRank": "20",  # Only rank 20 or better
+    "order[0][column]": "11",  # Sort by TradeRank
+    "order[0][dir]": "ASC",  # Best ranks first
+    **_datatables_columns(TRADES_COLUMNS),
+}
+
+PRICE_BOXES_TEMPLATE = {
+    "draw": "1",
+    **_datatables_columns(BOXES_COLUMNS),
+    "order[0][column]": "1",
+    "order[0][dir]": "DESC",
+    "start": "0",
+    "length": "1000",
+    "search[value]": "",
+    "search[regex]": "false",
+    **_TRADES_FILTERS,
+    "MinDollars": "18000000",  # 18M minimum for sweep boxes
+    "DarkPools": "1",
+    "Sweeps": "1",
+}
+
+# One query covering both the big prints and the sweep boxes filters:
+# every 500K+ trade of any rank, dark pool or not, sweep or not
+SUPERSET_TRADES_TEMPLATE = {
+    **BIG_PRINTS_TEMPLATE,
+    "TradeRank": "-1",
+}
+
+TRADE_LEVELS_TEMPLATE = {
+    "draw": "1",
+    **_datatables_columns(LEVELS_COLUMNS),
+    "order[0][column]": "0",
+    "order[0][dir]": "DESC",
+    "start": "0",
+    "length": "50",
+    "search[value]": "",
+    "search[regex]": "false",
+    "StartDate": "",
+    "EndDate": "",
+    "Ticker": "",
+    "Levels": "10",
+}
+
+def build_payload(template, **fields):
+    """Copy a precompiled payload template and fill in the per-request fields"""
+    payload = dict(template)
+    payload.update(fields)
+    return payload
+
+def trades_referer(tickers_str, start_date, end_date, query=""):
+    """Referer for GetTrades requests (the Trades page the browser would be on)"""
+    return f"{BASE_URL}/Trades?Tickers={tickers_str}&StartDate={start_date}&EndDate={end_date}{query}"
+
+def levels_referer(ticker, start_date, end_date):
+    """Referer for GetTradeLevels requests (the Chart0 page the browser would be on)"""
+    return (
+        f"{BASE_URL}/Chart0?StartDate={start_date}&EndDate={end_date}&Ticker={ticker}"
+        f"&MinVolume=0&MaxVolume=2000000000&MinDollars=0&MaxDollars=300000000000"
+        f"&MinPrice=0&MaxPrice=100000&DarkPools=-1&Sweeps=-1&LatePrints=-1&SignaturePrints=0"
+        f"&VolumeProfile=0&Levels=10&TradeCount=5&VCD=0&TradeRank=-1&IncludePremarket=1"
+        f"&IncludeRTH=1&IncludeAH=1&IncludeOpening=1&IncludeClosing=1&IncludePhantom=1&IncludeOffsetting=1"
+    )
+
+class VLClient:
+    """Pooled keep-alive session for VolumeLeaders API requests.
+
+    One instance is meant to be shared by every fetch_* function (and across
+    chunks in process_chunks) so TCP/TLS connections are reused.
+    """
+
+    def __init__(self, cookie_func=None, xsrf_func=None, pool_size=16, rate_limiter=None, retry_policy=None,
+                 auth=None, auth_paths=()):
+        self.auth = auth or AuthProvider(cookie_func, xsrf_func, watch_paths=auth_paths)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retry_policy = retry_policy or get_retry_policy()
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def auth_headers(self):
+        """Cookie and XSRF headers for the next request, plus the auth generation they came from"""
+        cookie, xsrf_token, generation = self.auth.get()
+        headers = {}
+        if cookie:
+            headers["Cookie"] = cookie
+        if xsrf_token:
+            headers["x-xsrf-token"] = xsrf_token
+        return headers, generation
+
+    def post(self, endpoint, payload, referer="", timeout=180):
+        """POST a form payload to a VolumeLeaders endpoint and return the response.
+
+        429/5xx responses and connection errors are retried by the retry policy;
+        `timeout` bounds each read, while connecting is capped at CONNECT_TIMEOUT.
+        A 401/403 reloads the auth material and is retried once if it changed.
+        Responses are served from and stored in the response cache when enabled.
+        """
+        cache = get_response_cache()
+        if cache is not None:
+            cached = cache.get(endpoint, payload)
+            if cached is not None:
+                return cached
+            if cache.offline:
+                raise CacheMissError(f"No cached {endpoint} response (offline mode)")
+
+        name = endpoint_name(endpoint)
+        generation = None
+
+        def send():
+            nonlocal generation
+            self.rate_limiter.acquire(name)
+            headers, generation = self.auth_headers()
+            if referer:
+                headers["Referer"] = referer
+            return self.session.post(BASE_URL + endpoint, headers=headers, data=payload,
+                                     timeout=(CONNECT_TIMEOUT, timeout))
+
+        response = self.retry_policy.call(name, send)
+        if response.status_code in AUTH_STATUS and self.auth.refresh(generation):
+            response = self.retry_policy.call(name, send)
+        if cache is not None:
+            cache.put(endpoint, payload, response)
+        return response
+
+    def close(self):
+        self.session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client(cookie_func=None, xsrf_func=None, auth_paths=()):
+    """Return the process-wide VLClient, creating it on first use.
+
+    auth_paths are the credential files whose changes trigger an auth reload.
+    Calling without credentials returns the existing client; passing credentials
+    that differ from the existing client's raises ValueError (close_client() first
+    to switch credentials).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = VLClient(cookie_func=cookie_func, xsrf_func=xsrf_func, auth_paths=auth_paths)
+        elif cookie_func or xsrf_func or auth_paths:
+            auth = _client.auth
+            if (cookie_func is not auth.cookie_loader or xsrf_func is not auth.xsrf_loader
+                    or [Path(path) for path in auth_paths] != auth.watch_paths):
+                raise ValueError("The shared VolumeLeaders client already uses different credentials; "
+                                 "call close_client() before switching cookie/XSRF sources")
+        return _client
+
+def close_client():
+    """Close the process-wide VLClient (a later get_client() opens a fresh one)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None